@@ -1,37 +1,63 @@
+import random
 from board import Board
-from minimax_player import MinimaxPlayer
+from engines import MINIMAX, create_player
+from search_stats import SearchStats
 
 class AIGame:
-    def __init__(self, ai1_depth: int, ai2_depth: int):
+    def __init__(self, ai1_depth: int, ai2_depth: int, time_limit_ms: int = None, opening_book: str = None,
+                 collect_stats: bool = False, ai1_engine: str = MINIMAX, ai2_engine: str = MINIMAX):
+        """Con collect_stats, ai1_stats y ai2_stats acumulan las estadísticas de búsqueda de cada IA.
+
+        ai1_engine y ai2_engine eligen el motor de cada IA (ver engines.ENGINES); solo
+        MinimaxPlayer recolecta estadísticas.
+        """
         self.board = Board()
-        self.ai1 = MinimaxPlayer(ai1_depth, utility_function=1)
-        self.ai2 = MinimaxPlayer(ai2_depth, utility_function=2)
-        
-    def play_game(self, verbose=False) -> int:
-        """Simula un juego entre dos jugadores IA"""
-        self.board.initialize_board()
+        self.ai1 = create_player(ai1_engine, ai1_depth, 1, time_limit_ms,
+                                 opening_book=opening_book, collect_stats=collect_stats)
+        self.ai2 = create_player(ai2_engine, ai2_depth, 2, time_limit_ms,
+                                 opening_book=opening_book, collect_stats=collect_stats)
+        self.ai1_stats = SearchStats() if collect_stats else None
+        self.ai2_stats = SearchStats() if collect_stats else None
+
+
+    def play_game(self, verbose=False, seed: int = None) -> int:
+        """Simula un juego entre dos jugadores IA; con seed la posición inicial es reproducible"""
+        self.board.initialize_board(random.Random(seed) if seed is not None else None)
         
-        while not self.board.is_game_over():
-            # Turno de la IA 1
-            _, best_move = self.ai1.minimax(self.board, self.ai1.depth, float('-inf'), float('inf'), True, True)
-            if best_move:
-                self.board.make_move(best_move, True)
-                if verbose:
-                    print(f"IA1 mueve a {best_move}, puntaje: {self.board.white_score}")
+        try:
+            while not self.board.is_game_over():
+                # Turno de la IA 1
+                best_move = self.ai1.make_move(self.board, True)
+                if self.ai1_stats is not None and self.ai1.last_stats is not None:
+                    self.ai1_stats.merge(self.ai1.last_stats)
+                if best_move:
+                    self.board.make_move(best_move, True)
+                    if verbose:
+                        print(f"IA1 mueve a {best_move}, puntaje: {self.board.white_score}")
             
-            if self.board.is_game_over():
-                break
+                if self.board.is_game_over():
+                    break
                 
-            # Turno de la IA 2
-            _, best_move = self.ai2.minimax(self.board, self.ai2.depth, float('-inf'), float('inf'), True, False)
-            if best_move:
-                self.board.make_move(best_move, False)
-                if verbose:
-                    print(f"IA2 mueve a {best_move}, puntaje: {self.board.black_score}")
-        
+                # Turno de la IA 2
+                best_move = self.ai2.make_move(self.board, False)
+                if self.ai2_stats is not None and self.ai2.last_stats is not None:
+                    self.ai2_stats.merge(self.ai2.last_stats)
+                if best_move:
+                    self.board.make_move(best_move, False)
+                    if verbose:
+                        print(f"IA2 mueve a {best_move}, puntaje: {self.board.black_score}")
+        finally:
+            # Se libera el pool de la búsqueda paralela; la próxima búsqueda lo vuelve a crear
+            self.close()
+
         # Determinar ganador
         if self.board.white_score > self.board.black_score:
             return 1  # Gana IA1
         elif self.board.white_score < self.board.black_score:
             return 2  # Gana IA2
         return 0  # Empate
+
+    def close(self):
+        """Libera los recursos de ambas IA (el pool de la búsqueda paralela)"""
+        self.ai1.close()
+        self.ai2.close()
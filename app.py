@@ -1,37 +1,178 @@
 #app.py
-from flask import Flask, request, jsonify
+import functools
+import json
+import os
+import time
+from flask import Flask, Response, g, request, jsonify, stream_with_context
 from flask_cors import CORS
-from game_app import GameApp
-from collections import defaultdict
-from ai_game import AIGame
+from werkzeug.datastructures import MultiDict
+from game_store import GameStore
+from experiments import DEFAULT_DIFFICULTY_LEVELS, DEFAULT_GAMES_PER_PAIRING
+from experiment_jobs import ExperimentJobQueue, COMPLETED
+import metrics
+from cancellation import CancellationToken, SearchCancelled
+from engines import ENGINES, MINIMAX
 
 app = Flask(__name__)
 CORS(app)
 CORS(app, resources={r"/*": {"origins": "*"}})
 
-# Instancia global del juego
-game = GameApp()
+# Partidas en curso, una por pestaña del navegador, identificadas por game_id.
+# Con OPENING_BOOK_PATH las IA comparten un libro de aperturas en disco (ver opening_book.py)
+# y con PONDER=1 piensan sus respuestas mientras el humano juega (un hilo por partida, ver ponder.py)
+games = GameStore(opening_book=os.environ.get('OPENING_BOOK_PATH'), ponder=os.environ.get('PONDER') == '1')
+
+# Experimentos en segundo plano, con cache de resultados por parámetros y semilla
+experiment_jobs = ExperimentJobQueue()
+
+# Profundidad máxima cuando solo se indica un tiempo límite por movimiento
+TIME_LIMITED_MAX_DEPTH = 32
+
+# Plazo de cada petición: el cliente puede pedir otro con el header X-Timeout-Ms.
+# REQUEST_TIMEOUT_MS=0 deja sin plazo las peticiones que no lo indican.
+TIMEOUT_HEADER = 'X-Timeout-Ms'
+DEFAULT_REQUEST_TIMEOUT_MS = int(os.environ.get('REQUEST_TIMEOUT_MS', 30000))
+MAX_REQUEST_TIMEOUT_MS = 10 * 60 * 1000
+# Endpoints heredados que el frontend espera sin plazo (un experimento completo o una
+# partida IA contra IA con profundidad alta tardan minutos y el frontend no manda
+# X-Timeout-Ms): solo tienen plazo si la petición lo indica
+NO_DEFAULT_DEADLINE_ENDPOINTS = {'/api/run-experiments', '/api/partidaIaVSIa'}
+
+
+def request_endpoint():
+    """Ruta de la petición como etiqueta de las métricas (la plantilla, no la URL con ids)"""
+    return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+
+@app.before_request
+def start_request_metrics():
+    g.request_start = time.perf_counter()
+    metrics.IN_FLIGHT.inc(endpoint=request_endpoint())
+
+
+@app.before_request
+def start_request_deadline():
+    """Crea el CancellationToken de la petición; el plazo corre desde que llega, incluida la espera del lock"""
+    timeout_ms = request.headers.get(TIMEOUT_HEADER)
+    if timeout_ms is None:
+        exempt = request_endpoint() in NO_DEFAULT_DEADLINE_ENDPOINTS
+        timeout_ms = None if exempt else DEFAULT_REQUEST_TIMEOUT_MS or None
+    elif not timeout_ms.isdigit() or int(timeout_ms) <= 0:
+        return jsonify({"error": f"{TIMEOUT_HEADER} debe ser un número entero positivo de milisegundos"}), 400
+    else:
+        timeout_ms = min(int(timeout_ms), MAX_REQUEST_TIMEOUT_MS)
+    g.cancel_token = CancellationToken(timeout_ms)
+
+
+def timeout_response(message, **partial):
+    """Respuesta 504 de una petición que superó su plazo, con lo que se alcanzó a calcular"""
+    return jsonify({"error": message, "timeout": True, **partial}), 504
+
+
+@app.after_request
+def record_request_metrics(response):
+    # En las respuestas en streaming se mide hasta entregar la respuesta, no hasta el último evento
+    endpoint = request_endpoint()
+    metrics.REQUEST_LATENCY.observe(time.perf_counter() - g.request_start, method=request.method,
+                                    endpoint=endpoint)
+    metrics.REQUESTS.inc(method=request.method, endpoint=endpoint, status=response.status_code)
+    if response.status_code >= 500:
+        metrics.REQUEST_ERRORS.inc(method=request.method, endpoint=endpoint)
+    return response
+
+
+@app.teardown_request
+def finish_request_metrics(exc):
+    if 'request_start' in g:
+        metrics.IN_FLIGHT.dec(endpoint=request_endpoint())
+
+
+def parse_time_limit(data):
+    """Lee time_limit_ms del payload; devuelve (valor, error)"""
+    time_limit_ms = data.get('time_limit_ms')
+    if time_limit_ms is None:
+        return None, None
+    if not isinstance(time_limit_ms, int) or isinstance(time_limit_ms, bool) or time_limit_ms <= 0:
+        return None, "El tiempo límite debe ser un número entero positivo de milisegundos"
+    return time_limit_ms, None
+
+
+def requested_game_id():
+    """game_id de la petición: parámetro de la URL o campo del cuerpo JSON"""
+    game_id = request.args.get('game_id')
+    if game_id is None:
+        game_id = (request.get_json(silent=True) or {}).get('game_id')
+    return game_id
+
+
+def with_game(view):
+    """Entrega a la vista la partida de game_id, atendiendo de a una las peticiones de cada partida"""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        session = games.get(requested_game_id())
+        if session is None:
+            return jsonify({"error": "La partida no existe o expiró. Por favor, inicia un nuevo juego."}), 404
+        with session.lock:
+            try:
+                return view(session.game, *args, **kwargs)
+            finally:
+                games.release(session)
+    return wrapper
+
 
 @app.route('/api/start', methods=['POST'])
 def start_game():
-    """Inicia un nuevo juego y devuelve la matriz inicial"""
+    """Inicia un nuevo juego y devuelve la matriz inicial junto con su game_id.
+
+    Si se envía el game_id de una partida existente, se reinicia esa partida.
+    engine elige el motor de las IA: "minimax" (por defecto) o "mcts".
+    """
     data = request.json
     mode = data.get('mode', 'IA vs Humano')
-    difficulty = data.get('difficulty', 4)
-    game.start_new_game(mode, difficulty)
+    time_limit_ms, error = parse_time_limit(data)
+    if error:
+        return jsonify({"error": error}), 400
+    engine = data.get('engine', MINIMAX)
+    if engine not in ENGINES:
+        return jsonify({"error": f"Motor desconocido; opciones: {', '.join(ENGINES)}"}), 400
+    default_difficulty = TIME_LIMITED_MAX_DEPTH if time_limit_ms else 4
+    difficulty = data.get('difficulty', default_difficulty)
+    session = games.get(data.get('game_id')) or games.create()
+    with session.lock:
+        try:
+            session.game.start_new_game(mode, difficulty, time_limit_ms, engine)
+            state = session.game.get_game_state()
+        finally:
+            games.release(session)
     print("juego iniciado")
-    return jsonify(game.get_game_state()), 200
+    return jsonify(dict(state, game_id=session.id)), 200
+
+@app.route('/api/games/<game_id>', methods=['DELETE'])
+def end_session(game_id):
+    """Libera una partida antes de que expire"""
+    if not games.remove(game_id):
+        return jsonify({"error": "La partida no existe"}), 404
+    return jsonify({"message": "Partida eliminada"}), 200
+
+@app.route('/api/games/stats', methods=['GET'])
+def sessions_stats():
+    """Partidas activas, memoria estimada y desalojos"""
+    return jsonify(games.stats()), 200
 
 @app.route('/api/partidaIaVSIa', methods=['POST'])
-def run_simulation():
+@with_game
+def run_simulation(game):
 
     if not game.board:
         return jsonify({"error": "El juego no ha sido inicializado. Por favor, inicia un nuevo juego primero."}), 400
 
     try:
-        history = game.run_ai_vs_ai()
+        history = game.run_ai_vs_ai(g.cancel_token)
         if not history:
             return jsonify({"error": "No se pudo generar la simulación"}), 500
+        if g.cancel_token.cancelled and not game.board.is_game_over():
+            # La partida queda a medias: otra petición puede continuarla
+            return timeout_response("Se agotó el tiempo de la simulación", partial=True, simulation=history)
 
         report = {
             "result": "Empate",
@@ -52,8 +193,38 @@ def run_simulation():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/partidaIaVSIa/stream', methods=['POST'])
+def stream_simulation():
+    """Partida IA contra IA enviada jugada por jugada mientras se calcula.
+
+    Por defecto cada evento es una línea JSON (NDJSON); con ?format=sse se
+    envían como server-sent events. Ver GameApp.iter_ai_vs_ai.
+    """
+    session = games.get(requested_game_id())
+    if session is None:
+        return jsonify({"error": "La partida no existe o expiró. Por favor, inicia un nuevo juego."}), 404
+    if not session.game.board:
+        return jsonify({"error": "El juego no ha sido inicializado. Por favor, inicia un nuevo juego primero."}), 400
+    sse = request.args.get('format') == 'sse'
+    token = g.cancel_token
+
+    def events():
+        # El lock se toma dentro del generador: la partida queda reservada mientras se transmite
+        with session.lock:
+            try:
+                for event in session.game.iter_ai_vs_ai(token):
+                    line = json.dumps(event, separators=(',', ':'))
+                    yield f"data: {line}\n\n" if sse else line + "\n"
+            finally:
+                games.release(session)
+
+    mimetype = 'text/event-stream' if sse else 'application/x-ndjson'
+    return Response(stream_with_context(events()), mimetype=mimetype,
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 @app.route('/api/human-move', methods=['POST'])
-def handle_move():
+@with_game
+def handle_move(game):
     data = request.json
     print("data desde el front", data)
     row, col = data["row"], data["col"]
@@ -68,42 +239,56 @@ def handle_move():
     }), 200
 
 @app.route('/api/ai-turn', methods=['GET'])
-def handle_ai_turn():
+@with_game
+def handle_ai_turn(game):
 
     try:
-        history = game.run_ai_turn()
+        collect_stats = request.args.get('stats', '').lower() in ('1', 'true', 'yes')
+        try:
+            history = game.run_ai_turn(collect_stats, g.cancel_token)
+        except SearchCancelled:
+            return timeout_response("Se agotó el tiempo del turno de la IA", simulation=[game.get_game_state()])
 
         if not history or len(history) < 2:
             return jsonify({"error": "No se pudo procesar el turno de la IA correctamente"}), 500
 
-        return jsonify({
-            "simulation": history
-        }), 200
+        response = {"simulation": history}
+        if game.last_search_stats is not None:
+            response["stats"] = game.last_search_stats.to_dict()
+        return jsonify(response), 200
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/update-difficulty', methods=['POST'])
-def update_difficulty():
+@with_game
+def update_difficulty(game):
     data = request.json
-    if 'difficulty' not in data:
+    if 'difficulty' not in data and 'time_limit_ms' not in data:
         return jsonify({"error": "El nivel de dificultad no fue proporcionado"}), 400
 
-    new_difficulty = data['difficulty']
+    time_limit_ms, error = parse_time_limit(data)
+    if error:
+        return jsonify({"error": error}), 400
+
+    default_difficulty = TIME_LIMITED_MAX_DEPTH if time_limit_ms else game.difficulty
+    new_difficulty = data.get('difficulty', default_difficulty)
     if not isinstance(new_difficulty, int) or new_difficulty <= 0:
         return jsonify({"error": "El nivel de dificultad debe ser un número entero positivo"}), 400
 
-    game.difficulty = new_difficulty
+    game.update_difficulty(new_difficulty, time_limit_ms)
     print("dificultad actualizada a", game.difficulty)
 
     return jsonify({
         "message": "Nivel de dificultad actualizado",
         "difficulty": game.difficulty,
+        "time_limit_ms": game.time_limit_ms,
         "new_matrix": game.get_game_state()["matrix"]
     }), 200
 
 @app.route('/api/quedan-puntos', methods=['GET'])
-def quedan_puntos():
+@with_game
+def quedan_puntos(game):
 
     if not game.board:
         return jsonify({"error": "El juego no ha sido inicializado. Por favor, inicia un nuevo juego primero."}), 400
@@ -111,57 +296,99 @@ def quedan_puntos():
     quedan = game.board.quedan_puntos()
     return jsonify({"quedan_puntos": quedan}), 200
 
+def parse_experiment_params(args):
+    """Lee la configuración del experimento desde los parámetros de la URL.
+
+    levels: "Nombre:profundidad,..." (por defecto Principiante:2,Amateur:4,Experto:6)
+    games: partidas por combinación, seed: semilla base, workers: procesos del pool
+    """
+    levels = DEFAULT_DIFFICULTY_LEVELS
+    if args.get('levels'):
+        levels = {}
+        for item in args['levels'].split(','):
+            name, _, depth = item.partition(':')
+            if not name or not depth.isdigit() or int(depth) <= 0:
+                raise ValueError("levels debe tener el formato Nombre:profundidad,...")
+            levels[name] = int(depth)
+    games = args.get('games', DEFAULT_GAMES_PER_PAIRING, type=int)
+    seed = args.get('seed', 0, type=int)
+    workers = args.get('workers', None, type=int)
+    if games is None or games <= 0 or (workers is not None and workers <= 0):
+        raise ValueError("games y workers deben ser enteros positivos")
+    return levels, games, seed, workers
+
+
+def experiment_params_from_request():
+    """Parámetros del experimento desde la URL y, en un POST, también desde el cuerpo JSON"""
+    args = MultiDict(request.args)
+    body = request.get_json(silent=True) or {}
+    for name, value in body.items():
+        if name == 'levels' and isinstance(value, dict):
+            value = ','.join(f"{level}:{depth}" for level, depth in value.items())
+        args[name] = str(value)
+    return parse_experiment_params(args)
+
+
 @app.route('/api/run-experiments', methods=['GET'])
 def run_experiments():
-    """Ejecuta experimentos y devuelve resultados organizados en JSON"""
-    print("corriendo experimentos")
-    difficulty_levels = {
-        'Principiante': 2,
-        'Amateur': 4,
-        'Experto': 6
-    }
-
-    results = defaultdict(lambda: defaultdict(lambda: [0, 0, 0]))
-    total_ai1, total_ai2, total_draws = 0, 0, 0
-
-    for ai1_level in difficulty_levels:
-        for ai2_level in difficulty_levels:
-            for game in range(10):
-                game = AIGame(difficulty_levels[ai1_level], difficulty_levels[ai2_level])
-                result = game.play_game()
-
-                if result == 1:
-                    results[ai1_level][ai2_level][0] += 1
-                    total_ai1 += 1
-                elif result == 2:
-                    results[ai1_level][ai2_level][1] += 1
-                    total_ai2 += 1
-                else:
-                    results[ai1_level][ai2_level][2] += 1
-                    total_draws += 1
-
-    # Enviar solo los valores necesarios
-    experiments = {
-        "totals": {
-            "ia1": total_ai1,
-            "ia1_percentage": round((total_ai1 / (total_ai1 + total_ai2 + total_draws)) * 100, 2),
-            "ia2": total_ai2,
-            "ia2_percentage": round((total_ai2 / (total_ai1 + total_ai2 + total_draws)) * 100, 2),
-            "draws": total_draws,
-            "draws_percentage": round((total_draws / (total_ai1 + total_ai2 + total_draws)) * 100, 2),
-        },
-        "details": {
-            ai1_level: {
-                ai2_level: {
-                    "wins_ai1": results[ai1_level][ai2_level][0],
-                    "wins_ai2": results[ai1_level][ai2_level][1],
-                    "draws": results[ai1_level][ai2_level][2]
-                } for ai2_level in difficulty_levels
-            } for ai1_level in difficulty_levels
-        }
-    }
+    """Ejecuta experimentos y devuelve resultados organizados en JSON.
 
-    return jsonify(experiments)
+    Espera a que termine el trabajo; solo con el header X-Timeout-Ms espera como
+    mucho ese plazo (REQUEST_TIMEOUT_MS no se aplica aquí). Si el mismo
+    experimento ya se completó, la respuesta sale de la cache. Para no bloquear,
+    usar POST /api/experiments.
+    """
+    print("corriendo experimentos")
+    try:
+        levels, games, seed, workers = parse_experiment_params(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    job = experiment_jobs.submit(levels, games, seed, workers)
+    if not job.wait(g.cancel_token.remaining()):
+        # El experimento sigue en segundo plano: se puede consultar con GET /api/experiments/<job_id>
+        return timeout_response("Se agotó el tiempo de espera del experimento", partial=True, **job.snapshot())
+    snapshot = job.snapshot()
+    if snapshot["status"] != COMPLETED:
+        return jsonify({"error": snapshot["error"] or "El experimento fue cancelado"}), 500
+    return jsonify(snapshot["report"])
+
+
+@app.route('/api/experiments', methods=['POST'])
+def enqueue_experiment():
+    """Encola un experimento y devuelve su id para consultar el progreso"""
+    try:
+        levels, games, seed, workers = experiment_params_from_request()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    job = experiment_jobs.submit(levels, games, seed, workers)
+    snapshot = job.snapshot()
+    # 200 si el resultado ya estaba en cache, 202 si queda pendiente
+    return jsonify(snapshot), 200 if snapshot["status"] == COMPLETED else 202
+
+
+@app.route('/api/experiments/<job_id>', methods=['GET'])
+def experiment_status(job_id):
+    """Progreso del experimento con los resultados parciales de cada combinación"""
+    job = experiment_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "No existe el experimento"}), 404
+    return jsonify(job.snapshot()), 200
+
+
+@app.route('/api/experiments/<job_id>', methods=['DELETE'])
+def cancel_experiment(job_id):
+    """Cancela un experimento encolado o en curso"""
+    job = experiment_jobs.cancel(job_id)
+    if job is None:
+        return jsonify({"error": "No existe el experimento"}), 404
+    return jsonify(job.snapshot()), 200
+
+@app.route('/api/metrics', methods=['GET'])
+def export_metrics():
+    """Latencias, peticiones en curso, errores y tiempos de búsqueda y serialización en formato Prometheus"""
+    return Response(metrics.REGISTRY.render(), content_type=metrics.CONTENT_TYPE)
 
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
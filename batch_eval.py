@@ -0,0 +1,149 @@
+import numpy as np
+from typing import List, Tuple
+import distances
+from zobrist import POS_INDEX
+
+SQUARES = distances.SQUARES
+
+# DISTANCE[métrica, origen, destino] como arreglo para indexar lotes completos
+DISTANCE = np.array(distances.DISTANCE, dtype=np.int64)
+
+# Clave de orden del punto más cercano: distancia * KEY_SCALE + valor (los valores son menores que KEY_SCALE)
+KEY_SCALE = 16
+NO_TARGET_KEY = np.iinfo(np.int64).max
+
+# Límite de máscaras memorizadas por evaluador
+SQUARES_CACHE_LIMIT = 10_000
+
+
+class BatchEvaluator:
+    """Evalúa en una sola pasada vectorizada todos los hijos de un nodo frontera.
+
+    En vez de aplicar cada movimiento y llamar a evaluate_board, arma con NumPy
+    los arreglos (uno por atributo, struct-of-arrays) de los tableros hijos:
+    casilla del caballo que mueve, puntos capturados, multiplicadores,
+    puntajes, objetivo más cercano y repeticiones en el historial, y aplica
+    sobre ellos la misma aritmética que utility_function_1 y utility_function_2.
+    """
+
+    def __init__(self, utility_function: int, metric: int = distances.MANHATTAN):
+        self.utility_function = utility_function
+        self.metric = metric
+        self._squares_cache = {}
+
+    def _squares(self, mask: int) -> np.ndarray:
+        """Casillas encendidas de una máscara de bits, en orden creciente"""
+        squares = self._squares_cache.get(mask)
+        if squares is None:
+            if len(self._squares_cache) >= SQUARES_CACHE_LIMIT:
+                self._squares_cache.clear()
+            squares = np.array([sq for sq in range(SQUARES) if mask >> sq & 1], dtype=np.int64)
+            self._squares_cache[mask] = squares
+        return squares
+
+    def _nearest(self, origins: np.ndarray, squares: np.ndarray, removed: np.ndarray,
+                 values: np.ndarray = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Menor clave distancia/valor de cada origen a las casillas no quitadas por su movimiento.
+
+        Devuelve (clave, existe); sin values la clave es solo la distancia.
+        """
+        if not len(squares):
+            return np.zeros(len(origins), dtype=np.int64), np.zeros(len(origins), dtype=bool)
+        keys = DISTANCE[self.metric][origins[:, None], squares[None, :]]
+        if values is not None:
+            keys = keys * KEY_SCALE + values[None, :]
+        keys = np.where(removed, NO_TARGET_KEY, keys)
+        best = keys.min(axis=1)
+        exists = best != NO_TARGET_KEY
+        return np.where(exists, best, 0), exists
+
+    def _repeats(self, board, targets: np.ndarray, mover_is_white: bool, side_is_white: bool) -> np.ndarray:
+        """Repeticiones del jugador side_is_white en el historial de cada hijo"""
+        history = board.position_history
+        base = history.repeat_count(side_is_white)
+        counts = np.zeros(SQUARES, dtype=np.int64)
+        for position, count in history.position_counts(side_is_white).items():
+            counts[POS_INDEX[position]] = count
+        evicted = history.oldest()
+        if evicted is not None and evicted[1] == side_is_white:
+            sq = POS_INDEX[evicted[0]]
+            if counts[sq] > 1:
+                base -= 1
+            counts[sq] -= 1
+        if mover_is_white != side_is_white:
+            return np.full(len(targets), base, dtype=np.int64)
+        return base + (counts[targets] >= 1)
+
+    def evaluate_children(self, board, moves: List[Tuple[int, int]], mover_is_white: bool,
+                          is_white: bool) -> np.ndarray:
+        """Puntaje de evaluate_board(hijo, is_white) para cada movimiento de mover_is_white"""
+        n = len(moves)
+        targets = np.fromiter((POS_INDEX[move] for move in moves), dtype=np.int64, count=n)
+        points = self._squares(board.points_mask)
+        multipliers = self._squares(board.multipliers_mask)
+        values = np.array(board.point_values, dtype=np.int64)
+
+        # Capturas de cada hijo
+        on_board = np.zeros(SQUARES, dtype=np.int64)
+        on_board[points] = values[points]
+        captured = on_board[targets]
+        multiplier_board = np.zeros(SQUARES, dtype=bool)
+        multiplier_board[multipliers] = True
+        took_multiplier = multiplier_board[targets]
+
+        mover_multiplier = board.white_multiplier if mover_is_white else board.black_multiplier
+        gain = captured * (2 if mover_multiplier else 1)
+        # Capturar con multiplicador lo consume; tomar un multiplicador lo activa
+        mover_multiplier_after = np.where(captured > 0, False, mover_multiplier) | took_multiplier
+
+        my_score = board.white_score if is_white else board.black_score
+        opp_score = board.black_score if is_white else board.white_score
+        if mover_is_white == is_white:
+            score_diff = (my_score - opp_score) + gain
+            my_multiplier = mover_multiplier_after
+            my_squares = targets
+        else:
+            score_diff = (my_score - opp_score) - gain
+            my_multiplier = np.full(n, board.white_multiplier if is_white else board.black_multiplier)
+            my_horse = board.white_horse if is_white else board.black_horse
+            my_squares = np.full(n, POS_INDEX[my_horse] if my_horse is not None else -1, dtype=np.int64)
+        has_horse = my_squares >= 0
+        origins = np.where(has_horse, my_squares, 0)
+
+        point_key, has_point = self._nearest(origins, points, points[None, :] == targets[:, None], values[points])
+        has_point &= has_horse
+        min_distance = np.where(has_point, point_key // KEY_SCALE, 0)
+        point_value = np.where(has_point, point_key % KEY_SCALE, 0)
+        multiplier_distance, has_multiplier = self._nearest(
+            origins, multipliers, multipliers[None, :] == targets[:, None])
+        multiplier_distance = np.where(has_multiplier & has_horse, multiplier_distance, 0)
+
+        distance_factor = -min_distance
+        point_value_factor = point_value * np.where(my_multiplier, 2, 1)
+        history_length = min(len(board.position_history) + 1, board.position_history.capacity)
+
+        if self.utility_function == 1:
+            repetition_penalty = np.zeros(n)
+            if history_length >= 4:
+                repetition_penalty = np.where(self._repeats(board, targets, mover_is_white, is_white) > 0, -5.0, 0)
+            return (
+                score_diff * 10.0 +
+                distance_factor * 1.5 +
+                point_value_factor * 3.0 +
+                (my_multiplier * 5.0) +
+                repetition_penalty
+            )
+        if self.utility_function == 2:
+            repetition_penalty = np.zeros(n)
+            if history_length >= 8:
+                repetition_penalty = np.where(
+                    self._repeats(board, targets, mover_is_white, not is_white) > 0, -10.0, 0)
+            return (
+                score_diff * 8.0 +
+                distance_factor * 2.0 +
+                point_value_factor * 4.0 +
+                (my_multiplier * 10.0) +
+                (8 - multiplier_distance * 1.5) +
+                repetition_penalty
+            )
+        return np.zeros(n)
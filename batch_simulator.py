@@ -0,0 +1,215 @@
+import random
+import numpy as np
+from typing import Iterable
+from board import Board
+from batch_eval import DISTANCE, KEY_SCALE, NO_TARGET_KEY
+import distances
+
+SQUARES = distances.SQUARES
+HISTORY_SIZE = 12
+CYCLE_WINDOW = 4
+MAX_MOVES = 150
+
+# KNIGHT_TARGETS[casilla] = destinos en el orden de Board.get_valid_moves (-1 si salen del tablero)
+_OFFSETS = [(2, 1), (2, -1), (-2, 1), (-2, -1), (1, 2), (1, -2), (-1, 2), (-1, -2)]
+KNIGHT_TARGETS = np.array([
+    [(x + dx) * 8 + (y + dy) if 0 <= x + dx < 8 and 0 <= y + dy < 8 else -1 for dx, dy in _OFFSETS]
+    for x, y in distances.SQUARE_TO_POS
+], dtype=np.int64)
+
+WHITE = 1
+BLACK = 0
+EMPTY = -1
+
+
+class BatchSimulator:
+    """Juega N partidas IA contra IA a la vez, avanzando todas un movimiento por paso.
+
+    Cada partida es una fila de arreglos NumPy (caballos, valores de los puntos,
+    multiplicadores, puntajes y las últimas 12 posiciones), así que la generación
+    de movimientos, la evaluación y el fin de partida se calculan para todas
+    juntas. Cada jugador elige con búsqueda a profundidad 1 sobre su función de
+    utilidad, con el mismo filtrado de movimientos y la misma aritmética que
+    MinimaxPlayer, de modo que las partidas coinciden con AIGame(1, 1) para las
+    mismas semillas.
+    """
+
+    def __init__(self, seeds: Iterable[int], white_utility: int = 1, black_utility: int = 2,
+                 distance_metric: str = 'manhattan'):
+        if distance_metric not in distances.METRICS:
+            raise ValueError(f"Métrica de distancia desconocida: {distance_metric}")
+        self.seeds = list(seeds)
+        self.utility_functions = {WHITE: white_utility, BLACK: black_utility}
+        self.distance = DISTANCE[distances.METRICS[distance_metric]]
+        n = len(self.seeds)
+        self.horses = np.zeros((n, 2), dtype=np.int64)  # [negro, blanco]
+        self.point_values = np.zeros((n, SQUARES), dtype=np.int64)
+        self.multipliers = np.zeros((n, SQUARES), dtype=bool)
+        self.scores = np.zeros((n, 2), dtype=np.int64)
+        self.has_multiplier = np.zeros((n, 2), dtype=bool)
+        self.moves_count = np.zeros(n, dtype=np.int64)
+        # Historial alineado a la derecha: la última columna es la posición más reciente
+        self.history_squares = np.full((n, HISTORY_SIZE), EMPTY, dtype=np.int64)
+        self.history_sides = np.full((n, HISTORY_SIZE), EMPTY, dtype=np.int64)
+        self.history_length = np.zeros(n, dtype=np.int64)
+        self.white_to_move = True
+
+        for game, seed in enumerate(self.seeds):
+            # Misma posición inicial que AIGame.play_game(seed=seed)
+            board = Board()
+            board.initialize_board(random.Random(seed))
+            self.horses[game, WHITE] = board.white_horse[0] * 8 + board.white_horse[1]
+            self.horses[game, BLACK] = board.black_horse[0] * 8 + board.black_horse[1]
+            for (x, y), value in board.points.items():
+                self.point_values[game, x * 8 + y] = value
+            for x, y in board.multipliers:
+                self.multipliers[game, x * 8 + y] = True
+
+    def game_over(self) -> np.ndarray:
+        """Máscara de partidas terminadas (sin puntos o con el límite de movimientos)"""
+        return ~self.point_values.any(axis=1) | (self.moves_count >= MAX_MOVES)
+
+    def _repeat_data(self, side: int):
+        """Apariciones por casilla y repeticiones de un jugador en las entradas que sobreviven al próximo append"""
+        squares = self.history_squares[:, 1:]
+        present = (self.history_sides[:, 1:] == side) & (squares >= 0)
+        counts = ((squares[:, :, None] == np.arange(SQUARES)) & present[:, :, None]).sum(axis=1)
+        repeats = np.maximum(counts - 1, 0).sum(axis=1)
+        return counts, repeats
+
+    def _nearest(self, targets: np.ndarray, occupied: np.ndarray, values: np.ndarray = None):
+        """Menor clave distancia/valor desde cada destino a las casillas ocupadas, sin contar el destino"""
+        keys = self.distance[np.maximum(targets, 0)]
+        if values is not None:
+            keys = keys * KEY_SCALE + values[:, None, :]
+        removed = np.arange(SQUARES) == targets[:, :, None]
+        keys = np.where(occupied[:, None, :] & ~removed, keys, NO_TARGET_KEY)
+        best = keys.min(axis=2)
+        exists = best != NO_TARGET_KEY
+        return np.where(exists, best, 0), exists
+
+    def _candidates(self, rows: np.ndarray, side: int):
+        """Destinos de cada partida y máscara de los que MinimaxPlayer.get_valid_moves conservaría"""
+        targets = KNIGHT_TARGETS[self.horses[rows, side]]
+        safe = np.maximum(targets, 0)
+        valid = (targets >= 0) & (targets != self.horses[rows, 1 - side][:, None])
+        is_point = valid & (self.point_values[rows[:, None], safe] > 0)
+        is_multiplier = valid & ~is_point & self.multipliers[rows[:, None], safe]
+
+        recent_squares = self.history_squares[rows, -CYCLE_WINDOW:]
+        recent = (self.history_sides[rows, -CYCLE_WINDOW:] == side)[:, None, :] & \
+                 (recent_squares[:, None, :] == targets[:, :, None])
+        cycle = recent.any(axis=2) & (self.history_length[rows] >= CYCLE_WINDOW)[:, None]
+        other = valid & ~is_point & ~is_multiplier & ~cycle
+
+        use_points = is_point.any(axis=1)
+        use_multipliers = ~use_points & is_multiplier.any(axis=1) & ~self.has_multiplier[rows, side]
+        use_other = ~use_points & ~use_multipliers & other.any(axis=1)
+        chosen = np.where(use_points[:, None], is_point,
+                          np.where(use_multipliers[:, None], is_multiplier,
+                                   np.where(use_other[:, None], other, valid)))
+        return targets, chosen
+
+    def _evaluate(self, rows: np.ndarray, side: int, targets: np.ndarray) -> np.ndarray:
+        """Utilidad del jugador que mueve después de cada movimiento candidato"""
+        safe = np.maximum(targets, 0)
+        values = self.point_values[rows]
+        multipliers = self.multipliers[rows]
+        captured = values[np.arange(len(rows))[:, None], safe]
+        took_multiplier = multipliers[np.arange(len(rows))[:, None], safe]
+        had_multiplier = self.has_multiplier[rows, side][:, None]
+
+        gain = captured * np.where(had_multiplier, 2, 1)
+        my_multiplier = np.where(captured > 0, False, had_multiplier) | took_multiplier
+        score_diff = (self.scores[rows, side] - self.scores[rows, 1 - side])[:, None] + gain
+
+        point_key, has_point = self._nearest(targets, values > 0, values)
+        min_distance = np.where(has_point, point_key // KEY_SCALE, 0)
+        point_value = np.where(has_point, point_key % KEY_SCALE, 0)
+        multiplier_distance, _ = self._nearest(targets, multipliers)
+
+        distance_factor = -min_distance
+        point_value_factor = point_value * np.where(my_multiplier, 2, 1)
+        history_length = np.minimum(self.history_length[rows] + 1, HISTORY_SIZE)[:, None]
+
+        if self.utility_functions[side] == 1:
+            counts, repeats = self._repeat_data(side)
+            repeated = repeats[rows][:, None] + (counts[rows[:, None], safe] >= 1)
+            repetition_penalty = np.where((history_length >= 4) & (repeated > 0), -5.0, 0)
+            return (
+                score_diff * 10.0 +
+                distance_factor * 1.5 +
+                point_value_factor * 3.0 +
+                (my_multiplier * 5.0) +
+                repetition_penalty
+            )
+        if self.utility_functions[side] == 2:
+            _, repeats = self._repeat_data(1 - side)
+            repetition_penalty = np.where((history_length >= 8) & (repeats[rows][:, None] > 0), -10.0, 0)
+            return (
+                score_diff * 8.0 +
+                distance_factor * 2.0 +
+                point_value_factor * 4.0 +
+                (my_multiplier * 10.0) +
+                (8 - multiplier_distance * 1.5) +
+                repetition_penalty
+            )
+        return np.zeros(targets.shape)
+
+    def step(self) -> int:
+        """Mueve el jugador de turno en todas las partidas activas; devuelve cuántas siguen activas"""
+        side = WHITE if self.white_to_move else BLACK
+        self.white_to_move = not self.white_to_move
+        rows = np.flatnonzero(~self.game_over())
+        if not len(rows):
+            return 0
+
+        targets, chosen = self._candidates(rows, side)
+        has_move = chosen.any(axis=1)
+        rows, targets, chosen = rows[has_move], targets[has_move], chosen[has_move]
+        scores = np.where(chosen, self._evaluate(rows, side, targets), -np.inf)
+        # argmax devuelve el primer máximo, igual que la comparación estricta de minimax
+        moves = targets[np.arange(len(rows)), scores.argmax(axis=1)]
+
+        captured = self.point_values[rows, moves]
+        had_multiplier = self.has_multiplier[rows, side]
+        self.scores[rows, side] += captured * np.where(had_multiplier, 2, 1)
+        self.has_multiplier[rows, side] = np.where(captured > 0, False, had_multiplier) | self.multipliers[rows, moves]
+        self.point_values[rows, moves] = 0
+        self.multipliers[rows, moves] = False
+        self.horses[rows, side] = moves
+        self.moves_count[rows] += 1
+
+        self.history_squares[rows, :-1] = self.history_squares[rows, 1:]
+        self.history_sides[rows, :-1] = self.history_sides[rows, 1:]
+        self.history_squares[rows, -1] = moves
+        self.history_sides[rows, -1] = side
+        self.history_length[rows] = np.minimum(self.history_length[rows] + 1, HISTORY_SIZE)
+        return int((~self.game_over()).sum())
+
+    def run(self) -> np.ndarray:
+        """Juega todas las partidas hasta el final y devuelve los resultados (1: blanco, 2: negro, 0: empate)"""
+        while self.step():
+            pass
+        return self.results()
+
+    def results(self) -> np.ndarray:
+        white, black = self.scores[:, WHITE], self.scores[:, BLACK]
+        return np.where(white > black, 1, np.where(white < black, 2, 0))
+
+
+def simulate_games(seeds: Iterable[int], white_utility: int = 1, black_utility: int = 2,
+                   distance_metric: str = 'manhattan') -> dict:
+    """Juega en lote las partidas de las semillas dadas y cuenta victorias y empates"""
+    simulator = BatchSimulator(seeds, white_utility, black_utility, distance_metric)
+    results = simulator.run()
+    return {
+        "games": len(results),
+        "white_wins": int((results == 1).sum()),
+        "black_wins": int((results == 2).sum()),
+        "draws": int((results == 0).sum()),
+        "results": results,
+        "white_scores": simulator.scores[:, WHITE].copy(),
+        "black_scores": simulator.scores[:, BLACK].copy(),
+        "moves": simulator.moves_count.copy(),
+    }
@@ -0,0 +1,833 @@
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+import numpy as np
+from tabulate import tabulate
+from board import Board
+from bitboard import BitBoard
+from minimax_player import MinimaxPlayer
+from ai_game import AIGame
+from mcts_player import MCTSPlayer
+from engines import MCTS, MINIMAX
+from batch_simulator import simulate_games
+from search_stats import SearchStats
+
+# Semillas fijas para que las posiciones medidas sean siempre las mismas
+BENCHMARK_SEEDS = list(range(10))
+# Profundidad máxima de minimax cuando la jugada solo está limitada por tiempo
+TIME_LIMITED_DEPTH = 32
+
+
+class CountingMinimaxPlayer(MinimaxPlayer):
+    """MinimaxPlayer que cuenta los nodos visitados por la búsqueda"""
+
+    def __init__(self, depth: int, utility_function: int, **kwargs):
+        super().__init__(depth, utility_function, **kwargs)
+        self.nodes = 0
+
+    def minimax(self, board, depth, alpha, beta, is_maximizing, is_white, ply=0):
+        self.nodes += 1
+        return super().minimax(board, depth, alpha, beta, is_maximizing, is_white, ply)
+
+
+class DepthTimingPlayer(MinimaxPlayer):
+    """MinimaxPlayer que anota, para cada iteración de iterative_deepening, el tiempo y los nodos acumulados"""
+
+    def __init__(self, depth: int, utility_function: int, **kwargs):
+        super().__init__(depth, utility_function, **kwargs)
+        self.iterations = []  # (profundidad, segundos acumulados, nodos acumulados)
+        self._started = None
+
+    def iterative_deepening(self, board, is_white, time_limit_ms, max_depth=None):
+        self.iterations = []
+        self.stats = SearchStats()
+        self._started = time.perf_counter()
+        try:
+            return super().iterative_deepening(board, is_white, time_limit_ms, max_depth)
+        finally:
+            self.stats = None
+
+    def _aspiration_search(self, board, depth, is_white, previous_score):
+        result = super()._aspiration_search(board, depth, is_white, previous_score)
+        self.iterations.append((depth, time.perf_counter() - self._started, self.stats.nodes))
+        return result
+
+
+class CloningMinimaxPlayer(MinimaxPlayer):
+    """Versión de referencia de la búsqueda que clona el tablero en cada nodo (antes de unmake_move)"""
+
+    def minimax(self, board, depth, alpha, beta, is_maximizing, is_white, ply=0):
+        if depth == 0 or board.is_game_over() or board.moves_count >= self.MAX_MOVES:
+            return self.evaluate_board(board, is_white), None
+
+        mover = is_white if is_maximizing else not is_white
+        valid_moves = self.get_valid_moves(board, mover)
+        if not valid_moves:
+            return self.evaluate_board(board, is_white), None
+
+        best_move = None
+        best_eval = float('-inf') if is_maximizing else float('inf')
+        for move in valid_moves:
+            board_copy = board.clone()
+            board_copy.make_move(move, mover)
+            eval_score, _ = self.minimax(board_copy, depth - 1, alpha, beta, not is_maximizing, is_white)
+            if (is_maximizing and eval_score > best_eval) or (not is_maximizing and eval_score < best_eval):
+                best_eval = eval_score
+                best_move = move
+            if is_maximizing:
+                alpha = max(alpha, eval_score)
+            else:
+                beta = min(beta, eval_score)
+            if beta <= alpha:
+                break
+        return best_eval, best_move
+
+
+class LoopEvaluationPlayer(MinimaxPlayer):
+    """Funciones de utilidad originales, que recorren todos los puntos y multiplicadores en cada hoja"""
+
+    def utility_function_1(self, board, is_white):
+        my_pos = board.white_horse if is_white else board.black_horse
+        my_score = board.white_score if is_white else board.black_score
+        opp_score = board.black_score if is_white else board.white_score
+        my_multiplier = board.white_multiplier if is_white else board.black_multiplier
+        min_distance = float('inf')
+        max_point_value = 0
+        for point_pos, value in board.points.items():
+            distance = abs(my_pos[0] - point_pos[0]) + abs(my_pos[1] - point_pos[1])
+            # A igual distancia, el de menor valor: el orden del diccionario no está garantizado
+            if distance < min_distance or (distance == min_distance and value < max_point_value):
+                min_distance = distance
+                max_point_value = value
+        distance_factor = -min_distance if min_distance != float('inf') else 0
+        repetition_penalty = 0
+        if len(board.position_history) >= 4:
+            recent_positions = [pos for pos, player in board.position_history[-12:] if player == is_white]
+            if len(set(recent_positions)) < len(recent_positions):
+                repetition_penalty = -5.0
+        return ((my_score - opp_score) * 10.0 + distance_factor * 1.5 +
+                max_point_value * (2 if my_multiplier else 1) * 3.0 + my_multiplier * 5.0 + repetition_penalty)
+
+    def utility_function_2(self, board, is_white):
+        my_pos = board.white_horse if is_white else board.black_horse
+        my_score = board.white_score if is_white else board.black_score
+        opp_score = board.black_score if is_white else board.white_score
+        my_multiplier = board.white_multiplier if is_white else board.black_multiplier
+        min_distance = float('inf')
+        max_point_value = 0
+        for point_pos, value in board.points.items():
+            distance = abs(my_pos[0] - point_pos[0]) + abs(my_pos[1] - point_pos[1])
+            # A igual distancia, el de menor valor: el orden del diccionario no está garantizado
+            if distance < min_distance or (distance == min_distance and value < max_point_value):
+                min_distance = distance
+                max_point_value = value
+        min_distance_to_multiplier = 0
+        if board.multipliers:
+            min_distance_to_multiplier = min(abs(my_pos[0] - pos[0]) + abs(my_pos[1] - pos[1])
+                                             for pos in board.multipliers)
+        distance_factor = -min_distance if min_distance != float('inf') else 0
+        repetition_penalty = 0
+        if len(board.position_history) >= 8:
+            recent_positions = [pos for pos, player in board.position_history[-12:] if player == (not is_white)]
+            if len(set(recent_positions)) < len(recent_positions):
+                repetition_penalty = -10.0
+        return ((my_score - opp_score) * 8.0 + distance_factor * 2.0 +
+                max_point_value * (2 if my_multiplier else 1) * 4.0 + my_multiplier * 10.0 +
+                (8 - min_distance_to_multiplier * 1.5) + repetition_penalty)
+
+
+def seeded_board(seed: int, board_class=Board):
+    """Genera la posición inicial asociada a una semilla"""
+    random.seed(seed)
+    board = board_class()
+    board.initialize_board()
+    return board
+
+
+def measure_nodes_per_second(board_class, depth: int, utility_function: int = 1, seeds=None) -> dict:
+    """Busca el primer movimiento de cada posición semilla y mide nodos por segundo"""
+    seeds = BENCHMARK_SEEDS if seeds is None else seeds
+    player = CountingMinimaxPlayer(depth, utility_function)
+    moves = []
+    start = time.perf_counter()
+    for seed in seeds:
+        board = seeded_board(seed, board_class)
+        moves.append(player.make_move(board, True))
+    elapsed = time.perf_counter() - start
+    return {
+        "board": board_class.__name__,
+        "nodes": player.nodes,
+        "seconds": elapsed,
+        "nodes_per_second": player.nodes / elapsed if elapsed > 0 else 0.0,
+        "moves": moves,
+    }
+
+
+def measure_primitives(board_class, repetitions: int = 2000) -> dict:
+    """Mide operaciones por segundo de get_valid_moves, make_move y clone"""
+    boards = [seeded_board(seed, board_class) for seed in BENCHMARK_SEEDS]
+    results = {}
+
+    start = time.perf_counter()
+    for _ in range(repetitions):
+        for board in boards:
+            board.get_valid_moves(board.white_horse)
+    results["get_valid_moves"] = repetitions * len(boards) / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for _ in range(repetitions):
+        for board in boards:
+            board.clone()
+    results["clone"] = repetitions * len(boards) / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for _ in range(repetitions):
+        for board in boards:
+            board.clone().make_move(board.get_valid_moves(board.white_horse)[0], True)
+    elapsed = time.perf_counter() - start
+    # Se descuenta el costo de clone y get_valid_moves medido arriba
+    per_op = elapsed / (repetitions * len(boards)) - 1 / results["clone"] - 1 / results["get_valid_moves"]
+    results["make_move"] = 1 / per_op if per_op > 0 else float("inf")
+    return results
+
+
+def measure_search_cost(player_class, depth: int = 6, utility_function: int = 1) -> dict:
+    """Mide tiempo por movimiento y memoria pico de la búsqueda sobre las posiciones semilla"""
+    player = player_class(depth, utility_function, tt_size=0)
+    boards = [seeded_board(seed) for seed in BENCHMARK_SEEDS]
+    tracemalloc.start()
+    start = time.perf_counter()
+    moves = [player.make_move(board, True) for board in boards]
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "player": player_class.__name__,
+        "ms_per_move": elapsed * 1000 / len(boards),
+        "peak_kib": peak / 1024,
+        "moves": moves,
+    }
+
+
+def compare_search_strategies(depth: int = 6):
+    """Compara la búsqueda que clona el tablero con la que usa make_move/unmake_move"""
+    results = [measure_search_cost(player_class, depth) for player_class in (CloningMinimaxPlayer, MinimaxPlayer)]
+    table = [[r["player"], f"{r['ms_per_move']:.2f}", f"{r['peak_kib']:.1f}"] for r in results]
+    print(f"\nCosto por movimiento (profundidad {depth}):")
+    print(tabulate(table, headers=["Jugador", "ms/movimiento", "Memoria pico (KiB)"], tablefmt="grid"))
+    if results[0]["moves"] != results[1]["moves"]:
+        print("ADVERTENCIA: las dos búsquedas eligieron movimientos distintos")
+    return results
+
+
+def compare_transposition_sizes(depth: int = 6, sizes=(0, 1 << 10, 1 << 14, 1 << 16), games: int = 3):
+    """Juega partidas completas con distintos tamaños de tabla de transposición y reporta nodos y aciertos"""
+    table = []
+    for size in sizes:
+        nodes, hits, misses, elapsed = 0, 0, 0, 0.0
+        for seed in BENCHMARK_SEEDS[:games]:
+            board = seeded_board(seed)
+            players = [CountingMinimaxPlayer(depth, 1, tt_size=size), CountingMinimaxPlayer(depth, 2, tt_size=size)]
+            is_white = True
+            start = time.perf_counter()
+            while not board.is_game_over():
+                player = players[0 if is_white else 1]
+                move = player.make_move(board, is_white)
+                if move:
+                    board.make_move(move, is_white)
+                is_white = not is_white
+            elapsed += time.perf_counter() - start
+            for player in players:
+                nodes += player.nodes
+                stats = player.transposition_stats()
+                hits += stats.get("hits", 0)
+                misses += stats.get("misses", 0)
+        hit_rate = hits / (hits + misses) if hits + misses else 0.0
+        table.append([size, nodes, f"{elapsed:.2f}", hits, misses, f"{hit_rate:.1%}"])
+    print(f"\nTabla de transposición (profundidad {depth}, {games} partidas):")
+    print(tabulate(table, headers=["Entradas", "Nodos", "Segundos", "Aciertos", "Fallos", "Tasa"], tablefmt="grid"))
+    return table
+
+
+def compare_move_ordering(depth: int = 6, seeds=None):
+    """Mide la reducción de nodos del ordenamiento de movimientos sobre posiciones semilla.
+
+    Se juegan algunos movimientos aleatorios desde cada posición inicial para
+    medir también posiciones de medio juego. La tabla de transposición se
+    desactiva para comparar únicamente el efecto del orden.
+    """
+    seeds = list(range(20)) if seeds is None else seeds
+    table = []
+    totals = {False: 0, True: 0}
+    for seed in seeds:
+        board = seeded_board(seed)
+        rng = random.Random(seed)
+        for ply in range(rng.randint(0, 12)):
+            is_white = ply % 2 == 0
+            moves = board.get_valid_moves(board.white_horse if is_white else board.black_horse)
+            if not moves or board.is_game_over():
+                break
+            board.make_move(rng.choice(moves), is_white)
+        results = {}
+        for ordering in (False, True):
+            for utility_function in (1, 2):
+                player = CountingMinimaxPlayer(depth, utility_function, tt_size=0, move_ordering=ordering)
+                score, move = player.minimax(board, depth, float('-inf'), float('inf'), True, board.white_to_move)
+                results[(ordering, utility_function)] = (score, move, player.nodes)
+                totals[ordering] += player.nodes
+        for utility_function in (1, 2):
+            plain, ordered = results[(False, utility_function)], results[(True, utility_function)]
+            if plain[:2] != ordered[:2]:
+                print(f"ADVERTENCIA: semilla {seed} cambió el resultado con ordenamiento")
+            table.append([seed, utility_function, plain[2], ordered[2], f"{1 - ordered[2] / plain[2]:.1%}"])
+    print(f"\nOrdenamiento de movimientos (profundidad {depth}):")
+    print(tabulate(table, headers=["Semilla", "Utilidad", "Nodos sin orden", "Nodos con orden", "Reducción"],
+                   tablefmt="grid"))
+    print(f"Total: {totals[False]} -> {totals[True]} nodos ({1 - totals[True] / totals[False]:.1%} menos)")
+    return totals
+
+
+def leaf_positions(count: int = 500, seed: int = 0, board_class=Board):
+    """Posiciones alcanzadas con movimientos aleatorios a partir de tableros semilla"""
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        board = seeded_board(rng.randrange(10 ** 6), board_class)
+        is_white = True
+        for _ in range(rng.randint(1, 40)):
+            moves = board.get_valid_moves(board.white_horse if is_white else board.black_horse)
+            if not moves or board.is_game_over():
+                break
+            board.make_move(rng.choice(moves), is_white)
+            is_white = not is_white
+        positions.append(board)
+    return positions
+
+
+def compare_leaf_evaluation(count: int = 500, repetitions: int = 20):
+    """Mide evaluaciones de hoja por segundo: recorrido original contra resúmenes incrementales"""
+    boards = leaf_positions(count)
+    table = []
+    for utility_function in (1, 2):
+        rates = {}
+        for name, player in (("recorrido", LoopEvaluationPlayer(1, utility_function, tt_size=0)),
+                             ("incremental", MinimaxPlayer(1, utility_function, tt_size=0)),
+                             ("incremental (knight)", MinimaxPlayer(1, utility_function, tt_size=0,
+                                                                    distance_metric='knight'))):
+            start = time.perf_counter()
+            for _ in range(repetitions):
+                for board in boards:
+                    player.evaluate_board(board, True)
+                    player.evaluate_board(board, False)
+            rates[name] = 2 * repetitions * len(boards) / (time.perf_counter() - start)
+        reference = LoopEvaluationPlayer(1, utility_function, tt_size=0)
+        incremental = MinimaxPlayer(1, utility_function, tt_size=0)
+        mismatches = sum(
+            abs(reference.evaluate_board(board, side) - incremental.evaluate_board(board, side)) > 1e-9
+            for board in boards for side in (True, False)
+        )
+        table.append([utility_function] + [f"{rate:.0f}" for rate in rates.values()] +
+                     [f"{rates['incremental'] / rates['recorrido']:.2f}x", mismatches])
+    print(f"\nEvaluaciones de hoja por segundo ({count} posiciones):")
+    print(tabulate(table, headers=["Utilidad", "Recorrido", "Incremental", "Incremental (knight)",
+                                   "Aceleración", "Diferencias"], tablefmt="grid"))
+    return table
+
+
+def compare_batch_leaf_evaluation(count: int = 200, batch_sizes=(1, 2, 4, 8, 16, 32, 64, 128, 256),
+                                  utility_function: int = 1, depth: int = 4):
+    """Hojas por segundo hoja por hoja contra la evaluación vectorizada según el tamaño del lote.
+
+    Un nodo tiene a lo sumo 8 hijos; los lotes más grandes repiten sus movimientos
+    solo para medir en qué tamaño la pasada de NumPy empieza a convenir.
+    """
+    boards = leaf_positions(count, seed=11)
+    player = MinimaxPlayer(1, utility_function, tt_size=0, batch_leaves=True)
+    nodes = []
+    for board in boards:
+        mover = board.white_to_move
+        moves = player.get_valid_moves(board, mover)
+        if moves:
+            nodes.append((board, moves, mover))
+
+    leaves = 0
+    start = time.perf_counter()
+    for board, moves, mover in nodes:
+        for move in moves:
+            board.make_move(move, mover)
+            player.evaluate_board(board, True)
+            board.unmake_move()
+        leaves += len(moves)
+    scalar_rate = leaves / (time.perf_counter() - start)
+
+    table = []
+    crossover = None
+    for size in batch_sizes:
+        batches = [(board, (moves * (size // len(moves) + 1))[:size], mover) for board, moves, mover in nodes]
+        start = time.perf_counter()
+        for board, moves, mover in batches:
+            player.batch_evaluator.evaluate_children(board, moves, mover, True)
+        rate = size * len(batches) / (time.perf_counter() - start)
+        if crossover is None and rate > scalar_rate:
+            crossover = size
+        table.append([size, f"{rate:.0f}", f"{rate / scalar_rate:.2f}x"])
+    print(f"\nEvaluación vectorizada de hojas ({len(nodes)} nodos, hoja por hoja: {scalar_rate:.0f} hojas/s):")
+    print(tabulate(table, headers=["Lote", "Hojas/s", "Relativo"], tablefmt="grid"))
+    print(f"Lote mínimo en que conviene: {crossover if crossover is not None else 'ninguno de los medidos'}")
+
+    games = []
+    for batch_leaves in (False, True):
+        player = CountingMinimaxPlayer(depth, utility_function, tt_size=0, batch_leaves=batch_leaves)
+        start = time.perf_counter()
+        moves = [player.make_move(seeded_board(seed), True) for seed in BENCHMARK_SEEDS]
+        games.append((moves, time.perf_counter() - start))
+    print(f"Búsqueda a profundidad {depth}: {games[0][1]:.3f} s hoja por hoja, {games[1][1]:.3f} s vectorizada, "
+          f"mismo movimiento: {'sí' if games[0][0] == games[1][0] else 'no'}")
+    return table, crossover
+
+
+def compare_batch_simulator(batch_sizes=(100, 1000, 5000), reference_games: int = 200):
+    """Partidas por segundo del simulador en lote contra AIGame(1, 1), verificando los resultados"""
+    seeds = list(range(max(batch_sizes)))
+    start = time.perf_counter()
+    reference = [AIGame(1, 1).play_game(seed=seed) for seed in seeds[:reference_games]]
+    reference_rate = reference_games / (time.perf_counter() - start)
+
+    table = []
+    for size in batch_sizes:
+        start = time.perf_counter()
+        simulated = simulate_games(seeds[:size])
+        rate = size / (time.perf_counter() - start)
+        table.append([size, f"{rate:.0f}", f"{rate / reference_rate:.2f}x",
+                      f"{simulated['white_wins']}-{simulated['black_wins']}-{simulated['draws']}"])
+    matches = sum(a == b for a, b in zip(reference, simulated["results"].tolist()))
+    print(f"\nSimulador en lote (AIGame(1, 1): {reference_rate:.0f} partidas/s):")
+    print(tabulate(table, headers=["Partidas", "Partidas/s", "Relativo", "Blanco-Negro-Empates"], tablefmt="grid"))
+    print(f"Resultados iguales a AIGame: {matches}/{reference_games}")
+    return table
+
+
+def compare_simulation_payloads(depth: int = 4, seed: int = 0):
+    """Tiempo hasta la primera jugada y bytes enviados: historial completo contra deltas en streaming"""
+    import json
+    from game_app import GameApp
+
+    random.seed(seed)
+    game = GameApp()
+    game.start_new_game("IA vs IA", depth)
+    start = time.perf_counter()
+    history = game.run_ai_vs_ai()
+    full_seconds = time.perf_counter() - start
+    full_bytes = len(json.dumps({"simulation": history}))
+
+    random.seed(seed)
+    game.start_new_game("IA vs IA", depth)
+    start = time.perf_counter()
+    first_move_seconds, stream_bytes, moves = None, 0, 0
+    for event in game.iter_ai_vs_ai():
+        stream_bytes += len(json.dumps(event, separators=(',', ':'))) + 1
+        if event["event"] == "move":
+            moves += 1
+            if first_move_seconds is None:
+                first_move_seconds = time.perf_counter() - start
+    table = [
+        ["historial completo", f"{full_seconds * 1000:.1f}", full_bytes, len(history) - 1],
+        ["streaming (deltas)", f"{first_move_seconds * 1000:.1f}", stream_bytes, moves],
+    ]
+    print(f"\nSimulación IA vs IA (profundidad {depth}):")
+    print(tabulate(table, headers=["Formato", "ms hasta la primera jugada", "Bytes", "Jugadas"], tablefmt="grid"))
+    return table
+
+
+def compare_tablebase(ks=(1, 2, 3, 4), seed: int = 0):
+    """Tiempo de construcción y tamaño de las tablas de finales según la cantidad de objetivos"""
+    import tempfile
+    from tablebase import Tablebase
+
+    board = seeded_board(seed)
+    points, multipliers = Tablebase.board_targets(board)
+    # Mitad puntos y mitad multiplicadores, siempre con al menos un punto
+    targets = [(sq, points[sq]) for sq in sorted(points)][:3] + [(sq, None) for sq in sorted(multipliers)][:2]
+    table = []
+    for k in ks:
+        chosen = targets[:max(1, k - k // 2)] + targets[3:3 + k // 2]
+        tablebase = Tablebase(k)
+        start = time.perf_counter()
+        built = tablebase.build({sq: value for sq, value in chosen if value is not None},
+                                [sq for sq, value in chosen if value is None])
+        seconds = time.perf_counter() - start
+        with tempfile.NamedTemporaryFile(suffix=".tb") as f:
+            tablebase.save(f.name)
+            file_bytes = os.path.getsize(f.name)
+        table.append([k, built, f"{seconds:.2f}", file_bytes])
+    print("\nTablas de finales:")
+    print(tabulate(table, headers=["K", "Configuraciones", "Segundos", "Bytes"], tablefmt="grid"))
+    return table
+
+
+def compare_parallel_speedup(depth: int = 6, max_workers: int = None, positions: int = 6):
+    """Curva de aceleración de la búsqueda paralela de 1 a N procesos, verificando el movimiento elegido"""
+    max_workers = max_workers or os.cpu_count() or 1
+    boards = leaf_positions(positions, seed=7)
+    table = []
+    serial_moves, serial_time = None, None
+    for workers in range(1, max_workers + 1):
+        player = MinimaxPlayer(depth, 1, tt_size=0, workers=workers)
+        start = time.perf_counter()
+        moves = [player.make_move(board, board.white_to_move) for board in boards]
+        elapsed = time.perf_counter() - start
+        player.close()
+        if serial_moves is None:
+            serial_moves, serial_time = moves, elapsed
+        table.append([workers, f"{elapsed:.2f}", f"{serial_time / elapsed:.2f}x",
+                      "sí" if moves == serial_moves else "no"])
+    print(f"\nBúsqueda paralela (profundidad {depth}, {positions} posiciones):")
+    print(tabulate(table, headers=["Procesos", "Segundos", "Aceleración", "Mismo movimiento"], tablefmt="grid"))
+    return table
+
+
+def compare_mcts(time_limit_ms: int = 200, games: int = 4, positions: int = 6):
+    """Rollouts por segundo de MCTSPlayer y su fuerza contra minimax con el mismo tiempo por jugada.
+
+    Cada semilla se juega dos veces, una con cada motor como blanco, para no
+    favorecer a ninguno por la posición inicial.
+    """
+    boards = leaf_positions(positions, seed=5)
+    player = MCTSPlayer(TIME_LIMITED_DEPTH, time_limit_ms=time_limit_ms)
+    rates = []
+    for board in boards:
+        player.root = None  # Sin reutilizar el árbol entre posiciones distintas
+        player.make_move(board, board.white_to_move)
+        rates.append(player.rollouts_per_second())
+    print(f"\nMCTS: {statistics.median(rates):.0f} rollouts/s (mediana de {positions} posiciones, "
+          f"{time_limit_ms} ms por jugada)")
+
+    table = []
+    totals = {MCTS: 0, MINIMAX: 0, "empates": 0}
+    for ai1_engine, ai2_engine in ((MCTS, MINIMAX), (MINIMAX, MCTS)):
+        wins = {MCTS: 0, MINIMAX: 0, "empates": 0}
+        for seed in range(games):
+            game = AIGame(TIME_LIMITED_DEPTH, TIME_LIMITED_DEPTH, time_limit_ms=time_limit_ms,
+                          ai1_engine=ai1_engine, ai2_engine=ai2_engine)
+            result = game.play_game(seed=seed)
+            winner = {1: ai1_engine, 2: ai2_engine, 0: "empates"}[result]
+            wins[winner] += 1
+            totals[winner] += 1
+        table.append([f"{ai1_engine} vs {ai2_engine}", wins[MCTS], wins[MINIMAX], wins["empates"]])
+    table.append(["total", totals[MCTS], totals[MINIMAX], totals["empates"]])
+    print(f"\nMCTS contra minimax ({time_limit_ms} ms por jugada, {games} partidas por color):")
+    print(tabulate(table, headers=["Blanco vs Negro", "Gana MCTS", "Gana minimax", "Empates"], tablefmt="grid"))
+    return {"rollouts_per_second": statistics.median(rates), "results": table}
+
+
+# Configuraciones de compare_pruning: cada técnica sola y todas juntas
+PRUNING_CONFIGS = [
+    ("alfa-beta", {}),
+    ("negamax", {"negamax": True}),
+    ("PVS", {"pvs": True}),
+    ("aspiración", {"aspiration_window": MinimaxPlayer.DEFAULT_ASPIRATION_WINDOW}),
+    ("LMR", {"lmr": True}),
+    ("PVS + aspiración + LMR", {"pvs": True, "lmr": True,
+                                "aspiration_window": MinimaxPlayer.DEFAULT_ASPIRATION_WINDOW}),
+]
+
+
+def compare_pruning(max_depth: int = 10, positions: int = 6, budget_depth: int = 6):
+    """Nodos y tiempo hasta cada profundidad con cada técnica de poda, en profundización iterativa.
+
+    El presupuesto es lo que tarda alfa-beta en completar budget_depth; la
+    última columna es la mayor profundidad que cada configuración completa en
+    ese tiempo (promedio por posición). "Mismo mov." compara el movimiento de
+    max_depth con el de alfa-beta: sin tabla de transposición solo LMR
+    puede cambiarlo; con ella también PVS y la aspiración, como la tabla misma.
+    """
+    boards = [seeded_board(seed) for seed in BENCHMARK_SEEDS[:positions]]
+    runs = {}
+    for name, options in PRUNING_CONFIGS:
+        runs[name] = []
+        for board in boards:
+            player = DepthTimingPlayer(max_depth, 1, **options)
+            _, move = player.iterative_deepening(board, board.white_to_move, 10 ** 9)
+            runs[name].append((player.iterations, move, player.stats))
+    budgets = [dict((d, t) for d, t, _ in iterations)[budget_depth] for iterations, _, _ in runs["alfa-beta"]]
+    reference_moves = [move for _, move, _ in runs["alfa-beta"]]
+
+    table = []
+    for name, _ in PRUNING_CONFIGS:
+        row = [name]
+        for depth in range(budget_depth, max_depth + 1):
+            seconds = sum(dict((d, t) for d, t, _ in iterations)[depth] for iterations, _, _ in runs[name])
+            nodes = sum(dict((d, n) for d, _, n in iterations)[depth] for iterations, _, _ in runs[name])
+            row.append(f"{nodes / positions:.0f} / {seconds * 1000 / positions:.1f}")
+        reached = [max((d for d, t, _ in iterations if t <= budget), default=0)
+                   for (iterations, _, _), budget in zip(runs[name], budgets)]
+        same = sum(move == reference for (_, move, _), reference in zip(runs[name], reference_moves))
+        row.extend([f"{statistics.mean(reached):.1f}", f"{same}/{positions}"])
+        table.append(row)
+    headers = ["Configuración"] + [f"Prof. {d} (nodos / ms)" for d in range(budget_depth, max_depth + 1)] + \
+              [f"Prof. en t(alfa-beta, {budget_depth})", "Mismo mov."]
+    print(f"\nTécnicas de poda ({positions} posiciones, promedios por posición):")
+    print(tabulate(table, headers=headers, tablefmt="grid"))
+    return table
+
+
+def play_match(white: MinimaxPlayer, black: MinimaxPlayer, seed: int) -> tuple:
+    """Juega una partida entre dos jugadores con estadísticas; devuelve (resultado, stats blanco, stats negro)"""
+    game = AIGame(1, 1, collect_stats=True)
+    game.ai1, game.ai2 = white, black
+    result = game.play_game(seed=seed)
+    return result, game.ai1_stats, game.ai2_stats
+
+
+def compare_quiescence(depth: int = 4, games: int = 6, quiescence_nodes: int = MinimaxPlayer.DEFAULT_QUIESCENCE_NODES):
+    """Compara profundidad N con quiescencia contra N+2 sin ella: resultados entre sí y nodos por jugada.
+
+    Como referencia, N sin quiescencia también juega contra N+2. Cada semilla se
+    juega con ambos colores y todos usan la función de utilidad 1.
+    """
+    configs = {
+        f"{depth}": {},
+        f"{depth}+Q": {"quiescence_nodes": quiescence_nodes},
+    }
+    table = []
+    for name, options in configs.items():
+        wins = draws = losses = 0
+        stats, reference_stats = SearchStats(), SearchStats()
+        for seed in range(games):
+            for candidate_is_white in (True, False):
+                candidate = MinimaxPlayer(depth, 1, collect_stats=True, **options)
+                reference = MinimaxPlayer(depth + 2, 1, collect_stats=True)
+                white, black = (candidate, reference) if candidate_is_white else (reference, candidate)
+                result, white_stats, black_stats = play_match(white, black, seed)
+                candidate_stats, opponent_stats = (white_stats, black_stats) if candidate_is_white \
+                    else (black_stats, white_stats)
+                stats.merge(candidate_stats)
+                reference_stats.merge(opponent_stats)
+                if result == 0:
+                    draws += 1
+                elif (result == 1) == candidate_is_white:
+                    wins += 1
+                else:
+                    losses += 1
+        summary, reference_summary = stats.to_dict(), reference_stats.to_dict()
+        table.append([f"{name} vs {depth + 2}", wins, draws, losses,
+                      f"{summary['nodes'] / max(1, summary['searches']):.0f}",
+                      f"{reference_summary['nodes'] / max(1, reference_summary['searches']):.0f}",
+                      f"{summary['elapsed_ms'] / max(1, summary['searches']):.2f}",
+                      f"{reference_summary['elapsed_ms'] / max(1, reference_summary['searches']):.2f}"])
+    print(f"\nQuiescencia ({games} semillas por color, tope de {quiescence_nodes} nodos por hoja):")
+    print(tabulate(table, headers=["Partida", "Gana", "Empata", "Pierde", "Nodos/jugada",
+                                   f"Nodos/jugada ({depth + 2})", "ms/jugada", f"ms/jugada ({depth + 2})"],
+                   tablefmt="grid"))
+    return table
+
+
+def compare_board_engines(depth: int = 6, utility_function: int = 1):
+    """Compara nodos por segundo entre Board y BitBoard sobre las mismas posiciones"""
+    results = [measure_nodes_per_second(board_class, depth, utility_function)
+               for board_class in (Board, BitBoard)]
+    baseline = results[0]["nodes_per_second"]
+    table = [
+        [r["board"], r["nodes"], f"{r['seconds']:.3f}", f"{r['nodes_per_second']:.0f}",
+         f"{r['nodes_per_second'] / baseline:.2f}x" if baseline else "-"]
+        for r in results
+    ]
+    print(f"\nNodos por segundo (profundidad {depth}, función de utilidad {utility_function}):")
+    print(tabulate(table, headers=["Tablero", "Nodos", "Segundos", "Nodos/s", "Relativo"], tablefmt="grid"))
+    if results[0]["moves"] != results[1]["moves"]:
+        print("ADVERTENCIA: Board y BitBoard eligieron movimientos distintos")
+
+    primitives = {board_class.__name__: measure_primitives(board_class) for board_class in (Board, BitBoard)}
+    operations = ["get_valid_moves", "make_move", "clone"]
+    table = [[name] + [f"{primitives[name][op]:.0f}" for op in operations] for name in primitives]
+    print("\nOperaciones por segundo:")
+    print(tabulate(table, headers=["Tablero"] + operations, tablefmt="grid"))
+    return results
+
+
+# Suite reproducible: cada métrica es {"value", "unit", "better"} con better en "higher", "lower" o "equal"
+SUITE_DEPTHS = (2, 4, 6)
+SUITE_GAME_DEPTHS = (2, 4, 6)
+SUITE_REPETITIONS = 3
+DEFAULT_REGRESSION_THRESHOLD = 0.10
+
+
+def _metric(value, unit: str, better: str) -> dict:
+    return {"value": value, "unit": unit, "better": better}
+
+
+def _median_of(measure, repetitions: int):
+    """Mediana de varias repeticiones de una medición, para que la suite sea estable"""
+    return statistics.median(measure() for _ in range(repetitions))
+
+
+def _peak_memory_kib(action) -> float:
+    tracemalloc.start()
+    try:
+        action()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1024
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        return ""
+
+
+def run_suite(repetitions: int = SUITE_REPETITIONS, depths=SUITE_DEPTHS, game_depths=SUITE_GAME_DEPTHS,
+              seeds=None) -> dict:
+    """Mide primitivas, evaluación de hojas, búsqueda, partidas completas y memoria sobre las posiciones semilla.
+
+    Los conteos de nodos son deterministas: si cambian, cambió la búsqueda.
+    """
+    seeds = BENCHMARK_SEEDS if seeds is None else seeds
+    metrics = {}
+
+    for board_class in (Board, BitBoard):
+        primitives = [measure_primitives(board_class, repetitions=500) for _ in range(repetitions)]
+        for operation in ("get_valid_moves", "make_move", "clone"):
+            metrics[f"primitives.{board_class.__name__}.{operation}"] = _metric(
+                statistics.median(p[operation] for p in primitives), "ops/s", "higher")
+
+    boards = leaf_positions(200)
+    for utility_function in (1, 2):
+        player = MinimaxPlayer(1, utility_function, tt_size=0)
+
+        def leaf_rate():
+            start = time.perf_counter()
+            for board in boards:
+                player.evaluate_board(board, True)
+                player.evaluate_board(board, False)
+            return 2 * len(boards) / (time.perf_counter() - start)
+        metrics[f"leaf_evals.utility_{utility_function}"] = _metric(
+            _median_of(leaf_rate, repetitions * 5), "evals/s", "higher")
+
+    for depth in depths:
+        runs = [measure_nodes_per_second(Board, depth, 1, seeds) for _ in range(repetitions)]
+        run = min(runs, key=lambda r: r["seconds"])
+        metrics[f"search.depth_{depth}.nodes"] = _metric(run["nodes"], "nodes", "equal")
+        metrics[f"search.depth_{depth}.nodes_per_second"] = _metric(
+            statistics.median(r["nodes_per_second"] for r in runs), "nodes/s", "higher")
+        metrics[f"search.depth_{depth}.ms_per_move"] = _metric(
+            statistics.median(r["seconds"] for r in runs) * 1000 / len(seeds), "ms", "lower")
+
+    for depth in game_depths:
+        def game_time():
+            start = time.perf_counter()
+            for seed in seeds:
+                AIGame(depth, depth).play_game(seed=seed)
+            return time.perf_counter() - start
+        metrics[f"aigame.depth_{depth}.seconds"] = _metric(_median_of(game_time, repetitions), "s", "lower")
+
+    deepest = max(depths)
+    metrics[f"memory.search_depth_{deepest}.peak"] = _metric(
+        _peak_memory_kib(lambda: measure_nodes_per_second(Board, deepest, 1, seeds[:3])), "KiB", "lower")
+    metrics[f"memory.aigame_depth_{max(game_depths)}.peak"] = _metric(
+        _peak_memory_kib(lambda: AIGame(max(game_depths), max(game_depths)).play_game(seed=seeds[0])),
+        "KiB", "lower")
+
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "commit": _git_commit(),
+            "python": sys.version.split()[0],
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "seeds": list(seeds),
+            "repetitions": repetitions,
+        },
+        "metrics": metrics,
+    }
+
+
+def compare_results(baseline: dict, current: dict, threshold: float = DEFAULT_REGRESSION_THRESHOLD) -> list:
+    """Filas [métrica, base, actual, cambio, estado]; estado es "regresión", "mejora", "cambió" u "ok"."""
+    rows = []
+    for name, base in baseline["metrics"].items():
+        now = current["metrics"].get(name)
+        if now is None:
+            rows.append([name, base["value"], None, None, "falta"])
+            continue
+        before, after = base["value"], now["value"]
+        change = (after - before) / before if before else 0.0
+        if base["better"] == "equal":
+            status = "cambió" if after != before else "ok"
+        else:
+            worse = -change if base["better"] == "higher" else change
+            status = "regresión" if worse > threshold else "mejora" if worse < -threshold else "ok"
+        rows.append([name, before, after, change, status])
+    return rows
+
+
+def print_comparison(rows: list):
+    table = [[name, f"{before:.4g}", "-" if after is None else f"{after:.4g}",
+              "-" if change is None else f"{change:+.1%}", status]
+             for name, before, after, change, status in rows]
+    print(tabulate(table, headers=["Métrica", "Base", "Actual", "Cambio", "Estado"], tablefmt="grid"))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks de Board y MinimaxPlayer")
+    commands = parser.add_subparsers(dest="command")
+    suite = commands.add_parser("suite", help="Ejecuta la suite y guarda los resultados en JSON")
+    suite.add_argument("--output", "-o", default="benchmark_results.json")
+    suite.add_argument("--repetitions", type=int, default=SUITE_REPETITIONS)
+    compare = commands.add_parser("compare", help="Compara resultados contra una base guardada")
+    compare.add_argument("baseline")
+    compare.add_argument("current", nargs="?", help="Resultados a comparar; por defecto se ejecuta la suite")
+    compare.add_argument("--threshold", type=float, default=DEFAULT_REGRESSION_THRESHOLD)
+    commands.add_parser("report", help="Imprime las comparaciones de cada optimización")
+    args = parser.parse_args(argv)
+
+    if args.command == "suite":
+        results = run_suite(args.repetitions)
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Resultados guardados en {args.output}")
+        return 0
+    if args.command == "compare":
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if args.current:
+            with open(args.current) as f:
+                current = json.load(f)
+        else:
+            current = run_suite()
+        rows = compare_results(baseline, current, args.threshold)
+        print_comparison(rows)
+        regressions = [row for row in rows if row[4] in ("regresión", "cambió", "falta")]
+        if regressions:
+            print(f"{len(regressions)} métricas empeoraron o cambiaron (umbral {args.threshold:.0%})")
+            return 1
+        return 0
+
+    compare_board_engines()
+    compare_search_strategies()
+    compare_transposition_sizes()
+    compare_move_ordering()
+    compare_leaf_evaluation()
+    compare_batch_leaf_evaluation()
+    compare_batch_simulator()
+    compare_simulation_payloads()
+    compare_tablebase()
+    compare_parallel_speedup()
+    compare_mcts()
+    compare_pruning()
+    compare_quiescence()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,458 @@
+import random
+import numpy as np
+from typing import Dict, Iterator, List, Set, Tuple
+from board import PositionHistory, EMPTY_CELL, WHITE_HORSE_CELL, BLACK_HORSE_CELL, MULTIPLIER_CELL
+import zobrist
+import distances
+
+SIZE = 8
+
+# Mismo orden de desplazamientos que Board.get_valid_moves, para que ambos
+# tableros generen los movimientos en el mismo orden
+KNIGHT_OFFSETS = [
+    (2, 1), (2, -1), (-2, 1), (-2, -1),
+    (1, 2), (1, -2), (-1, 2), (-1, -2)
+]
+
+# Conversión casilla <-> posición: la casilla de (x, y) es x * 8 + y
+SQUARE_TO_POS = [(sq // SIZE, sq % SIZE) for sq in range(SIZE * SIZE)]
+SQUARE_BIT = [1 << sq for sq in range(SIZE * SIZE)]
+POS_BIT = {SQUARE_TO_POS[sq]: SQUARE_BIT[sq] for sq in range(SIZE * SIZE)}
+
+
+def pos_to_square(position: Tuple[int, int]) -> int:
+    """Convierte una posición (x, y) en el índice de casilla 0..63"""
+    return position[0] * SIZE + position[1]
+
+
+def _build_knight_tables():
+    """Precalcula, para cada casilla, la máscara de ataque y la lista ordenada de saltos"""
+    attacks = []
+    moves = []
+    for sq in range(SIZE * SIZE):
+        x, y = SQUARE_TO_POS[sq]
+        mask = 0
+        targets = []
+        for dx, dy in KNIGHT_OFFSETS:
+            new_x, new_y = x + dx, y + dy
+            if 0 <= new_x < SIZE and 0 <= new_y < SIZE:
+                target = new_x * SIZE + new_y
+                mask |= SQUARE_BIT[target]
+                targets.append((SQUARE_BIT[target], (new_x, new_y)))
+        attacks.append(mask)
+        moves.append(tuple(targets))
+    return attacks, moves
+
+
+KNIGHT_ATTACKS, KNIGHT_MOVES = _build_knight_tables()
+
+
+class PointsView:
+    """Vista de solo lectura con interfaz de dict sobre las casillas de puntos del BitBoard"""
+
+    def __init__(self, board: 'BitBoard'):
+        self._board = board
+
+    def __contains__(self, position) -> bool:
+        return self._board.points_mask & POS_BIT[position] != 0
+
+    def __getitem__(self, position) -> int:
+        sq = pos_to_square(position)
+        if not self._board.points_mask & SQUARE_BIT[sq]:
+            raise KeyError(position)
+        return self._board.point_values[sq]
+
+    def get(self, position, default=None):
+        return self[position] if position in self else default
+
+    def __len__(self) -> int:
+        return self._board.points_mask.bit_count()
+
+    def __bool__(self) -> bool:
+        return self._board.points_mask != 0
+
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        return iter(self.keys())
+
+    def keys(self) -> List[Tuple[int, int]]:
+        return [pos for pos, _ in self.items()]
+
+    def values(self) -> List[int]:
+        return [value for _, value in self.items()]
+
+    def items(self) -> List[Tuple[Tuple[int, int], int]]:
+        """Devuelve los puntos ordenados por valor ascendente, como los inserta Board.initialize_board"""
+        board = self._board
+        mask = board.points_mask
+        # Cache compartida entre los clones de una misma partida: a lo sumo 2^10 máscaras
+        cached = board.points_cache.get(mask)
+        if cached is not None:
+            return cached
+        values = board.point_values
+        found = []
+        remaining = mask
+        while remaining:
+            bit = remaining & -remaining
+            sq = bit.bit_length() - 1
+            found.append((values[sq], SQUARE_TO_POS[sq]))
+            remaining ^= bit
+        found.sort()
+        cached = [(pos, value) for value, pos in found]
+        board.points_cache[mask] = cached
+        return cached
+
+    def copy(self) -> Dict[Tuple[int, int], int]:
+        return dict(self.items())
+
+    def __eq__(self, other) -> bool:
+        return dict(self.items()) == dict(other.items() if hasattr(other, 'items') else other)
+
+    def __repr__(self) -> str:
+        return repr(self.copy())
+
+
+class MultipliersView:
+    """Vista de solo lectura con interfaz de set sobre las casillas multiplicadoras del BitBoard"""
+
+    def __init__(self, board: 'BitBoard'):
+        self._board = board
+
+    def __contains__(self, position) -> bool:
+        return self._board.multipliers_mask & POS_BIT[position] != 0
+
+    def __len__(self) -> int:
+        return self._board.multipliers_mask.bit_count()
+
+    def __bool__(self) -> bool:
+        return self._board.multipliers_mask != 0
+
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        mask = self._board.multipliers_mask
+        while mask:
+            bit = mask & -mask
+            yield SQUARE_TO_POS[bit.bit_length() - 1]
+            mask ^= bit
+
+    def copy(self) -> Set[Tuple[int, int]]:
+        return set(self)
+
+    def __eq__(self, other) -> bool:
+        return set(self) == set(other)
+
+    def __repr__(self) -> str:
+        return repr(self.copy())
+
+
+class BitBoard:
+    """Estado del juego empaquetado en enteros de 64 bits.
+
+    Cada casilla (x, y) corresponde al bit x * 8 + y. Los caballos, los puntos
+    restantes y los multiplicadores se guardan como máscaras; los valores de
+    los puntos se guardan en una lista indexada por casilla. Expone la misma
+    interfaz que Board para que MinimaxPlayer y GameApp puedan usarlo sin cambios.
+    """
+
+    def __init__(self):
+        """Inicializa un tablero vacío con las configuraciones básicas"""
+        self.size = SIZE
+        # Código de cada celda, igual que Board.board (ver board.EMPTY_CELL)
+        self.board = np.zeros((SIZE, SIZE), dtype=int)
+        self._matrix = None
+        self.white_square = -1
+        self.black_square = -1
+        self.white_horse = None
+        self.black_horse = None
+        self.points_mask = 0
+        self.point_values = [0] * (SIZE * SIZE)
+        self.points_cache = {}  # máscara de puntos -> lista de (posición, valor)
+        self.multipliers_mask = 0
+        self.white_multiplier = False
+        self.black_multiplier = False
+        self.white_score = 0
+        self.black_score = 0
+        self.moves_count = 0
+        self.position_history = PositionHistory(12)  # Historial de posiciones para detectar ciclos
+        self.undo_stack = []  # Registros para deshacer movimientos con unmake_move
+        self.points = PointsView(self)
+        self.multipliers = MultipliersView(self)
+        self.white_to_move = True
+        self.zobrist_hash = zobrist.compute_hash(self)
+        # Punto y multiplicador más cercanos de cada caballo, ver distances.initial_targets
+        self.targets_cache = {}
+        self.targets = ((distances.NO_TARGETS, distances.NO_TARGETS),) * 2
+
+    def _refresh_targets(self):
+        """Recalcula desde cero los objetivos más cercanos de ambos caballos"""
+        self.targets_cache = {}
+        self.targets = distances.initial_targets(self.targets_cache, self.white_square, self.black_square,
+                                                 self.points_mask, self.point_values, self.multipliers_mask)
+
+    @classmethod
+    def from_board(cls, board) -> 'BitBoard':
+        """Construye un BitBoard equivalente a un Board existente"""
+        new_board = cls()
+        new_board._set_horse(board.white_horse, True)
+        new_board._set_horse(board.black_horse, False)
+        for pos, value in board.points.items():
+            sq = pos_to_square(pos)
+            new_board.points_mask |= SQUARE_BIT[sq]
+            new_board.point_values[sq] = value
+        for pos in board.multipliers:
+            new_board.multipliers_mask |= SQUARE_BIT[pos_to_square(pos)]
+        new_board.white_multiplier = board.white_multiplier
+        new_board.black_multiplier = board.black_multiplier
+        new_board.white_score = board.white_score
+        new_board.black_score = board.black_score
+        new_board.moves_count = board.moves_count
+        for entry in board.position_history:
+            new_board.position_history.append(entry)
+        new_board.white_to_move = board.white_to_move
+        new_board.zobrist_hash = zobrist.compute_hash(new_board)
+        new_board._refresh_targets()
+        new_board._refresh_cells()
+        return new_board
+
+    def _set_horse(self, position, is_white: bool):
+        sq = pos_to_square(position) if position is not None else -1
+        if is_white:
+            self.white_square = sq
+            self.white_horse = position
+        else:
+            self.black_square = sq
+            self.black_horse = position
+
+    def initialize_board(self, rng: random.Random = None):
+        """Configura el tablero con posiciones iniciales de los caballos, puntos y multiplicadores.
+
+        rng permite usar un generador con semilla propia para reproducir la partida;
+        por defecto se usa el módulo random global.
+        """
+        # Misma secuencia de sorteos que Board.initialize_board
+        all_positions = [(i, j) for i in range(self.size) for j in range(self.size)]
+        positions = (rng or random).sample(all_positions, 16)
+
+        self._set_horse(positions[0], True)
+        self._set_horse(positions[1], False)
+
+        self.points_mask = 0
+        self.point_values = [0] * (SIZE * SIZE)
+        self.points_cache = {}
+        for i, pos in enumerate(positions[2:12]):
+            sq = pos_to_square(pos)
+            self.points_mask |= SQUARE_BIT[sq]
+            self.point_values[sq] = i + 1
+
+        self.multipliers_mask = 0
+        for pos in positions[12:16]:
+            self.multipliers_mask |= SQUARE_BIT[pos_to_square(pos)]
+        self.moves_count = 0
+        self.position_history = PositionHistory(12)
+        self.undo_stack = []
+        self.white_to_move = True
+        self.zobrist_hash = zobrist.compute_hash(self)
+        self._refresh_targets()
+        self._refresh_cells()
+
+    def _refresh_cells(self):
+        """Recalcula desde cero el código de cada celda"""
+        self.board = np.zeros((SIZE, SIZE), dtype=int)
+        for pos, value in self.points.items():
+            self.board[pos] = value
+        for pos in self.multipliers:
+            self.board[pos] = MULTIPLIER_CELL
+        if self.white_horse is not None:
+            self.board[self.white_horse] = WHITE_HORSE_CELL
+        if self.black_horse is not None:
+            self.board[self.black_horse] = BLACK_HORSE_CELL
+        self._matrix = None
+
+    def matrix(self) -> List[List[int]]:
+        """Códigos de las celdas como listas, como Board.matrix; no debe modificarse"""
+        if self._matrix is None:
+            self._matrix = self.board.tolist()
+        return self._matrix
+
+    def get_valid_moves(self, position: Tuple[int, int]) -> List[Tuple[int, int]]:
+        """Retorna los movimientos válidos de un caballo desde una posición dada"""
+        sq = pos_to_square(position)
+        occupied = 0
+        if self.white_square >= 0:
+            occupied |= SQUARE_BIT[self.white_square]
+        if self.black_square >= 0:
+            occupied |= SQUARE_BIT[self.black_square]
+        if not KNIGHT_ATTACKS[sq] & occupied:
+            return [pos for _, pos in KNIGHT_MOVES[sq]]
+        return [pos for bit, pos in KNIGHT_MOVES[sq] if not bit & occupied]
+
+    def make_move(self, position: Tuple[int, int], is_white: bool) -> int:
+        """Realiza un movimiento, actualizando puntajes y estado del tablero.
+
+        El movimiento se registra en undo_stack para poder revertirlo con unmake_move.
+        """
+        self.moves_count += 1
+        score = 0
+        # El historial conserva solo las últimas 12 posiciones
+        evicted = self.position_history.append((position, is_white))
+        previous_square = self.white_square if is_white else self.black_square
+        previous_white_multiplier = self.white_multiplier
+        previous_black_multiplier = self.black_multiplier
+        previous_hash = self.zobrist_hash
+        previous_white_to_move = self.white_to_move
+        previous_targets = self.targets
+
+        sq = pos_to_square(position)
+        bit = SQUARE_BIT[sq]
+        horse_keys = zobrist.HORSE_KEYS[0 if is_white else 1]
+        h = previous_hash ^ horse_keys[sq]
+        if previous_square >= 0:
+            h ^= horse_keys[previous_square]
+
+        captured = self.points_mask & bit
+        if captured:
+            base_points = self.point_values[sq]
+            if (is_white and self.white_multiplier) or (not is_white and self.black_multiplier):
+                score = base_points * 2
+                if is_white:
+                    self.white_multiplier = False
+                else:
+                    self.black_multiplier = False
+            else:
+                score = base_points
+            self.points_mask ^= bit
+            h ^= zobrist.POINT_KEYS[sq][base_points]
+
+        took_multiplier = self.multipliers_mask & bit
+        if took_multiplier:
+            if is_white:
+                self.white_multiplier = True
+            else:
+                self.black_multiplier = True
+            self.multipliers_mask ^= bit
+            h ^= zobrist.MULTIPLIER_KEYS[sq]
+
+        if self.white_multiplier != previous_white_multiplier:
+            h ^= zobrist.WHITE_MULTIPLIER_KEY
+        if self.black_multiplier != previous_black_multiplier:
+            h ^= zobrist.BLACK_MULTIPLIER_KEY
+
+        if score:
+            h ^= zobrist.score_diff_key(self.white_score, self.black_score)
+        if is_white:
+            self.white_square = sq
+            self.white_horse = position
+            self.white_score += score
+        else:
+            self.black_square = sq
+            self.black_horse = position
+            self.black_score += score
+        if score:
+            h ^= zobrist.score_diff_key(self.white_score, self.black_score)
+
+        # Después de mover le toca al rival
+        self.white_to_move = not is_white
+        if self.white_to_move != previous_white_to_move:
+            h ^= zobrist.BLACK_TO_MOVE_KEY
+        self.zobrist_hash = h
+
+        cells = self.board
+        if previous_square >= 0:
+            cells[SQUARE_TO_POS[previous_square]] = EMPTY_CELL
+        cells[position] = WHITE_HORSE_CELL if is_white else BLACK_HORSE_CELL
+        self._matrix = None
+
+        self.targets = distances.update_targets(previous_targets, self.targets_cache, is_white, sq,
+                                                self.black_square if is_white else self.white_square,
+                                                bool(captured or took_multiplier), self.points_mask,
+                                                self.point_values, self.multipliers_mask)
+
+        self.undo_stack.append((bit, is_white, previous_square, score, captured, took_multiplier,
+                                previous_white_multiplier, previous_black_multiplier, evicted,
+                                previous_hash, previous_white_to_move, previous_targets))
+        return score
+
+    def unmake_move(self):
+        """Revierte el último movimiento realizado con make_move"""
+        (bit, is_white, previous_square, score, captured, took_multiplier,
+         previous_white_multiplier, previous_black_multiplier, evicted,
+         previous_hash, previous_white_to_move, previous_targets) = self.undo_stack.pop()
+
+        previous_horse = SQUARE_TO_POS[previous_square] if previous_square >= 0 else None
+        if is_white:
+            self.white_square = previous_square
+            self.white_horse = previous_horse
+            self.white_score -= score
+        else:
+            self.black_square = previous_square
+            self.black_horse = previous_horse
+            self.black_score -= score
+
+        cells = self.board
+        sq = bit.bit_length() - 1
+        cells[SQUARE_TO_POS[sq]] = self.point_values[sq] if captured else MULTIPLIER_CELL if took_multiplier else EMPTY_CELL
+        if previous_horse is not None:
+            cells[previous_horse] = WHITE_HORSE_CELL if is_white else BLACK_HORSE_CELL
+        self._matrix = None
+
+        self.points_mask |= captured
+        self.multipliers_mask |= took_multiplier
+        self.white_multiplier = previous_white_multiplier
+        self.black_multiplier = previous_black_multiplier
+        self.position_history.unappend(evicted)
+        self.moves_count -= 1
+        self.white_to_move = previous_white_to_move
+        self.zobrist_hash = previous_hash
+        self.targets = previous_targets
+
+    def is_game_over(self) -> bool:
+        """Determina si el juego ha terminado"""
+        return not self.points_mask or self.moves_count >= 150
+
+    def clone(self) -> 'BitBoard':
+        """Crea una copia del estado actual del tablero"""
+        new_board = BitBoard()
+        new_board.board = self.board.copy()
+        new_board.white_square = self.white_square
+        new_board.black_square = self.black_square
+        new_board.white_horse = self.white_horse
+        new_board.black_horse = self.black_horse
+        new_board.points_mask = self.points_mask
+        # Los valores solo se leen (la máscara indica qué puntos quedan), así que se comparten
+        new_board.point_values = self.point_values
+        new_board.points_cache = self.points_cache
+        new_board.multipliers_mask = self.multipliers_mask
+        new_board.white_score = self.white_score
+        new_board.black_score = self.black_score
+        new_board.white_multiplier = self.white_multiplier
+        new_board.black_multiplier = self.black_multiplier
+        new_board.moves_count = self.moves_count
+        new_board.position_history = self.position_history.copy()
+        new_board.white_to_move = self.white_to_move
+        new_board.zobrist_hash = self.zobrist_hash
+        new_board.targets = self.targets
+        new_board.targets_cache = self.targets_cache
+        return new_board
+
+    def __getstate__(self):
+        # La cache de objetivos puede ser grande y se reconstruye sola al enviar el tablero a otro proceso
+        state = self.__dict__.copy()
+        state['targets_cache'] = {}
+        return state
+
+    def get_state_as_dict(self):
+        """Devuelve un diccionario con las mismas claves que Board.get_state_as_dict"""
+        return {
+            'size': self.size,
+            'multipliers': self.multipliers.copy(),
+            'points': self.points.copy(),
+            'white_horse': self.white_horse,
+            'black_horse': self.black_horse,
+            'white_multiplier': self.white_multiplier,
+            'black_multiplier': self.black_multiplier,
+            'white_score': self.white_score,
+            'black_score': self.black_score,
+            'moves_count': self.moves_count,
+            'position_history': list(self.position_history),
+        }
+
+    def quedan_puntos(self) -> bool:
+        return bool(self.points_mask)
@@ -1,12 +1,152 @@
 import random
 import numpy as np
 from typing import List, Tuple
+import zobrist
+import distances
+
+class PositionHistory:
+    """Buffer circular de tamaño fijo con las últimas posiciones jugadas.
+
+    Se comporta como una lista de solo lectura (len, índices, slices e iteración)
+    y permite deshacer el último append, restaurando la entrada que se descartó.
+    También lleva la cuenta de posiciones repetidas por jugador dentro de la ventana
+    y una clave (key) de las entradas en orden, que dos historiales iguales comparten.
+    """
+
+    def __init__(self, capacity: int = 12):
+        self.capacity = capacity
+        self._items = [None] * capacity
+        self._start = 0
+        self._length = 0
+        self._counts = ({}, {})  # (blanco, negro): posición -> apariciones en la ventana
+        self._repeats = [0, 0]
+        self.key = 0
+        # Peso de la entrada que se descarta, multiplicada ya por la base del append
+        self._evicted_weight = pow(zobrist.HISTORY_BASE, capacity, 1 << 64)
+
+    def _count(self, entry, delta: int):
+        position, is_white = entry
+        side = 0 if is_white else 1
+        counts = self._counts[side]
+        previous = counts.get(position, 0)
+        if delta > 0:
+            if previous:
+                self._repeats[side] += 1
+            counts[position] = previous + 1
+        else:
+            if previous > 1:
+                self._repeats[side] -= 1
+                counts[position] = previous - 1
+            else:
+                del counts[position]
+
+    def has_repetition(self, is_white: bool) -> bool:
+        """Indica si el jugador repitió alguna posición dentro de la ventana"""
+        return self._repeats[0 if is_white else 1] > 0
+
+    def repeat_count(self, is_white: bool) -> int:
+        """Cantidad de apariciones repetidas del jugador dentro de la ventana"""
+        return self._repeats[0 if is_white else 1]
+
+    def position_counts(self, is_white: bool) -> dict:
+        """Apariciones de cada posición del jugador dentro de la ventana (solo lectura)"""
+        return self._counts[0 if is_white else 1]
+
+    def oldest(self):
+        """Entrada que se descartaría con el próximo append, o None si todavía hay espacio"""
+        return self._items[self._start] if self._length == self.capacity else None
+
+    def append(self, entry):
+        """Agrega una entrada y devuelve la más antigua si se descartó por falta de espacio"""
+        self._count(entry, 1)
+        evicted = None
+        if self._length == self.capacity:
+            evicted = self._items[self._start]
+            self._items[self._start] = entry
+            self._start = (self._start + 1) % self.capacity
+        else:
+            self._items[(self._start + self._length) % self.capacity] = entry
+            self._length += 1
+        key = self.key * zobrist.HISTORY_BASE + zobrist.history_entry_key(entry)
+        if evicted is not None:
+            self._count(evicted, -1)
+            key -= zobrist.history_entry_key(evicted) * self._evicted_weight
+        self.key = key & zobrist.HASH_MASK
+        return evicted
+
+    def unappend(self, evicted=None):
+        """Deshace el último append, reinsertando al principio la entrada descartada"""
+        last = self._items[(self._start + self._length - 1) % self.capacity]
+        self._count(last, -1)
+        key = self.key - zobrist.history_entry_key(last)
+        if evicted is not None:
+            key += zobrist.history_entry_key(evicted) * self._evicted_weight
+        self.key = key * zobrist.HISTORY_BASE_INVERSE & zobrist.HASH_MASK
+        if evicted is not None:
+            self._count(evicted, 1)
+            # La entrada nueva ocupó el lugar de la descartada
+            self._start = (self._start - 1) % self.capacity
+            self._items[self._start] = evicted
+        else:
+            self._length -= 1
+            self._items[(self._start + self._length) % self.capacity] = None
+
+    def contains_recent(self, position, is_white: bool, window: int) -> bool:
+        """Indica si el jugador estuvo en la posición dentro de las últimas `window` entradas"""
+        items = self._items
+        for k in range(self._length - min(window, self._length), self._length):
+            entry = items[(self._start + k) % self.capacity]
+            if entry[1] == is_white and entry[0] == position:
+                return True
+        return False
+
+    def copy(self) -> 'PositionHistory':
+        new_history = PositionHistory(self.capacity)
+        new_history._items = self._items.copy()
+        new_history._start = self._start
+        new_history._length = self._length
+        new_history._counts = (self._counts[0].copy(), self._counts[1].copy())
+        new_history._repeats = self._repeats.copy()
+        new_history.key = self.key
+        return new_history
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[k] for k in range(*index.indices(self._length))]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("índice fuera del historial")
+        return self._items[(self._start + index) % self.capacity]
+
+    def __iter__(self):
+        for k in range(self._length):
+            yield self._items[(self._start + k) % self.capacity]
+
+    def __eq__(self, other) -> bool:
+        return list(self) == list(other)
+
+    def __repr__(self) -> str:
+        return repr(list(self))
+
+
+# Códigos de las celdas de Board.board; los puntos usan su valor (1 a 10)
+EMPTY_CELL = 0
+WHITE_HORSE_CELL = 11
+BLACK_HORSE_CELL = 12
+MULTIPLIER_CELL = 20
+
 
 class Board:
     def __init__(self):
         """Inicializa un tablero vacío con las configuraciones básicas"""
         self.size = 8
+        # Código de cada celda, mantenido por make_move y unmake_move (ver EMPTY_CELL)
         self.board = np.zeros((self.size, self.size), dtype=int)
+        self._matrix = None  # self.board como listas, calculado la primera vez que se pide
         self.multipliers = set()
         self.points = {}
         self.white_horse = None
@@ -16,12 +156,26 @@ class Board:
         self.white_score = 0
         self.black_score = 0
         self.moves_count = 0
-        self.position_history = []  # Historial de posiciones para detectar ciclos
+        self.position_history = PositionHistory(12)  # Historial de posiciones para detectar ciclos
+        self.undo_stack = []  # Registros para deshacer movimientos con unmake_move
+        self.white_to_move = True
+        self.zobrist_hash = zobrist.compute_hash(self)
+        # Máscaras de bits por casilla (x * 8 + y) para consultar objetivos cercanos
+        self.points_mask = 0
+        self.point_values = [0] * 64
+        self.multipliers_mask = 0
+        # Punto y multiplicador más cercanos de cada caballo, ver distances.initial_targets
+        self.targets_cache = {}
+        self.targets = ((distances.NO_TARGETS, distances.NO_TARGETS),) * 2
     
-    def initialize_board(self):
-        """Configura el tablero con posiciones iniciales de los caballos, puntos y multiplicadores"""
+    def initialize_board(self, rng: random.Random = None):
+        """Configura el tablero con posiciones iniciales de los caballos, puntos y multiplicadores.
+
+        rng permite usar un generador con semilla propia para reproducir la partida;
+        por defecto se usa el módulo random global.
+        """
         all_positions = [(i, j) for i in range(self.size) for j in range(self.size)]
-        positions = random.sample(all_positions, 16)
+        positions = (rng or random).sample(all_positions, 16)
         
         self.white_horse = positions[0]
         self.black_horse = positions[1]
@@ -31,7 +185,54 @@ class Board:
             
         self.multipliers = set(positions[12:16])
         self.moves_count = 0
-        self.position_history = []
+        self.position_history = PositionHistory(12)
+        self.undo_stack = []
+        self.white_to_move = True
+        self.zobrist_hash = zobrist.compute_hash(self)
+        self._refresh_targets()
+        self._refresh_cells()
+
+    def _refresh_cells(self):
+        """Recalcula desde cero el código de cada celda"""
+        self.board = np.zeros((self.size, self.size), dtype=int)
+        for pos, value in self.points.items():
+            self.board[pos] = value
+        for pos in self.multipliers:
+            self.board[pos] = MULTIPLIER_CELL
+        if self.white_horse is not None:
+            self.board[self.white_horse] = WHITE_HORSE_CELL
+        if self.black_horse is not None:
+            self.board[self.black_horse] = BLACK_HORSE_CELL
+        self._matrix = None
+
+    def matrix(self) -> List[List[int]]:
+        """Códigos de las celdas como listas de Python; la misma lista hasta el próximo movimiento.
+
+        No debe modificarse: se comparte entre todas las lecturas del mismo estado.
+        """
+        if self._matrix is None:
+            self._matrix = self.board.tolist()
+        return self._matrix
+
+    def _refresh_targets(self):
+        """Recalcula desde cero las máscaras y los objetivos más cercanos de ambos caballos"""
+        self.point_values = [0] * 64
+        self.points_mask = 0
+        for pos, value in self.points.items():
+            sq = zobrist.POS_INDEX[pos]
+            self.point_values[sq] = value
+            self.points_mask |= 1 << sq
+        self.multipliers_mask = 0
+        for pos in self.multipliers:
+            self.multipliers_mask |= 1 << zobrist.POS_INDEX[pos]
+        self.targets_cache = {}
+        self.targets = distances.initial_targets(self.targets_cache, self._square(self.white_horse),
+                                                 self._square(self.black_horse), self.points_mask,
+                                                 self.point_values, self.multipliers_mask)
+
+    @staticmethod
+    def _square(position) -> int:
+        return zobrist.POS_INDEX[position] if position is not None else -1
     
     def get_valid_moves(self, position: Tuple[int, int]) -> List[Tuple[int, int]]:
         """Retorna los movimientos válidos de un caballo desde una posición dada"""
@@ -50,49 +251,122 @@ class Board:
         return valid
 
     def make_move(self, position: Tuple[int, int], is_white: bool) -> int:
-        """Realiza un movimiento, actualizando puntajes y estado del tablero"""
+        """Realiza un movimiento, actualizando puntajes y estado del tablero.
+
+        El movimiento se registra en undo_stack para poder revertirlo con unmake_move.
+        """
         self.moves_count += 1
         score = 0
-        self.position_history.append((position, is_white))
-        
-        # Limitar el historial a las últimas 12 posiciones
-        if len(self.position_history) > 12:
-            self.position_history.pop(0)
-            
+        # El historial conserva solo las últimas 12 posiciones
+        evicted = self.position_history.append((position, is_white))
+        previous_horse = self.white_horse if is_white else self.black_horse
+        previous_white_multiplier = self.white_multiplier
+        previous_black_multiplier = self.black_multiplier
+        previous_hash = self.zobrist_hash
+        previous_white_to_move = self.white_to_move
+        previous_targets = self.targets
+        h = previous_hash ^ zobrist.horse_key(previous_horse, is_white) ^ zobrist.horse_key(position, is_white)
+        sq = zobrist.POS_INDEX[position]
+        bit = 1 << sq
+
         # Actualizar puntajes y multiplicadores
-        if position in self.points:
-            base_points = self.points[position]
+        captured_value = self.points.pop(position, 0)
+        if captured_value:
             if (is_white and self.white_multiplier) or (not is_white and self.black_multiplier):
-                score = base_points * 2
+                score = captured_value * 2
                 if is_white:
                     self.white_multiplier = False
                 else:
                     self.black_multiplier = False
             else:
-                score = base_points
-            del self.points[position]
-            
-        if position in self.multipliers:
-            if is_white and not self.white_multiplier:
+                score = captured_value
+            h ^= zobrist.POINT_KEYS[sq][captured_value]
+            self.points_mask ^= bit
+
+        took_multiplier = position in self.multipliers
+        if took_multiplier:
+            if is_white:
                 self.white_multiplier = True
-            elif not is_white and not self.black_multiplier:
+            else:
                 self.black_multiplier = True
             self.multipliers.remove(position)
-        
+            self.multipliers_mask ^= bit
+            h ^= zobrist.MULTIPLIER_KEYS[sq]
+
+        if self.white_multiplier != previous_white_multiplier:
+            h ^= zobrist.WHITE_MULTIPLIER_KEY
+        if self.black_multiplier != previous_black_multiplier:
+            h ^= zobrist.BLACK_MULTIPLIER_KEY
+
         # Actualizar posición y puntaje del caballo correspondiente
+        if score:
+            h ^= zobrist.score_diff_key(self.white_score, self.black_score)
         if is_white:
             self.white_horse = position
             self.white_score += score
         else:
             self.black_horse = position
             self.black_score += score
+        if score:
+            h ^= zobrist.score_diff_key(self.white_score, self.black_score)
+
+        # Después de mover le toca al rival
+        self.white_to_move = not is_white
+        if self.white_to_move != previous_white_to_move:
+            h ^= zobrist.BLACK_TO_MOVE_KEY
+        self.zobrist_hash = h
 
-        self.get_state_as_dict()
-      #  print("Estado del tablero:")
-        #print(self.get_state_as_dict())
+        cells = self.board
+        if previous_horse is not None:
+            cells[previous_horse] = EMPTY_CELL
+        cells[position] = WHITE_HORSE_CELL if is_white else BLACK_HORSE_CELL
+        self._matrix = None
 
+        other_horse = self.black_horse if is_white else self.white_horse
+        self.targets = distances.update_targets(previous_targets, self.targets_cache, is_white, sq,
+                                                self._square(other_horse), bool(captured_value) or took_multiplier,
+                                                self.points_mask, self.point_values, self.multipliers_mask)
+
+        self.undo_stack.append((position, is_white, previous_horse, score, captured_value, took_multiplier,
+                                previous_white_multiplier, previous_black_multiplier, evicted,
+                                previous_hash, previous_white_to_move, previous_targets))
         return score
 
+    def unmake_move(self):
+        """Revierte el último movimiento realizado con make_move"""
+        (position, is_white, previous_horse, score, captured_value, took_multiplier,
+         previous_white_multiplier, previous_black_multiplier, evicted,
+         previous_hash, previous_white_to_move, previous_targets) = self.undo_stack.pop()
+
+        if is_white:
+            self.white_horse = previous_horse
+            self.white_score -= score
+        else:
+            self.black_horse = previous_horse
+            self.black_score -= score
+
+        cells = self.board
+        cells[position] = captured_value or (MULTIPLIER_CELL if took_multiplier else EMPTY_CELL)
+        if previous_horse is not None:
+            cells[previous_horse] = WHITE_HORSE_CELL if is_white else BLACK_HORSE_CELL
+        self._matrix = None
+
+        bit = 1 << zobrist.POS_INDEX[position]
+        if took_multiplier:
+            self.multipliers.add(position)
+            self.multipliers_mask |= bit
+        if captured_value:
+            self.points[position] = captured_value
+            self.points_mask |= bit
+
+        self.white_multiplier = previous_white_multiplier
+        self.black_multiplier = previous_black_multiplier
+        self.position_history.unappend(evicted)
+        self.moves_count -= 1
+        self.white_to_move = previous_white_to_move
+        self.zobrist_hash = previous_hash
+        self.targets = previous_targets
+
     def is_game_over(self) -> bool:
         """Determina si el juego ha terminado"""
         return not self.points or self.moves_count >= 150
@@ -111,8 +385,21 @@ class Board:
         new_board.black_multiplier = self.black_multiplier
         new_board.moves_count = self.moves_count
         new_board.position_history = self.position_history.copy()
+        new_board.white_to_move = self.white_to_move
+        new_board.zobrist_hash = self.zobrist_hash
+        new_board.points_mask = self.points_mask
+        new_board.point_values = self.point_values  # Solo se lee; la máscara indica qué puntos quedan
+        new_board.multipliers_mask = self.multipliers_mask
+        new_board.targets = self.targets
+        new_board.targets_cache = self.targets_cache
         return new_board
 
+    def __getstate__(self):
+        # La cache de objetivos puede ser grande y se reconstruye sola al enviar el tablero a otro proceso
+        state = self.__dict__.copy()
+        state['targets_cache'] = {}
+        return state
+
     def get_state_as_dict(self):
         """Devuelve un diccionario con los atributos y sus valores"""
         return self.__dict__.copy()
@@ -0,0 +1,41 @@
+import threading
+import time
+from typing import Optional
+
+
+class SearchCancelled(Exception):
+    """Se lanza dentro de la búsqueda cuando su CancellationToken se canceló o venció"""
+
+
+class CancellationToken:
+    """Pedido de cancelación cooperativa con plazo opcional.
+
+    La búsqueda lo consulta cada MinimaxPlayer.TIME_CHECK_INTERVAL nodos; cancel()
+    puede llamarse desde cualquier hilo. Con timeout_ms el token se considera
+    cancelado cuando vence el plazo.
+    """
+
+    def __init__(self, timeout_ms: Optional[float] = None):
+        self._event = threading.Event()
+        self.deadline = time.perf_counter() + timeout_ms / 1000 if timeout_ms is not None else None
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def expired(self) -> bool:
+        return self.deadline is not None and time.perf_counter() >= self.deadline
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set() or self.expired
+
+    def remaining(self) -> Optional[float]:
+        """Segundos hasta el plazo (0 si venció), o None si no tiene plazo"""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.perf_counter())
+
+    def raise_if_cancelled(self):
+        if self.cancelled:
+            raise SearchCancelled()
@@ -0,0 +1,139 @@
+from collections import deque
+from typing import List, Optional, Tuple
+
+SIZE = 8
+SQUARES = SIZE * SIZE
+
+MANHATTAN = 0
+KNIGHT = 1
+METRICS = {'manhattan': MANHATTAN, 'knight': KNIGHT}
+
+SQUARE_TO_POS = [(sq // SIZE, sq % SIZE) for sq in range(SQUARES)]
+
+
+def _manhattan_table() -> List[List[int]]:
+    return [[abs(a[0] - b[0]) + abs(a[1] - b[1]) for b in SQUARE_TO_POS] for a in SQUARE_TO_POS]
+
+
+def _knight_table() -> List[List[int]]:
+    """Distancia real en saltos de caballo entre cada par de casillas (BFS desde cada casilla)"""
+    offsets = [(2, 1), (2, -1), (-2, 1), (-2, -1), (1, 2), (1, -2), (-1, 2), (-1, -2)]
+    table = []
+    for start in range(SQUARES):
+        distance = [-1] * SQUARES
+        distance[start] = 0
+        queue = deque([start])
+        while queue:
+            sq = queue.popleft()
+            x, y = SQUARE_TO_POS[sq]
+            for dx, dy in offsets:
+                nx, ny = x + dx, y + dy
+                if 0 <= nx < SIZE and 0 <= ny < SIZE and distance[nx * SIZE + ny] < 0:
+                    distance[nx * SIZE + ny] = distance[sq] + 1
+                    queue.append(nx * SIZE + ny)
+        table.append(distance)
+    return table
+
+
+# DISTANCE[métrica][origen][destino], calculadas una sola vez al importar el módulo
+DISTANCE = (_manhattan_table(), _knight_table())
+
+
+def _rings(table: List[List[int]]):
+    """Para cada casilla, las demás casillas agrupadas por distancia creciente"""
+    rings = []
+    for origin in range(SQUARES):
+        by_distance = {}
+        for target in range(SQUARES):
+            if target != origin:
+                by_distance.setdefault(table[origin][target], []).append(target)
+        rings.append(tuple(
+            (distance, sum(1 << target for target in by_distance[distance]))
+            for distance in sorted(by_distance)
+        ))
+    return rings
+
+
+# RINGS[métrica][casilla] = ((distancia, máscara de bits de las casillas a esa distancia), ...)
+RINGS = (_rings(DISTANCE[MANHATTAN]), _rings(DISTANCE[KNIGHT]))
+
+# Resumen sin objetivos: (distancia al punto, valor del punto, distancia al multiplicador)
+NO_TARGETS = (None, 0, None)
+
+
+def nearest_targets(square: int, points_mask: int, point_values, multipliers_mask: int,
+                    metric: int) -> Tuple[Optional[int], int, Optional[int]]:
+    """Punto más cercano (distancia y valor) y multiplicador más cercano desde una casilla.
+
+    Recorre los anillos de distancia creciente con máscaras de bits. Entre puntos
+    a igual distancia se elige el de menor valor, igual que el recorrido original
+    de utility_function_1/2 sobre el diccionario recién inicializado (ordenado por
+    valor); así el resultado no depende del orden del diccionario.
+    """
+    if square < 0:
+        return NO_TARGETS
+    point_distance, point_value, multiplier_distance = None, 0, None
+    for distance, ring_mask in RINGS[metric][square]:
+        if point_distance is None and points_mask:
+            found = ring_mask & points_mask
+            if found:
+                point_distance = distance
+                point_value = 0
+                while found:
+                    bit = found & -found
+                    value = point_values[bit.bit_length() - 1]
+                    if not point_value or value < point_value:
+                        point_value = value
+                    found ^= bit
+        if multiplier_distance is None and multipliers_mask and ring_mask & multipliers_mask:
+            multiplier_distance = distance
+        if (point_distance is not None or not points_mask) and \
+           (multiplier_distance is not None or not multipliers_mask):
+            break
+    return point_distance, point_value, multiplier_distance
+
+
+# Límite de entradas de la cache de objetivos de una partida
+TARGETS_CACHE_LIMIT = 100_000
+
+
+def targets_for(cache: dict, square: int, points_mask: int, point_values, multipliers_mask: int) -> tuple:
+    """Resumen (manhattan, knight) de objetivos cercanos de una casilla, memorizado por partida.
+
+    La cache se comparte entre los clones de una partida (los valores de los
+    puntos no cambian durante ella), así que la clave solo incluye la casilla y
+    las máscaras de puntos y multiplicadores restantes.
+    """
+    if square < 0:
+        return NO_TARGETS, NO_TARGETS
+    key = (square, points_mask, multipliers_mask)
+    entry = cache.get(key)
+    if entry is None:
+        if len(cache) >= TARGETS_CACHE_LIMIT:
+            cache.clear()
+        entry = (nearest_targets(square, points_mask, point_values, multipliers_mask, MANHATTAN),
+                 nearest_targets(square, points_mask, point_values, multipliers_mask, KNIGHT))
+        cache[key] = entry
+    return entry
+
+
+def initial_targets(cache: dict, white_square: int, black_square: int, points_mask: int, point_values,
+                    multipliers_mask: int) -> tuple:
+    """Resúmenes de ambos caballos: ((manhattan, knight) del blanco, (manhattan, knight) del negro)"""
+    return (targets_for(cache, white_square, points_mask, point_values, multipliers_mask),
+            targets_for(cache, black_square, points_mask, point_values, multipliers_mask))
+
+
+def update_targets(previous: tuple, cache: dict, is_white: bool, mover_square: int, other_square: int,
+                   took_target: bool, points_mask: int, point_values, multipliers_mask: int) -> tuple:
+    """Actualiza los resúmenes después de que un caballo mueve a mover_square.
+
+    El del jugador que movió siempre se actualiza; el del rival solo cambia si
+    se tomó un punto o un multiplicador.
+    """
+    mover = targets_for(cache, mover_square, points_mask, point_values, multipliers_mask)
+    if took_target:
+        other = targets_for(cache, other_square, points_mask, point_values, multipliers_mask)
+    else:
+        other = previous[1 if is_white else 0]
+    return (mover, other) if is_white else (other, mover)
@@ -0,0 +1,25 @@
+from typing import Optional
+from minimax_player import MinimaxPlayer
+from mcts_player import MCTSPlayer
+from transposition_table import DEFAULT_TT_SIZE
+
+# Motores de búsqueda disponibles; todos tienen la interfaz make_move(board, is_white, token)
+MINIMAX = 'minimax'
+MCTS = 'mcts'
+ENGINES = (MINIMAX, MCTS)
+
+
+def create_player(engine: str, depth: int, utility_function: int, time_limit_ms: Optional[int] = None,
+                  tt_size: int = DEFAULT_TT_SIZE, opening_book: Optional[str] = None,
+                  collect_stats: bool = False):
+    """Crea el jugador del motor pedido; los parámetros que el motor no usa se ignoran.
+
+    Para MCTS, depth es el nivel de dificultad (PLAYOUTS_PER_LEVEL rollouts por nivel)
+    salvo que haya tiempo límite.
+    """
+    if engine == MINIMAX:
+        return MinimaxPlayer(depth, utility_function, tt_size=tt_size, time_limit_ms=time_limit_ms,
+                             opening_book=opening_book, collect_stats=collect_stats)
+    if engine == MCTS:
+        return MCTSPlayer(depth, utility_function, time_limit_ms=time_limit_ms)
+    raise ValueError(f"Motor desconocido: {engine}")
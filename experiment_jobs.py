@@ -0,0 +1,205 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+from experiments import (DEFAULT_GAMES_PER_PAIRING, iter_experiment_games, empty_results, record_game,
+                         experiment_matrix, experiment_report)
+
+QUEUED = 'queued'
+RUNNING = 'running'
+COMPLETED = 'completed'
+CANCELLED = 'cancelled'
+FAILED = 'failed'
+FINISHED_STATES = (COMPLETED, CANCELLED, FAILED)
+
+# Cuántos resultados completos se guardan en cache y cuántos trabajos terminados se recuerdan
+RESULT_CACHE_SIZE = 32
+FINISHED_JOBS_LIMIT = 100
+
+
+class JobCancelled(Exception):
+    """Se lanza dentro de un trabajo cuando se pidió cancelarlo"""
+
+
+class ExperimentJob:
+    """Un experimento encolado: parámetros, progreso, resultados parciales y estado"""
+
+    def __init__(self, difficulty_levels: Dict[str, int], games_per_pairing: int, base_seed: int,
+                 workers: Optional[int] = None, time_limit_ms: Optional[int] = None):
+        self.id = uuid.uuid4().hex
+        self.difficulty_levels = dict(difficulty_levels)
+        self.games_per_pairing = games_per_pairing
+        self.base_seed = base_seed
+        self.workers = workers
+        self.time_limit_ms = time_limit_ms
+        self.status = QUEUED
+        self.error = None
+        self.total_games = len(difficulty_levels) ** 2 * games_per_pairing
+        self.played = 0
+        self.results = empty_results(difficulty_levels)
+        self.totals = [0, 0, 0]
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+        self._done = threading.Event()
+
+    @property
+    def cache_key(self) -> tuple:
+        """Parámetros que determinan el resultado; la cantidad de procesos no influye"""
+        return (tuple(self.difficulty_levels.items()), self.games_per_pairing, self.base_seed, self.time_limit_ms)
+
+    def run(self):
+        """Juega las partidas del experimento actualizando el progreso; se ejecuta en el pool de trabajos"""
+        with self._lock:
+            if self._cancel.is_set():
+                return  # Se canceló mientras estaba en la cola
+            self.status = RUNNING
+            self.started_at = time.time()
+        games = iter_experiment_games(self.difficulty_levels, self.games_per_pairing, self.base_seed,
+                                      self.workers, self.time_limit_ms, cancel_event=self._cancel)
+        try:
+            for game in games:
+                with self._lock:
+                    record_game(self.results, self.totals, game)
+                    self.played += 1
+                if self._cancel.is_set():
+                    raise JobCancelled()
+            # El generador también termina antes de tiempo cuando se cancela mientras espera una partida
+            if self._cancel.is_set():
+                raise JobCancelled()
+        except JobCancelled:
+            with self._lock:
+                self._finish(CANCELLED)
+        except Exception as e:
+            with self._lock:
+                self.error = str(e)
+                self._finish(FAILED)
+        else:
+            with self._lock:
+                self._finish(COMPLETED)
+        finally:
+            games.close()
+
+    def _finish(self, status: str):
+        self.status = status
+        self.finished_at = time.time()
+        self._done.set()
+
+    def cancel(self) -> bool:
+        """Pide cancelar el trabajo; devuelve False si ya había terminado"""
+        with self._lock:
+            if self.status in FINISHED_STATES:
+                return False
+            self._cancel.set()
+            if self.status == QUEUED:
+                self._finish(CANCELLED)
+            return True
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Espera a que el trabajo termine; devuelve False si se venció el plazo"""
+        return self._done.wait(timeout)
+
+    @property
+    def finished(self) -> bool:
+        return self._done.is_set()
+
+    def snapshot(self) -> dict:
+        """Estado del trabajo para /api/experiments/<id>, con los resultados parciales por combinación"""
+        with self._lock:
+            matrix = experiment_matrix(self.difficulty_levels, self.games_per_pairing, self.base_seed,
+                                       {ai1: {ai2: list(counts) for ai2, counts in row.items()}
+                                        for ai1, row in self.results.items()},
+                                       list(self.totals))
+            return {
+                "job_id": self.id,
+                "status": self.status,
+                "played": self.played,
+                "total": self.total_games,
+                "percentage": round(self.played / self.total_games * 100, 2) if self.total_games else 100.0,
+                "cancel_requested": self._cancel.is_set(),
+                "error": self.error,
+                "params": {
+                    "levels": self.difficulty_levels,
+                    "games": self.games_per_pairing,
+                    "seed": self.base_seed,
+                    "time_limit_ms": self.time_limit_ms,
+                },
+                "report": experiment_report(matrix),
+            }
+
+
+class ExperimentJobQueue:
+    """Cola de experimentos ejecutados en segundo plano.
+
+    Los trabajos corren en un pool de hilos (cada uno reparte sus partidas en
+    su propio pool de procesos, ver iter_experiment_games). Un experimento
+    idéntico a uno en curso reutiliza ese trabajo, y los resultados completos
+    quedan en una cache por parámetros y semilla para responder al instante.
+    """
+
+    def __init__(self, max_running: int = 1):
+        self._executor = ThreadPoolExecutor(max_workers=max_running, thread_name_prefix="experiments")
+        self._jobs = OrderedDict()  # id -> ExperimentJob, en orden de creación
+        self._active = {}  # cache_key -> trabajo encolado o en curso
+        self._cache = OrderedDict()  # cache_key -> trabajo completo, el más reciente al final
+        self._lock = threading.Lock()
+
+    def submit(self, difficulty_levels: Dict[str, int], games_per_pairing: int = DEFAULT_GAMES_PER_PAIRING,
+               base_seed: int = 0, workers: Optional[int] = None,
+               time_limit_ms: Optional[int] = None) -> ExperimentJob:
+        """Encola un experimento, o devuelve el trabajo en cache o en curso con los mismos parámetros"""
+        job = ExperimentJob(difficulty_levels, games_per_pairing, base_seed, workers, time_limit_ms)
+        key = job.cache_key
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return cached
+            active = self._active.get(key)
+            if active is not None and not active.finished:
+                return active
+            self._jobs[job.id] = job
+            self._active[key] = job
+            self._prune()
+        self._executor.submit(self._run, job)
+        return job
+
+    def _run(self, job: ExperimentJob):
+        job.run()
+        with self._lock:
+            if self._active.get(job.cache_key) is job:
+                del self._active[job.cache_key]
+            if job.status == COMPLETED:
+                self._cache[job.cache_key] = job
+                while len(self._cache) > RESULT_CACHE_SIZE:
+                    self._cache.popitem(last=False)
+
+    def _prune(self):
+        """Olvida los trabajos terminados más viejos que no están en la cache"""
+        finished = [job_id for job_id, job in self._jobs.items()
+                    if job.finished and self._cache.get(job.cache_key) is not job]
+        for job_id in finished[:max(0, len(finished) - FINISHED_JOBS_LIMIT)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id: str) -> Optional[ExperimentJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[ExperimentJob]:
+        """Cancela un trabajo; devuelve None si no existe"""
+        job = self.get(job_id)
+        if job is not None:
+            job.cancel()
+        return job
+
+    def shutdown(self):
+        """Cancela los trabajos pendientes y espera a que terminen los que están en curso"""
+        with self._lock:
+            jobs = list(self._jobs.values())
+        for job in jobs:
+            job.cancel()
+        self._executor.shutdown(wait=True)
@@ -1,48 +1,250 @@
-from collections import defaultdict
+import multiprocessing
+import os
+import random
+import threading
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 from ai_game import AIGame
+from engines import MINIMAX
 from tabulate import tabulate
+from search_stats import SearchStats
 
-def run_experiments():
-    """Ejecuta experimentos para evaluar diferentes configuraciones de dificultad"""
-    difficulty_levels = {
-        'Principiante': 2,
-        'Amateur': 4,
-        'Experto': 6
+DEFAULT_DIFFICULTY_LEVELS = {
+    'Principiante': 2,
+    'Amateur': 4,
+    'Experto': 6
+}
+DEFAULT_GAMES_PER_PAIRING = 10
+DEFAULT_ENGINES = (MINIMAX, MINIMAX)
+# Cada cuántos segundos se consulta cancel_event mientras se espera una partida del pool
+CANCEL_POLL_SECONDS = 0.1
+
+
+def game_seed(base_seed: int, ai1_level: str, ai2_level: str, game_index: int) -> int:
+    """Semilla de una partida derivada de la semilla base; no depende del proceso que la juegue"""
+    return random.Random(f"{base_seed}:{ai1_level}:{ai2_level}:{game_index}").getrandbits(32)
+
+
+def experiment_tasks(difficulty_levels: Dict[str, int], games_per_pairing: int,
+                     base_seed: int, time_limit_ms: Optional[int] = None,
+                     collect_stats: bool = False, engines: Tuple[str, str] = DEFAULT_ENGINES) -> List[Tuple]:
+    """Lista ordenada de partidas: (nivel IA1, nivel IA2, índice, profundidad IA1, profundidad IA2, semilla,
+    tiempo, estadísticas, motores de IA1 e IA2)"""
+    return [
+        (ai1_level, ai2_level, game_index, difficulty_levels[ai1_level], difficulty_levels[ai2_level],
+         game_seed(base_seed, ai1_level, ai2_level, game_index), time_limit_ms, collect_stats, tuple(engines))
+        for ai1_level in difficulty_levels
+        for ai2_level in difficulty_levels
+        for game_index in range(games_per_pairing)
+    ]
+
+
+def play_experiment_game(task: Tuple) -> dict:
+    """Juega una partida del experimento; se ejecuta en los procesos del pool"""
+    ai1_level, ai2_level, game_index, ai1_depth, ai2_depth, seed, time_limit_ms, collect_stats, engines = task
+    game = AIGame(ai1_depth, ai2_depth, time_limit_ms=time_limit_ms, collect_stats=collect_stats,
+                  ai1_engine=engines[0], ai2_engine=engines[1])
+    result = game.play_game(seed=seed)
+    record = {
+        "ai1_level": ai1_level,
+        "ai2_level": ai2_level,
+        "game": game_index,
+        "seed": seed,
+        "result": result,
+        "white_score": game.board.white_score,
+        "black_score": game.board.black_score,
+        "moves": game.board.moves_count,
     }
-    
-    results = defaultdict(lambda: defaultdict(lambda: [0, 0, 0]))
-    total_ai1, total_ai2, total_draws = 0, 0, 0
-    
-    for ai1_level in difficulty_levels:
-        for ai2_level in difficulty_levels:
-            print(f"\nCombinación {ai1_level} vs {ai2_level}")
-            for game in range(10):
-                print(f"Jugando partida {game + 1}/10", end='\r')
-                game = AIGame(difficulty_levels[ai1_level], difficulty_levels[ai2_level])
-                result = game.play_game()
-                
-                if result == 1:
-                    results[ai1_level][ai2_level][0] += 1
-                    total_ai1 += 1
-                elif result == 2:
-                    results[ai1_level][ai2_level][1] += 1
-                    total_ai2 += 1
-                else:
-                    results[ai1_level][ai2_level][2] += 1
-                    total_draws += 1
-    
+    if collect_stats:
+        record["ai1_stats"] = game.ai1_stats.to_dict()
+        record["ai2_stats"] = game.ai2_stats.to_dict()
+    return record
+
+
+def iter_experiment_games(difficulty_levels: Dict[str, int] = None,
+                          games_per_pairing: int = DEFAULT_GAMES_PER_PAIRING,
+                          base_seed: int = 0, workers: Optional[int] = None,
+                          time_limit_ms: Optional[int] = None,
+                          collect_stats: bool = False,
+                          engines: Tuple[str, str] = DEFAULT_ENGINES,
+                          cancel_event: Optional[threading.Event] = None) -> Iterator[dict]:
+    """Juega todas las partidas del experimento y las entrega en orden fijo.
+
+    El orden (IA1, IA2, partida) y las semillas no dependen de la cantidad de
+    procesos, así que el resultado es el mismo con cualquier valor de workers.
+    Con collect_stats cada partida incluye las estadísticas de búsqueda de cada IA;
+    engines elige el motor de IA1 y el de IA2 (ver engines.ENGINES).
+
+    Si cancel_event se activa, el generador termina sin entregar más partidas.
+    Con el pool, las partidas en curso se interrumpen terminando sus procesos;
+    con workers=1 se termina de jugar la partida actual. Lo mismo ocurre si se
+    deja de consumir el generador.
+    """
+    difficulty_levels = difficulty_levels or DEFAULT_DIFFICULTY_LEVELS
+    tasks = experiment_tasks(difficulty_levels, games_per_pairing, base_seed, time_limit_ms, collect_stats,
+                             engines)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for task in tasks:
+            if cancel_event is not None and cancel_event.is_set():
+                return
+            yield play_experiment_game(task)
+        return
+    # Pool propio en lugar de ProcessPoolExecutor: terminate() mata a los procesos
+    # que tiene, mientras que el executor olvida sus procesos al hacer shutdown
+    pool = multiprocessing.Pool(workers)
+    finished = False
+    try:
+        pending = [pool.apply_async(play_experiment_game, (task,)) for task in tasks]
+        for result in pending:
+            while not result.ready():
+                if cancel_event is not None and cancel_event.is_set():
+                    return
+                result.wait(CANCEL_POLL_SECONDS)
+            yield result.get()
+        finished = True
+    finally:
+        # Al cancelar o dejar de consumir el generador no se juegan las partidas pendientes
+        # y se terminan los procesos de las que están en curso, sin esperarlas
+        if finished:
+            pool.close()
+        else:
+            pool.terminate()
+        pool.join()
+
+
+def empty_results(difficulty_levels: Dict[str, int]) -> dict:
+    """Contadores [gana IA1, gana IA2, empates] por combinación de niveles"""
+    return {ai1: {ai2: [0, 0, 0] for ai2 in difficulty_levels} for ai1 in difficulty_levels}
+
+
+def record_game(results: dict, totals: List[int], game: dict, stats: Dict[str, SearchStats] = None):
+    """Suma el resultado de una partida a los contadores de su combinación y a los totales.
+
+    Con stats (nivel -> SearchStats) también suma las estadísticas de búsqueda de
+    cada IA al nivel con el que jugó.
+    """
+    # Resultado 1: gana IA1, 2: gana IA2, 0: empate
+    slot = {1: 0, 2: 1, 0: 2}[game["result"]]
+    results[game["ai1_level"]][game["ai2_level"]][slot] += 1
+    totals[slot] += 1
+    if stats is not None and "ai1_stats" in game:
+        for level, data in ((game["ai1_level"], game["ai1_stats"]), (game["ai2_level"], game["ai2_stats"])):
+            stats.setdefault(level, SearchStats()).merge(SearchStats.from_dict(data))
+
+
+def experiment_matrix(difficulty_levels: Dict[str, int], games_per_pairing: int, base_seed: int,
+                      results: dict, totals: List[int], stats: Dict[str, SearchStats] = None) -> dict:
+    """Resultado agregado en el formato de run_experiment_matrix"""
+    matrix = {
+        "difficulty_levels": dict(difficulty_levels),
+        "games_per_pairing": games_per_pairing,
+        "seed": base_seed,
+        "results": results,
+        "totals": totals,
+    }
+    if stats is not None:
+        matrix["stats"] = {level: stats[level].to_dict() for level in difficulty_levels if level in stats}
+    return matrix
+
+
+def run_experiment_matrix(difficulty_levels: Dict[str, int] = None,
+                          games_per_pairing: int = DEFAULT_GAMES_PER_PAIRING,
+                          base_seed: int = 0, workers: Optional[int] = None,
+                          time_limit_ms: Optional[int] = None,
+                          on_game: Callable[[dict], None] = None,
+                          collect_stats: bool = False,
+                          engines: Tuple[str, str] = DEFAULT_ENGINES) -> dict:
+    """Ejecuta el experimento completo y devuelve los resultados agregados por combinación.
+
+    Con collect_stats el resultado incluye "stats": las estadísticas de búsqueda
+    (SearchStats.to_dict) de todas las jugadas de cada nivel de dificultad.
+    """
+    difficulty_levels = difficulty_levels or DEFAULT_DIFFICULTY_LEVELS
+    results = empty_results(difficulty_levels)
+    totals = [0, 0, 0]
+    stats = {} if collect_stats else None
+
+    for game in iter_experiment_games(difficulty_levels, games_per_pairing, base_seed, workers, time_limit_ms,
+                                      collect_stats, engines):
+        record_game(results, totals, game, stats)
+        if on_game is not None:
+            on_game(game)
+
+    return experiment_matrix(difficulty_levels, games_per_pairing, base_seed, results, totals, stats)
+
+
+def experiment_report(matrix: dict) -> dict:
+    """Convierte el resultado de run_experiment_matrix al formato JSON de /api/run-experiments"""
+    levels = list(matrix["difficulty_levels"])
+    total_ai1, total_ai2, total_draws = matrix["totals"]
+    total = (total_ai1 + total_ai2 + total_draws) or 1
+    return {
+        "totals": {
+            "ia1": total_ai1,
+            "ia1_percentage": round((total_ai1 / total) * 100, 2),
+            "ia2": total_ai2,
+            "ia2_percentage": round((total_ai2 / total) * 100, 2),
+            "draws": total_draws,
+            "draws_percentage": round((total_draws / total) * 100, 2),
+        },
+        "details": {
+            ai1_level: {
+                ai2_level: {
+                    "wins_ai1": matrix["results"][ai1_level][ai2_level][0],
+                    "wins_ai2": matrix["results"][ai1_level][ai2_level][1],
+                    "draws": matrix["results"][ai1_level][ai2_level][2]
+                } for ai2_level in levels
+            } for ai1_level in levels
+        },
+        "games_per_pairing": matrix["games_per_pairing"],
+        "seed": matrix["seed"],
+    }
+
+
+def run_experiments(difficulty_levels: Dict[str, int] = None,
+                    games_per_pairing: int = DEFAULT_GAMES_PER_PAIRING,
+                    base_seed: int = 0, workers: Optional[int] = None, collect_stats: bool = True,
+                    engines: Tuple[str, str] = DEFAULT_ENGINES):
+    """Ejecuta experimentos para evaluar diferentes configuraciones de dificultad"""
+    difficulty_levels = difficulty_levels or DEFAULT_DIFFICULTY_LEVELS
+    total_games = len(difficulty_levels) ** 2 * games_per_pairing
+    played = [0]
+
+    def show_progress(game):
+        played[0] += 1
+        print(f"Jugando partida {played[0]}/{total_games}", end='\r')
+
+    matrix = run_experiment_matrix(difficulty_levels, games_per_pairing, base_seed, workers,
+                                   on_game=show_progress, collect_stats=collect_stats, engines=engines)
+    results = matrix["results"]
+    total_ai1, total_ai2, total_draws = matrix["totals"]
+
     table = []
     headers = ['IA1 vs IA2'] + list(difficulty_levels.keys())
-    
+
     for ai1_level in difficulty_levels:
         row = [ai1_level]
         for ai2_level in difficulty_levels:
             wins_ai1, wins_ai2, draws = results[ai1_level][ai2_level]
             row.append(f"{wins_ai1}-{wins_ai2}-{draws}")
         table.append(row)
-    
+
     print("\nResultados finales (IA1-IA2-Empates):")
     print(tabulate(table, headers=headers, tablefmt="grid"))
     print(f"\nTotal IA1: {total_ai1} ({(total_ai1/(total_ai1+total_ai2+total_draws))*100:.2f}%)")
     print(f"Total IA2: {total_ai2} ({(total_ai2/(total_ai1+total_ai2+total_draws))*100:.2f}%)")
     print(f"Empates: {total_draws} ({(total_draws/(total_ai1+total_ai2+total_draws))*100:.2f}%)")
+
+    if "stats" in matrix:
+        stats_table = []
+        for level, stats in matrix["stats"].items():
+            searches = stats["searches"] or 1
+            stats_table.append([
+                level, stats["searches"], f"{stats['nodes'] / searches:.0f}", f"{stats['elapsed_ms'] / searches:.2f}",
+                f"{stats['effective_branching_factor']:.2f}", f"{stats['cutoff_rate'] * 100:.1f}%",
+                f"{stats['first_move_cutoff_rate'] * 100:.1f}%", f"{stats['cycle_filter_hits'] / searches:.2f}",
+            ])
+        print("\nEstadísticas de búsqueda por nivel:")
+        print(tabulate(stats_table, headers=['Nivel', 'Jugadas', 'Nodos/jugada', 'ms/jugada', 'Ramificación',
+                                             'Cortes', 'Cortes 1er mov.', 'Ciclos/jugada'], tablefmt="grid"))
+    return matrix
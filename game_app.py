@@ -1,40 +1,90 @@
 from board import Board
 from minimax_player import MinimaxPlayer
+from engines import MINIMAX, create_player
+from transposition_table import DEFAULT_TT_SIZE
 from experiments import run_experiments
+from metrics import AI_MOVE_LATENCY, GAME_STATE_LATENCY, PONDER_LOOKUPS
+from ponder import Ponderer
+from cancellation import CancellationToken, SearchCancelled
 
 class GameApp:
-    def __init__(self):
-        """Inicializa la lógica del juego"""
+    def __init__(self, tt_size: int = DEFAULT_TT_SIZE, opening_book: str = None, ponder: bool = False):
+        """Inicializa la lógica del juego.
+
+        tt_size es el tamaño de la tabla de transposición de cada IA y opening_book
+        la ruta del libro de aperturas que comparten (ver MinimaxPlayer).
+
+        Con ponder, en modo "IA vs Humano" la IA piensa sus respuestas en segundo
+        plano mientras el humano elige su jugada (ver ponder.Ponderer).
+        """
+        self.tt_size = tt_size
+        self.opening_book = opening_book
+        self.ponder = ponder
+        self.ponderer = None
         self.board = None
         self.is_white_turn = True
         self.mode = "IA vs Humano"
         self.difficulty = 4
+        self.time_limit_ms = None
+        self.engine = MINIMAX
         self.ai_player = None
         self.ai_opponent = None
+        self._state_cache = None  # Último estado devuelto por get_game_state
+        self.last_search_stats = None  # SearchStats del último run_ai_turn con collect_stats
+
+    def start_new_game(self, mode="IA vs Humano", difficulty=4, time_limit_ms=None, engine=MINIMAX):
+        """Inicia un nuevo juego con el modo y la dificultad especificados.
 
-    def start_new_game(self, mode="IA vs Humano", difficulty=4):
-        """Inicia un nuevo juego con el modo y la dificultad especificados"""
+        Con time_limit_ms la IA busca por profundización iterativa hasta `difficulty`
+        niveles, sin exceder ese tiempo por movimiento. engine elige el motor de
+        ambas IA (ver engines.ENGINES).
+        """
+        self.close()
         self.mode = mode
         self.difficulty = difficulty
+        self.time_limit_ms = time_limit_ms
+        self.engine = engine
         self.board = Board()
         self.board.initialize_board()
-        self.ai_player = MinimaxPlayer(difficulty, utility_function=1)
-        self.ai_opponent = MinimaxPlayer(difficulty, utility_function=2)
+        self.ai_player = create_player(engine, difficulty, 1, time_limit_ms, self.tt_size, self.opening_book)
+        self.ai_opponent = create_player(engine, difficulty, 2, time_limit_ms, self.tt_size, self.opening_book)
+        # El pondering usa la búsqueda de MinimaxPlayer; MCTS ya conserva su árbol entre turnos
+        self.ponderer = Ponderer(self.ai_player) \
+            if self.ponder and mode == "IA vs Humano" and isinstance(self.ai_player, MinimaxPlayer) else None
         self.is_white_turn = True
 
-    def run_ai_turn(self):
+    def update_difficulty(self, difficulty, time_limit_ms=None):
+        """Cambia la profundidad y el tiempo límite de las IA de la partida en curso"""
+        self.stop_pondering()  # Lo pensado corresponde a la configuración anterior
+        self.difficulty = difficulty
+        self.time_limit_ms = time_limit_ms
+        for player in (self.ai_player, self.ai_opponent):
+            if player is not None:
+                player.depth = difficulty
+                player.time_limit_ms = time_limit_ms
+
+    def run_ai_turn(self, collect_stats: bool = False, token: CancellationToken = None):
+        """Juega el turno de la IA y devuelve los estados antes y después del movimiento.
 
+        Con collect_stats la búsqueda registra sus estadísticas (ver SearchStats),
+        que quedan en last_search_stats. Si el token se cancela antes de tener
+        una jugada se lanza SearchCancelled y la partida queda como estaba.
+        """
         history = []  # Lista para almacenar los estados antes y después del movimiento
 
         # Estado inicial del juego antes del movimiento de la IA
         game_state = self.get_game_state()
         history.append(game_state)
 
-        _, best_move = self.ai_player.minimax(self.board, self.difficulty, float('-inf'), float('inf'), True, self.is_white_turn)
+        self.ai_player.collect_stats = collect_stats
+        best_move = self.search_move(self.ai_player, token)
+        self.last_search_stats = self.ai_player.last_stats if collect_stats else None
         if best_move:
             self.board.make_move(best_move, self.is_white_turn)
 
         self.is_white_turn = not self.is_white_turn
+        if self.ponderer is not None:
+            self.ponderer.start(self.board, not self.is_white_turn)
 
         game_state = self.get_game_state()
         history.append(game_state)
@@ -55,24 +105,93 @@ class GameApp:
         return history
 
 
-    def run_ai_vs_ai(self):
+    def search_move(self, player, token: CancellationToken = None):
+        """Busca la jugada del jugador de turno registrando el tiempo de búsqueda por dificultad"""
+        with AI_MOVE_LATENCY.time(difficulty=self.difficulty):
+            if player is self.ai_player and self.ponderer is not None and self.ponderer.pending:
+                hit, move = self.ponderer.take(self.board)
+                PONDER_LOOKUPS.inc(result="hit" if hit else "miss")
+                if hit:
+                    return move
+            return player.make_move(self.board, self.is_white_turn, token)
+
+    def stop_pondering(self, wait: bool = True):
+        """Cancela el pondering en curso; sin wait no espera a que el hilo termine"""
+        if self.ponderer is not None:
+            self.ponderer.stop(wait)
+
+    def close(self, wait: bool = True):
+        """Detiene el pondering y libera los recursos de las IA (el pool de la búsqueda paralela)"""
+        self.stop_pondering(wait)
+        for player in (self.ai_player, self.ai_opponent):
+            if player is not None:
+                player.close()
+
+    def run_ai_vs_ai(self, token: CancellationToken = None):
+        """Juega la partida IA contra IA hasta el final y devuelve los estados de cada jugada.
 
+        Si el token se cancela, devuelve los estados jugados hasta ese momento.
+        """
         history = []
 
         while not self.board.is_game_over():
             game_state = self.get_game_state()
             history.append(game_state)
 
-            current_ai = self.ai_player if self.is_white_turn else self.ai_opponent
-            _, best_move = current_ai.minimax(self.board, self.difficulty, float('-inf'), float('inf'), True, self.is_white_turn)
-            if best_move:
-                self.board.make_move(best_move, self.is_white_turn)
-            self.is_white_turn = not self.is_white_turn
+            try:
+                self.play_ai_move(token)
+            except SearchCancelled:
+                break
         history.append(self.get_game_state())
 
         return history
 
 
+    def play_ai_move(self, token: CancellationToken = None) -> dict:
+        """Juega el turno de la IA que corresponde y devuelve el cambio como delta compacto.
+
+        El delta indica quién movió, desde y hacia qué casilla, los puntos ganados
+        y solo los multiplicadores que cambiaron; mover es None si no hubo movimiento.
+        """
+        mover = "white" if self.is_white_turn else "black"
+        origin = self.board.white_horse if self.is_white_turn else self.board.black_horse
+        multipliers = (self.board.white_multiplier, self.board.black_multiplier)
+
+        current_ai = self.ai_player if self.is_white_turn else self.ai_opponent
+        best_move = self.search_move(current_ai, token)
+        gained = self.board.make_move(best_move, self.is_white_turn) if best_move else 0
+        self.is_white_turn = not self.is_white_turn
+
+        delta = {
+            "ply": self.board.moves_count,
+            "mover": mover,
+            "from": list(origin) if best_move else None,
+            "to": list(best_move) if best_move else None,
+            "points": gained,
+        }
+        for side, before, after in (("white", multipliers[0], self.board.white_multiplier),
+                                    ("black", multipliers[1], self.board.black_multiplier)):
+            if before != after:
+                delta.setdefault("multipliers", {})[side] = after
+        return delta
+
+    def iter_ai_vs_ai(self, token: CancellationToken = None):
+        """Partida IA contra IA como secuencia de eventos, producidos a medida que la IA elige.
+
+        Primero el estado completo inicial ("start"), luego un delta por jugada
+        ("move", ver play_ai_move) y al final los puntajes ("end"). Si el token
+        se cancela, el último evento es "timeout" con la jugada en que se cortó.
+        """
+        yield dict(self.get_game_state(), event="start")
+        while not self.board.is_game_over():
+            try:
+                delta = self.play_ai_move(token)
+            except SearchCancelled:
+                yield {"event": "timeout", "ply": self.board.moves_count}
+                return
+            yield dict(delta, event="move")
+        yield {"event": "end", **self.end_game()}
+
     def update_board(self):
         """Actualiza la representación del tablero"""
         return self.get_game_state()
@@ -96,36 +215,29 @@ class GameApp:
 
 
     def get_game_state(self):
-        """Devuelve el estado del juego como un diccionario"""
-        board_state = self.board.get_state_as_dict()
-        # Construir la representación de la matriz
-        matrix = []
-        for i in range(board_state['size']):
-            row = []
-            for j in range(board_state['size']):
-                cell = 0  # Por defecto, celda vacía
-                if (i, j) == board_state['white_horse']:
-                    cell = 11  # Identificador del caballo blanco
-                elif (i, j) == board_state['black_horse']:
-                    cell = 12  # Identificador del caballo negro
-                elif (i, j) in board_state['points']:
-                    cell = board_state['points'][(i, j)]  # Valor del punto
-                elif (i, j) in board_state['multipliers']:
-                    cell = 20  # Identificador del multiplicador
-                row.append(cell)
-            matrix.append(row)
-
-        # Devolver el estado completo del juego
-        return {
-            "matrix": matrix,  # Representación de la matriz
-            "whiteHorsePoints": board_state['white_score'],
-            "blackHorsePoints": board_state['black_score'],
-            "whiteHorseMultiplier": board_state['white_multiplier'],
-            "blackHorseMultiplier": board_state['black_multiplier'],
-            "movesCount": board_state['moves_count'],
-            "gameOver": self.board.is_game_over(),
-            "turn": "white" if self.is_white_turn else "black"
-        }
+        """Devuelve el estado del juego como un diccionario.
+
+        Mientras no haya movimientos ni cambie el turno se devuelve el mismo
+        diccionario, que no debe modificarse: cada movimiento mueve un caballo,
+        así que Board.matrix entrega una lista nueva y el estado se recalcula.
+        """
+        with GAME_STATE_LATENCY.time():
+            matrix = self.board.matrix()
+            turn = "white" if self.is_white_turn else "black"
+            state = self._state_cache
+            if state is None or state["matrix"] is not matrix or state["turn"] != turn:
+                board = self.board
+                state = self._state_cache = {
+                    "matrix": matrix,  # Representación de la matriz
+                    "whiteHorsePoints": board.white_score,
+                    "blackHorsePoints": board.black_score,
+                    "whiteHorseMultiplier": board.white_multiplier,
+                    "blackHorseMultiplier": board.black_multiplier,
+                    "movesCount": board.moves_count,
+                    "gameOver": board.is_game_over(),
+                    "turn": turn
+                }
+            return state
 
 
     def get_game(self):
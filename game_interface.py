@@ -1,8 +1,10 @@
+import os
 import tkinter as tk
 from tkinter import messagebox, ttk
 from board import Board
 from minimax_player import MinimaxPlayer
 from experiments import run_experiments
+from ponder import Ponderer
 
 class GameInterface:
     def __init__(self, root):
@@ -17,6 +19,9 @@ class GameInterface:
         self.difficulty = 4
         self.ai_player = MinimaxPlayer(self.difficulty, utility_function=1)
         self.ai_opponent = MinimaxPlayer(self.difficulty, utility_function=2)
+        # Con PONDER=1, como en app.py, la IA piensa sus respuestas durante el turno del humano
+        self.ponder = os.environ.get('PONDER') == '1'
+        self.ponderer = None
         
         self.create_menu()
         self.info_label = tk.Label(root, text="")
@@ -58,10 +63,13 @@ class GameInterface:
         difficulty_text = self.difficulty_combo.get()#dificultad
         self.difficulty = int(difficulty_text[difficulty_text.find("(") + 1:difficulty_text.find(")")])
         
+        if self.ponderer is not None:
+            self.ponderer.stop()
         self.board = Board()
         self.board.initialize_board()
         self.ai_player = MinimaxPlayer(self.difficulty, utility_function=1)
         self.ai_opponent = MinimaxPlayer(self.difficulty, utility_function=2)
+        self.ponderer = Ponderer(self.ai_player) if self.ponder and self.mode == "IA vs Humano" else None
         self.is_white_turn = True
         self.update_board()
 
@@ -79,12 +87,16 @@ class GameInterface:
     
     def run_ai_turn(self):
         """Gestiona el turno de la IA en modo IA vs Humano"""
-        _, best_move = self.ai_player.minimax(self.board, self.difficulty, float('-inf'), float('inf'), True, True)
+        hit, best_move = self.ponderer.take(self.board) if self.ponderer is not None else (False, None)
+        if not hit:
+            best_move = self.ai_player.make_move(self.board, True)
         
         if best_move:
             self.board.make_move(best_move, True)
             
         self.is_white_turn = not self.is_white_turn
+        if self.ponderer is not None:
+            self.ponderer.start(self.board, True)
         self.update_board()
         self.board.get_state_as_dict()
         print("Estado del tablero:")
@@ -158,7 +170,7 @@ class GameInterface:
         """Gestiona partidas automáticas entre IA"""
         if not self.board.is_game_over():
             current_ai = self.ai_player if self.is_white_turn else self.ai_opponent
-            _, best_move = current_ai.minimax(self.board, self.difficulty, float('-inf'), float('inf'), True, self.is_white_turn)
+            best_move = current_ai.make_move(self.board, self.is_white_turn)
             if best_move:
                 self.board.make_move(best_move, self.is_white_turn)
             self.is_white_turn = not self.is_white_turn
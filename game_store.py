@@ -0,0 +1,148 @@
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Optional
+from game_app import GameApp
+
+DEFAULT_CAPACITY = 2000
+DEFAULT_TTL_SECONDS = 30 * 60
+DEFAULT_MAX_MEMORY_BYTES = 1 << 30
+# Tabla de transposición de cada IA de una sesión web (la de MinimaxPlayer ocupa varios MB)
+SESSION_TT_SIZE = 1 << 12
+
+# Bytes aproximados por entrada de la cache de objetivos del tablero (clave, tupla de resúmenes)
+TARGETS_CACHE_ENTRY_BYTES = 400
+# Bytes aproximados del tablero y los jugadores sin contar tablas ni caches
+BASE_SESSION_BYTES = 16 * 1024
+
+
+def estimate_game_bytes(game: GameApp) -> int:
+    """Memoria aproximada de una partida: tablas de transposición y cache de objetivos del tablero"""
+    total = BASE_SESSION_BYTES
+    for player in (game.ai_player, game.ai_opponent):
+        if player is not None and player.transposition_table is not None:
+            total += player.transposition_table.memory_bytes()
+    if game.board is not None:
+        total += sys.getsizeof(game.board.targets_cache) + \
+            len(game.board.targets_cache) * TARGETS_CACHE_ENTRY_BYTES
+    return total
+
+
+class GameSession:
+    """Una partida del store con su lock: las peticiones de la misma partida se atienden de a una"""
+
+    def __init__(self, game: GameApp):
+        self.id = uuid.uuid4().hex
+        self.game = game
+        self.lock = threading.RLock()
+        self.created_at = time.monotonic()
+        self.last_access = self.created_at
+        self.memory_bytes = estimate_game_bytes(game)
+
+
+class GameStore:
+    """Partidas indexadas por id con límite de cantidad, expiración por inactividad y presupuesto de memoria.
+
+    Las sesiones se mantienen en orden de último acceso: al superar la
+    capacidad o el presupuesto de memoria se descartan las menos usadas, y las
+    que llevan más de ttl_seconds sin usarse se descartan al crear o buscar
+    otra. La memoria de cada sesión es una estimación (ver estimate_game_bytes)
+    que se actualiza al liberar la sesión después de cada petición.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, ttl_seconds: float = DEFAULT_TTL_SECONDS,
+                 max_memory_bytes: int = DEFAULT_MAX_MEMORY_BYTES, tt_size: int = SESSION_TT_SIZE,
+                 opening_book: Optional[str] = None, ponder: bool = False):
+        if capacity <= 0:
+            raise ValueError("La capacidad del store debe ser positiva")
+        self.capacity = capacity
+        self.ttl_seconds = ttl_seconds
+        self.max_memory_bytes = max_memory_bytes
+        self.tt_size = tt_size
+        self.opening_book = opening_book
+        self.ponder = ponder
+        self._sessions = OrderedDict()  # id -> GameSession, la menos usada primero
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self.evictions = {"capacity": 0, "ttl": 0, "memory": 0}
+
+    def create(self) -> GameSession:
+        """Crea una partida vacía (sin iniciar) y la registra"""
+        session = GameSession(GameApp(tt_size=self.tt_size, opening_book=self.opening_book, ponder=self.ponder))
+        with self._lock:
+            self._evict_expired(time.monotonic())
+            self._sessions[session.id] = session
+            self._memory_bytes += session.memory_bytes
+            self._evict_over_limits(keep=session.id)
+        return session
+
+    def get(self, game_id: Optional[str]) -> Optional[GameSession]:
+        """Busca una partida y la marca como usada; None si no existe o expiró"""
+        now = time.monotonic()
+        with self._lock:
+            self._evict_expired(now)
+            session = self._sessions.get(game_id)
+            if session is not None:
+                session.last_access = now
+                self._sessions.move_to_end(game_id)
+            return session
+
+    def release(self, session: GameSession):
+        """Actualiza la memoria estimada de una sesión después de usarla"""
+        memory_bytes = estimate_game_bytes(session.game)
+        with self._lock:
+            if self._sessions.get(session.id) is session:
+                self._memory_bytes += memory_bytes - session.memory_bytes
+                session.memory_bytes = memory_bytes
+                self._evict_over_limits(keep=session.id)
+
+    def remove(self, game_id: str) -> bool:
+        with self._lock:
+            session = self._sessions.pop(game_id, None)
+            if session is None:
+                return False
+            self._memory_bytes -= session.memory_bytes
+        session.game.close(wait=False)
+        return True
+
+    def _evict_expired(self, now: float):
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if now - session.last_access < self.ttl_seconds:
+                break
+            self._discard(session, "ttl")
+
+    def _evict_over_limits(self, keep: str):
+        """Descarta las sesiones menos usadas mientras se supere la capacidad o la memoria"""
+        for session in list(self._sessions.values()):
+            if len(self._sessions) > self.capacity:
+                reason = "capacity"
+            elif self._memory_bytes > self.max_memory_bytes:
+                reason = "memory"
+            else:
+                break
+            if session.id != keep:
+                self._discard(session, reason)
+
+    def _discard(self, session: GameSession, reason: str):
+        del self._sessions[session.id]
+        self._memory_bytes -= session.memory_bytes
+        self.evictions[reason] += 1
+        session.game.close(wait=False)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def stats(self) -> dict:
+        """Sesiones activas, memoria estimada y desalojos por motivo"""
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "capacity": self.capacity,
+                "ttl_seconds": self.ttl_seconds,
+                "memory_bytes": self._memory_bytes,
+                "max_memory_bytes": self.max_memory_bytes,
+                "evictions": dict(self.evictions),
+            }
@@ -0,0 +1,227 @@
+import math
+import random
+import time
+from typing import List, Optional, Tuple
+from board import Board
+from cancellation import CancellationToken
+
+# Rollouts por nivel de dificultad cuando no se indica playouts ni tiempo límite
+PLAYOUTS_PER_LEVEL = 200
+DEFAULT_EXPLORATION = math.sqrt(2)
+# Jugadas de cada rollout antes de valorar la posición por la diferencia de puntos
+DEFAULT_ROLLOUT_LIMIT = 30
+# Diferencia de puntos que vale casi una victoria al cortar un rollout
+ROLLOUT_SCORE_SCALE = 10.0
+
+
+class Node:
+    """Nodo del árbol: la posición después de `move`, jugado por `mover_is_white`"""
+
+    __slots__ = ('move', 'parent', 'mover_is_white', 'key', 'children', 'untried', 'visits', 'value')
+
+    def __init__(self, move, parent: Optional['Node'], mover_is_white: bool, key: Tuple[int, int]):
+        self.move = move
+        self.parent = parent
+        self.mover_is_white = mover_is_white
+        self.key = key  # (hash Zobrist, movimientos jugados) de la posición, para reutilizar el árbol
+        self.children: List['Node'] = []
+        self.untried = None  # Movimientos sin expandir; None hasta que se visita el nodo
+        self.visits = 0
+        self.value = 0.0  # Suma de recompensas desde el punto de vista de mover_is_white
+
+
+class MCTSPlayer:
+    """Jugador por búsqueda de árbol Monte Carlo (UCT) con la interfaz de MinimaxPlayer.
+
+    Cada iteración baja por el árbol eligiendo el hijo con mayor UCT, expande
+    un movimiento nuevo (primero las capturas) y juega un rollout con una
+    política barata: capturar el punto de más valor, si no tomar un
+    multiplicador cuando no tiene uno, si no un salto al azar. El rollout se
+    corta a las rollout_limit jugadas y se valora por la diferencia de puntos.
+
+    El presupuesto es time_limit_ms por jugada o, si no, `playouts` rollouts
+    (por defecto depth * PLAYOUTS_PER_LEVEL, así los niveles de dificultad
+    también sirven para este motor). Entre turnos se conserva el subárbol de la
+    posición a la que se llegó. utility_function solo se guarda por
+    compatibilidad: la recompensa es el resultado de la partida.
+    """
+
+    def __init__(self, depth: int, utility_function: int = 1, playouts: Optional[int] = None,
+                 time_limit_ms: Optional[int] = None, exploration: float = DEFAULT_EXPLORATION,
+                 rollout_limit: int = DEFAULT_ROLLOUT_LIMIT, seed: Optional[int] = 0):
+        self.depth = depth
+        self.utility_function = utility_function
+        self.playouts = playouts
+        self.time_limit_ms = time_limit_ms
+        self.exploration = exploration
+        self.rollout_limit = rollout_limit
+        self.MAX_MOVES = 150
+        self.rng = random.Random(seed)
+        self.root = None
+        self.transposition_table = None
+        self.collect_stats = False
+        self.last_stats = None
+        self.last_search_depth = 0
+        self.last_rollouts = 0
+        self.last_elapsed = 0.0
+        self.reused_visits = 0
+
+    @staticmethod
+    def position_key(board: Board) -> Tuple[int, int]:
+        return board.zobrist_hash, board.moves_count
+
+    def _find_root(self, board: Board, is_white: bool) -> Node:
+        """Subárbol de la posición actual si la jugada anterior del árbol llegó a ella, o un nodo nuevo"""
+        key = self.position_key(board)
+        root = self.root
+        if root is not None:
+            for node in root.children + [root]:
+                # El nodo debe ser una posición en la que le toca mover a este jugador
+                if node.key == key and node.mover_is_white != is_white:
+                    node.parent = None
+                    return node
+        return Node(None, None, not is_white, key)
+
+    def _moves(self, board: Board, is_white: bool) -> list:
+        """Movimientos del jugador, capturas primero; [None] si no puede mover (pasa el turno)"""
+        moves = board.get_valid_moves(board.white_horse if is_white else board.black_horse)
+        if not moves:
+            return [None]
+        moves.sort(key=lambda move: -board.points.get(move, 0) - (move in board.multipliers))
+        return moves
+
+    def _rollout_move(self, board: Board, is_white: bool):
+        moves = board.get_valid_moves(board.white_horse if is_white else board.black_horse)
+        if not moves:
+            return None
+        points = board.points
+        best, best_value = None, 0
+        for move in moves:
+            value = points.get(move, 0)
+            if value > best_value:
+                best, best_value = move, value
+        if best is not None:
+            return best
+        has_multiplier = board.white_multiplier if is_white else board.black_multiplier
+        if not has_multiplier:
+            for move in moves:
+                if move in board.multipliers:
+                    return move
+        return moves[self.rng.randrange(len(moves))]
+
+    def _reward(self, board: Board) -> float:
+        """Recompensa del blanco en [0, 1]"""
+        diff = board.white_score - board.black_score
+        if board.is_game_over():
+            return 1.0 if diff > 0 else 0.0 if diff < 0 else 0.5
+        return 0.5 + 0.5 * math.tanh(diff / ROLLOUT_SCORE_SCALE)
+
+    def _iterate(self, board: Board, root: Node, is_white: bool):
+        """Una iteración: selección, expansión, rollout y propagación; deja el tablero como estaba"""
+        node = root
+        to_move = is_white
+        applied = 0
+        exploration = self.exploration
+        # Selección
+        while node.untried is not None and not node.untried and node.children:
+            log_visits = math.log(node.visits)
+            best, best_uct = None, -1.0
+            for child in node.children:
+                uct = child.value / child.visits + exploration * math.sqrt(log_visits / child.visits)
+                if uct > best_uct:
+                    best, best_uct = child, uct
+            node = best
+            if node.move is not None:
+                board.make_move(node.move, to_move)
+                applied += 1
+            to_move = not to_move
+
+        # Expansión
+        if not board.is_game_over():
+            if node.untried is None:
+                node.untried = self._moves(board, to_move)
+                node.untried.reverse()  # Se expande desde el final: las capturas salen primero
+            if node.untried:
+                move = node.untried.pop()
+                if move is not None:
+                    board.make_move(move, to_move)
+                    applied += 1
+                child = Node(move, node, to_move, self.position_key(board))
+                node.children.append(child)
+                node = child
+                to_move = not to_move
+
+        # Rollout
+        rollout = 0
+        while rollout < self.rollout_limit and not board.is_game_over():
+            move = self._rollout_move(board, to_move)
+            if move is not None:
+                board.make_move(move, to_move)
+                applied += 1
+            to_move = not to_move
+            rollout += 1
+        reward = self._reward(board)
+        for _ in range(applied):
+            board.unmake_move()
+
+        # Propagación
+        while node is not None:
+            node.visits += 1
+            node.value += reward if node.mover_is_white else 1.0 - reward
+            node = node.parent
+
+    def make_move(self, board: Board, is_white: bool,
+                  token: Optional[CancellationToken] = None) -> Optional[Tuple[int, int]]:
+        """Elige el movimiento más visitado después de gastar el presupuesto de rollouts o de tiempo.
+
+        Con token, se detiene al cancelarse y devuelve la mejor jugada hasta ese
+        momento (siempre hace al menos un rollout por movimiento de la raíz).
+        """
+        if board.moves_count >= self.MAX_MOVES or board.is_game_over():
+            self.root = None
+            return None
+        root = self._find_root(board, is_white)
+        self.reused_visits = root.visits
+        start = time.perf_counter()
+        deadline = start + self.time_limit_ms / 1000 if self.time_limit_ms else None
+        playouts = self.playouts or self.depth * PLAYOUTS_PER_LEVEL
+        rollouts = 0
+        while True:
+            self._iterate(board, root, is_white)
+            rollouts += 1
+            if root.untried:
+                continue  # Primero un rollout por cada movimiento de la raíz
+            if deadline is not None:
+                if rollouts % 16 == 0 and time.perf_counter() >= deadline:
+                    break
+            elif rollouts >= playouts:
+                break
+            if token is not None and rollouts % 16 == 0 and token.cancelled:
+                break
+        self.last_rollouts = rollouts
+        self.last_elapsed = time.perf_counter() - start
+
+        if not root.children:
+            self.root = None
+            return None
+        best = max(root.children, key=lambda child: child.visits)
+        # Reutilización: la próxima búsqueda empieza desde las respuestas del rival a esta jugada
+        best.parent = None
+        self.root = best
+        self.last_search_depth = self._tree_depth(best) + 1
+        return best.move
+
+    @staticmethod
+    def _tree_depth(node: Node) -> int:
+        """Profundidad de la variante más visitada, como referencia de last_search_depth"""
+        depth = 0
+        while node.children:
+            node = max(node.children, key=lambda child: child.visits)
+            depth += 1
+        return depth
+
+    def rollouts_per_second(self) -> float:
+        return self.last_rollouts / self.last_elapsed if self.last_elapsed else 0.0
+
+    def close(self):
+        self.root = None
@@ -0,0 +1,178 @@
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Sequence, Tuple
+
+# Límites (segundos) de los histogramas de latencia: de 1 ms a 30 s
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Tuple[str, str] = None) -> str:
+    pairs = list(zip(names, values))
+    if extra is not None:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(str(value))}"' for name, value in pairs) + '}'
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric:
+    """Métrica con etiquetas: un valor por combinación de valores de las etiquetas"""
+
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._values = {}  # valores de las etiquetas -> estado de la serie
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"{self.name} espera las etiquetas {self.label_names}, no {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(f"{name}{labels} {_format_value(value)}" for name, labels, value in self.samples())
+        return '\n'.join(lines)
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [(self.name, _format_labels(self.label_names, key), value) for key, value in items]
+
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(Metric):
+    """Histograma acumulativo: conteo por límite superior, suma y cantidad de observaciones"""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [[0] * len(self.buckets), 0.0]
+            counts = series[0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            series[1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observa la duración del bloque en segundos"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self):
+        with self._lock:
+            items = sorted((key, (list(counts), total)) for key, (counts, total) in self._values.items())
+        samples = []
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                samples.append((f"{self.name}_bucket",
+                                _format_labels(self.label_names, key, ('le', _format_value(bound))), cumulative))
+            labels = _format_labels(self.label_names, key)
+            samples.append((f"{self.name}_sum", labels, total))
+            samples.append((f"{self.name}_count", labels, cumulative))
+        return samples
+
+
+class Registry:
+    """Conjunto de métricas que se exportan juntas en el formato de texto de Prometheus"""
+
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"La métrica {metric.name} ya está registrada")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, label_names))
+
+    def gauge(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, label_names))
+
+    def histogram(self, name: str, documentation: str, label_names: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, label_names, buckets))
+
+    def render(self) -> str:
+        return '\n'.join(metric.render() for metric in self._metrics.values()) + '\n'
+
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Métricas del proceso, compartidas por la API y la lógica del juego
+REGISTRY = Registry()
+REQUEST_LATENCY = REGISTRY.histogram('smarthorses_http_request_duration_seconds',
+                                     'Latencia de las peticiones HTTP hasta entregar la respuesta',
+                                     ('method', 'endpoint'))
+REQUESTS = REGISTRY.counter('smarthorses_http_requests_total', 'Peticiones HTTP atendidas',
+                            ('method', 'endpoint', 'status'))
+REQUEST_ERRORS = REGISTRY.counter('smarthorses_http_request_errors_total',
+                                  'Peticiones que terminaron con un error del servidor (5xx o excepción)',
+                                  ('method', 'endpoint'))
+IN_FLIGHT = REGISTRY.gauge('smarthorses_http_requests_in_flight', 'Peticiones HTTP en curso', ('endpoint',))
+AI_MOVE_LATENCY = REGISTRY.histogram('smarthorses_ai_move_seconds',
+                                     'Tiempo de búsqueda (MinimaxPlayer.make_move) de cada jugada de la IA',
+                                     ('difficulty',))
+PONDER_LOOKUPS = REGISTRY.counter('smarthorses_ponder_lookups_total',
+                                  'Jugadas de la IA que encontraron (hit) o no (miss) su respuesta ya pensada',
+                                  ('result',))
+GAME_STATE_LATENCY = REGISTRY.histogram('smarthorses_game_state_seconds',
+                                        'Tiempo de serialización del estado en GameApp.get_game_state',
+                                        buckets=(0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+                                                 0.001, 0.0025, 0.005, 0.01))
@@ -1,21 +1,155 @@
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
 from typing import List, Tuple, Optional
 from board import Board
+import zobrist
+from transposition_table import TranspositionTable, DEFAULT_TT_SIZE, EXACT, LOWER_BOUND, UPPER_BOUND
+from move_ordering import MoveOrderer
+from batch_eval import BatchEvaluator
+from search_stats import SearchStats
+from cancellation import CancellationToken, SearchCancelled
+import distances
+
+class SearchTimeout(Exception):
+    """Se lanza dentro de minimax cuando se agota el tiempo de la búsqueda"""
+
+
+def _search_root_child(config: dict, board: Board, move: Tuple[int, int], is_white: bool,
+                       alpha: float, token: Optional[CancellationToken] = None,
+                       deadline: Optional[float] = None) -> float:
+    """Busca en un proceso del pool el subárbol de un movimiento de la raíz.
+
+    Se crea un jugador nuevo por tarea para que el resultado solo dependa de
+    los argumentos y no del orden en que el pool reparte el trabajo. La búsqueda
+    se cancela con token (en este proceso) o al llegar a deadline, una hora de
+    time.time() que sirve entre procesos; en ambos casos lanza SearchCancelled.
+    """
+    player = MinimaxPlayer(**config)
+    if deadline is not None:
+        token = CancellationToken(max(0.0, deadline - time.time()) * 1000)
+    if token is not None:
+        player._token = token
+        player._deadline = float('inf')  # Sin plazo propio: solo activa la consulta del token
+    board.make_move(move, is_white)
+    score, _ = player.search(board, config['depth'] - 1, alpha, float('inf'), False, is_white, 1)
+    return score
+
 
 class MinimaxPlayer:
-    def __init__(self, depth: int, utility_function: int):
-        """Inicializa el jugador Minimax con una profundidad y una función de utilidad"""
+    # Cada cuántos nodos se consulta el reloj durante una búsqueda con tiempo límite
+    TIME_CHECK_INTERVAL = 256
+    # Cada cuántos segundos parallel_search consulta el token mientras espera a los procesos
+    CANCEL_POLL_SECONDS = 0.05
+    # Las tablas de finales ignoran el límite de movimientos: no se consultan cerca de él
+    TABLEBASE_MIN_MOVES_LEFT = 20
+    # Peso de la diferencia de puntos en cada función de utilidad, para expresar los resultados exactos
+    SCORE_WEIGHTS = {1: 10.0, 2: 8.0}
+    # Ancho de la ventana nula de PVS: las funciones de utilidad varían de a 0.5 como mínimo
+    NULL_WINDOW = 0.01
+    # Reducción de jugadas tardías: a partir del movimiento LMR_FULL_DEPTH_MOVES de un nodo
+    # con al menos LMR_MIN_DEPTH niveles por delante, las jugadas tranquilas se buscan
+    # LMR_REDUCTION niveles menos
+    LMR_FULL_DEPTH_MOVES = 3
+    LMR_MIN_DEPTH = 3
+    LMR_REDUCTION = 1
+    # Semiancho sugerido de la ventana de aspiración: un punto de diferencia vale 8-10
+    DEFAULT_ASPIRATION_WINDOW = 20.0
+    # Tope sugerido de nodos de quiescencia por hoja
+    DEFAULT_QUIESCENCE_NODES = 32
+
+    def __init__(self, depth: int, utility_function: int, tt_size: int = DEFAULT_TT_SIZE,
+                 time_limit_ms: Optional[int] = None, move_ordering: bool = True,
+                 distance_metric: str = 'manhattan', workers: int = 1,
+                 batch_leaves: bool = False, batch_min_size: int = 8,
+                 opening_book: Optional[str] = None, tablebase_k: int = 0,
+                 collect_stats: bool = False, negamax: bool = False, pvs: bool = False,
+                 aspiration_window: float = 0.0, lmr: bool = False, quiescence_nodes: int = 0):
+        """Inicializa el jugador Minimax con una profundidad y una función de utilidad.
+
+        Salvo que se indique, las opciones no cambian el movimiento elegido a
+        profundidad fija, solo el costo de la búsqueda (ver README, "Opciones de la IA"):
+        - tt_size: entradas de la tabla de transposición (ver position_key); 0 la desactiva.
+        - time_limit_ms: profundización iterativa hasta `depth` dentro de ese tiempo.
+        - move_ordering: capturas, jugadas asesinas e historial en los nodos internos.
+        - distance_metric: 'manhattan' (la original) o 'knight'; cambia la evaluación.
+        - workers > 1: reparte los hijos de la raíz en un pool (ver parallel_search).
+        - batch_leaves, batch_min_size: evaluación vectorizada de hojas (ver batch_eval).
+        - opening_book: ruta de un libro de aperturas (ver opening_book.OpeningBook).
+        - tablebase_k: tablas de finales exactas con hasta k objetivos; cambia el resultado.
+        - collect_stats: deja en last_stats un SearchStats de cada make_move.
+        - negamax, pvs, aspiration_window: otras formulaciones de la poda (ver negamax).
+        - lmr: reducción de jugadas tardías; cambia el resultado.
+        - quiescence_nodes: nodos de quiescencia por hoja (ver quiescence); cambia el resultado.
+        """
+        if distance_metric not in distances.METRICS:
+            raise ValueError(f"Métrica de distancia desconocida: {distance_metric}")
         self.depth = depth
         self.utility_function = utility_function
         self.MAX_MOVES = 150
+        self.transposition_table = TranspositionTable(tt_size) if tt_size > 0 else None
+        self.time_limit_ms = time_limit_ms
+        self.last_search_depth = 0
+        self.last_score = None  # Puntaje de la última make_move desde el punto de vista del que mueve
+        self._deadline = None
+        self._node_counter = 0
+        self._token = None  # CancellationToken de la búsqueda en curso
+        self._pv = []
+        self._follow_pv = False
+        self.move_orderer = MoveOrderer() if move_ordering else None
+        self.metric = distances.METRICS[distance_metric]
+        self.workers = workers
+        self._executor = None
+        self.batch_evaluator = BatchEvaluator(utility_function, self.metric) if batch_leaves else None
+        self.batch_min_size = batch_min_size
+        self.opening_book_path = opening_book
+        self._opening_book = None
+        self.collect_stats = collect_stats
+        self.stats = None  # SearchStats de la búsqueda en curso, solo con collect_stats
+        self.last_stats = None
+        self.pvs = pvs
+        self.lmr = lmr
+        self.use_negamax = negamax or pvs or lmr
+        self.aspiration_window = aspiration_window
+        self.quiescence_nodes = quiescence_nodes
+        self._quiescence_budget = 0
+        self.tablebase = None
+        if tablebase_k > 0:
+            from tablebase import Tablebase
+            self.tablebase = Tablebase(tablebase_k)
+        # Parámetros para reconstruir el jugador en los procesos del pool
+        self._config = {
+            'depth': depth, 'utility_function': utility_function, 'tt_size': tt_size,
+            'move_ordering': move_ordering, 'distance_metric': distance_metric,
+            'batch_leaves': batch_leaves, 'batch_min_size': batch_min_size, 'tablebase_k': tablebase_k,
+            'negamax': negamax, 'pvs': pvs, 'lmr': lmr, 'quiescence_nodes': quiescence_nodes,
+        }
+
+    def position_key(self, board: Board, mover_is_white: bool, is_white: bool) -> int:
+        """Clave de la tabla de transposición: posición, jugador que mueve y perspectiva de la búsqueda.
+
+        Incluye el historial de posiciones y la cantidad de jugadas, de las que
+        dependen detect_cycle, la penalización por repetición y el fin de la
+        partida: una entrada solo se reutiliza donde la búsqueda daría lo mismo.
+        """
+        key = board.zobrist_hash ^ board.position_history.key ^ zobrist.moves_count_key(board.moves_count)
+        if board.white_to_move != mover_is_white:
+            key ^= zobrist.BLACK_TO_MOVE_KEY
+        if not is_white:
+            key ^= zobrist.BLACK_PERSPECTIVE_KEY
+        return key
+
+    def transposition_stats(self) -> dict:
+        """Aciertos y fallos de la tabla de transposición"""
+        if self.transposition_table is None:
+            return {}
+        return self.transposition_table.stats()
     
     def detect_cycle(self, board: Board, position: Tuple[int, int], is_white: bool) -> bool:
         """Detecta si un movimiento podría crear un ciclo"""
         if len(board.position_history) < 4:
             return False
         
-        recent_moves = [(pos, player) for pos, player in board.position_history[-4:] 
-                        if player == is_white]
-        return position in [pos for pos, _ in recent_moves]
+        return board.position_history.contains_recent(position, is_white, 4)
 
     def get_valid_moves(self, board: Board, is_white: bool) -> List[Tuple[int, int]]:
         """Obtiene movimientos válidos priorizando puntos y evitando ciclos"""
@@ -31,7 +165,10 @@ class MinimaxPlayer:
                 point_moves.append(move)
             elif move in board.multipliers:
                 multiplier_moves.append(move)
-            elif not self.detect_cycle(board, move, is_white):
+            elif self.detect_cycle(board, move, is_white):
+                if self.stats is not None:
+                    self.stats.cycle_filter_hits += 1
+            else:
                 other_moves.append(move)
         
         if point_moves:
@@ -44,28 +181,20 @@ class MinimaxPlayer:
 
     def utility_function_1(self, board: Board, is_white: bool) -> float:
         """Primera función de utilidad: prioriza diferencia de puntos y distancia"""
-        my_pos = board.white_horse if is_white else board.black_horse
         my_score = board.white_score if is_white else board.black_score
         opp_score = board.black_score if is_white else board.white_score
         my_multiplier = board.white_multiplier if is_white else board.black_multiplier
-        
-        min_distance = float('inf')
-        max_point_value = 0
-        for point_pos, value in board.points.items():
-            distance = abs(my_pos[0] - point_pos[0]) + abs(my_pos[1] - point_pos[1])
-            if distance < min_distance:
-                min_distance = distance
-                max_point_value = value
+
+        # Punto más cercano, mantenido por make_move para cada caballo
+        min_distance, max_point_value, _ = board.targets[0 if is_white else 1][self.metric]
         
         score_diff = my_score - opp_score
-        distance_factor = -min_distance if min_distance != float('inf') else 0
+        distance_factor = -min_distance if min_distance is not None else 0
         point_value_factor = max_point_value * (2 if my_multiplier else 1)
         
         repetition_penalty = 0
-        if len(board.position_history) >= 4:
-            recent_positions = [pos for pos, player in board.position_history[-12:] if player == is_white]
-            if len(set(recent_positions)) < len(recent_positions):
-                repetition_penalty = -5.0
+        if len(board.position_history) >= 4 and board.position_history.has_repetition(is_white):
+            repetition_penalty = -5.0
 
         return (
             score_diff * 10.0 +
@@ -77,37 +206,23 @@ class MinimaxPlayer:
     
     def utility_function_2(self, board: Board, is_white: bool) -> float:
         """Segunda función de utilidad: prioriza multiplicadores y penaliza más los ciclos"""
-        my_pos = board.white_horse if is_white else board.black_horse
         my_score = board.white_score if is_white else board.black_score
         opp_score = board.black_score if is_white else board.white_score
         my_multiplier = board.white_multiplier if is_white else board.black_multiplier
-        
-        min_distance = float('inf')
-        max_point_value = 0
-        for point_pos, value in board.points.items():
-            distance = abs(my_pos[0] - point_pos[0]) + abs(my_pos[1] - point_pos[1])
-            if distance < min_distance:
-                min_distance = distance
-                max_point_value = value
-
-        if board.multipliers:
-            min_distance_to_multiplier = float('inf')
-            for mult_pos in board.multipliers:
-                distance = abs(my_pos[0] - mult_pos[0]) + abs(my_pos[1] - mult_pos[1])
-                min_distance_to_multiplier = min(min_distance_to_multiplier, distance)
-        else:
+
+        # Punto y multiplicador más cercanos, mantenidos por make_move para cada caballo
+        min_distance, max_point_value, min_distance_to_multiplier = \
+            board.targets[0 if is_white else 1][self.metric]
+        if min_distance_to_multiplier is None:
             min_distance_to_multiplier = 0
 
         score_diff = my_score - opp_score
-        distance_factor = -min_distance if min_distance != float('inf') else 0
+        distance_factor = -min_distance if min_distance is not None else 0
         point_value_factor = max_point_value * (2 if my_multiplier else 1)
         
         repetition_penalty = 0
-        if len(board.position_history) >= 8:
-            recent_positions = [pos for pos, player in board.position_history[-12:] 
-                                if player == (not is_white)]
-            if len(set(recent_positions)) < len(recent_positions):
-                repetition_penalty = -10.0
+        if len(board.position_history) >= 8 and board.position_history.has_repetition(not is_white):
+            repetition_penalty = -10.0
 
         return (
             score_diff * 8.0 +
@@ -126,49 +241,606 @@ class MinimaxPlayer:
             return self.utility_function_2(board, is_white)
         return 0
     
+    def exact_score(self, board: Board, is_white: bool, remaining_diff: int = 0) -> float:
+        """Resultado exacto de la partida desde is_white, en la escala de las tablas de finales.
+
+        remaining_diff es la diferencia de puntos (blanco - negro) que todavía se
+        va a sumar; 0 en una posición terminal.
+        """
+        final_diff = board.white_score - board.black_score + remaining_diff
+        return (final_diff if is_white else -final_diff) * self.SCORE_WEIGHTS.get(self.utility_function, 1.0)
+
+    def leaf_score(self, board: Board, is_white: bool) -> float:
+        """Puntaje de una hoja de la búsqueda.
+
+        Con tablas de finales, las posiciones terminales se puntúan con el
+        resultado exacto, igual que los aciertos de las tablas; si no, ambas
+        hojas quedarían en escalas distintas (la evaluación heurística suma los
+        bonos de multiplicador) y la búsqueda podría preferir una línea peor solo
+        por cómo termina.
+        """
+        if self.tablebase is not None and (board.is_game_over() or board.moves_count >= self.MAX_MOVES):
+            return self.exact_score(board, is_white)
+        return self.evaluate_board(board, is_white)
+
     def minimax(self, board: Board, depth: int, alpha: float, beta: float, 
-                is_maximizing: bool, is_white: bool) -> Tuple[float, Optional[Tuple[int, int]]]:
+                is_maximizing: bool, is_white: bool, ply: int = 0) -> Tuple[float, Optional[Tuple[int, int]]]:
         """Implementa el algoritmo Minimax con poda alfa-beta"""
+        if self._deadline is not None:
+            self._node_counter += 1
+            if self._node_counter % self.TIME_CHECK_INTERVAL == 0:
+                if self._token is not None and self._token.cancelled:
+                    raise SearchCancelled()
+                if time.perf_counter() >= self._deadline:
+                    raise SearchTimeout()
+        stats = self.stats
+        if stats is not None:
+            stats.visit(ply)
+
+        mover = is_white if is_maximizing else not is_white
+        if self.tablebase is not None and ply > 0 and \
+                self.MAX_MOVES - board.moves_count >= self.TABLEBASE_MIN_MOVES_LEFT:
+            remaining_diff = self.tablebase.probe(board, mover)
+            if remaining_diff is not None:
+                return self.exact_score(board, is_white, remaining_diff), None
+
+        if depth == 0 and self.quiescence_nodes > 0:
+            self._quiescence_budget = self.quiescence_nodes
+            return self.quiescence(board, alpha, beta, is_maximizing, is_white, ply), None
         if depth == 0 or board.is_game_over() or board.moves_count >= self.MAX_MOVES:
-            return self.evaluate_board(board, is_white), None
-        
-        valid_moves = self.get_valid_moves(board, is_white if is_maximizing else not is_white)
+            if stats is not None:
+                stats.leaf_evaluations += 1
+            return self.leaf_score(board, is_white), None
+
+        tt = self.transposition_table
+        tt_move = None
+        if tt is not None:
+            key = self.position_key(board, mover, is_white)
+            entry = tt.probe(key)
+            if entry is not None:
+                entry_depth, flag, entry_score, tt_move = entry
+                # La raíz siempre se busca: la entrada pudo guardarse con otro historial
+                if ply > 0 and entry_depth >= depth and (
+                        flag == EXACT or
+                        (flag == LOWER_BOUND and entry_score >= beta) or
+                        (flag == UPPER_BOUND and entry_score <= alpha)):
+                    return entry_score, tt_move
+            alpha_orig, beta_orig = alpha, beta
+
+        valid_moves = self.get_valid_moves(board, mover)
         
         if not valid_moves:
+            if stats is not None:
+                stats.leaf_evaluations += 1
             return self.evaluate_board(board, is_white), None
+        if stats is not None:
+            stats.expanded_nodes += 1
+
+        if self.move_orderer is not None and ply > 0:
+            valid_moves = self.move_orderer.order(board, valid_moves, mover, ply)
+
+        # Primero la variante principal de la iteración anterior y luego el mejor movimiento guardado
+        pv_move = None
+        if self._follow_pv:
+            if ply < len(self._pv) and self._pv[ply] in valid_moves:
+                pv_move = self._pv[ply]
+            else:
+                self._follow_pv = False
+        # En la raíz el movimiento de la tabla no se adelanta: entre movimientos de igual
+        # puntaje gana el primero en el orden de generación, como sin tabla
+        for first_move in (tt_move if ply > 0 else None, pv_move):
+            if first_move is not None and first_move in valid_moves and valid_moves[0] != first_move:
+                valid_moves = [first_move] + [move for move in valid_moves if move != first_move]
+
+        # En la frontera los hijos son hojas: se evalúan todos juntos y se recorren igual que en el bucle
+        leaf_scores = None
+        # Con quiescencia o tablas de finales las hojas no se puntúan con la evaluación heurística sola
+        if depth == 1 and self.batch_evaluator is not None and not self.quiescence_nodes and \
+                self.tablebase is None and len(valid_moves) >= self.batch_min_size:
+            leaf_scores = self.batch_evaluator.evaluate_children(board, valid_moves, mover, is_white).tolist()
+            if stats is not None:
+                stats.leaf_evaluations += len(valid_moves)
         
         best_move = None
         if is_maximizing:
-            max_eval = float('-inf')
-            for move in valid_moves:
-                board_copy = board.clone()
-                board_copy.make_move(move, is_white)
-                eval_score, _ = self.minimax(board_copy, depth - 1, alpha, beta, False, is_white)
-                if eval_score > max_eval:
-                    max_eval = eval_score
+            best_eval = float('-inf')
+            for index, move in enumerate(valid_moves):
+                if leaf_scores is not None:
+                    eval_score = leaf_scores[index]
+                    if stats is not None:
+                        stats.visit(ply + 1)
+                else:
+                    board.make_move(move, is_white)
+                    eval_score, _ = self.minimax(board, depth - 1, alpha, beta, False, is_white, ply + 1)
+                    board.unmake_move()
+                self._follow_pv = False
+                if eval_score > best_eval:
+                    best_eval = eval_score
                     best_move = move
                 alpha = max(alpha, eval_score)
                 if beta <= alpha:
+                    if stats is not None:
+                        stats.cutoff(index)
+                    if self.move_orderer is not None:
+                        self.move_orderer.record_cutoff(board, move, mover, ply, depth)
                     break
-            return max_eval, best_move
         else:
-            min_eval = float('inf')
-            for move in valid_moves:
-                board_copy = board.clone()
-                board_copy.make_move(move, not is_white)
-                eval_score, _ = self.minimax(board_copy, depth - 1, alpha, beta, True, is_white)
-                if eval_score < min_eval:
-                    min_eval = eval_score
+            best_eval = float('inf')
+            for index, move in enumerate(valid_moves):
+                if leaf_scores is not None:
+                    eval_score = leaf_scores[index]
+                    if stats is not None:
+                        stats.visit(ply + 1)
+                else:
+                    board.make_move(move, not is_white)
+                    eval_score, _ = self.minimax(board, depth - 1, alpha, beta, True, is_white, ply + 1)
+                    board.unmake_move()
+                self._follow_pv = False
+                if eval_score < best_eval:
+                    best_eval = eval_score
                     best_move = move
                 beta = min(beta, eval_score)
                 if beta <= alpha:
+                    if stats is not None:
+                        stats.cutoff(index)
+                    if self.move_orderer is not None:
+                        self.move_orderer.record_cutoff(board, move, mover, ply, depth)
                     break
-            return min_eval, best_move
+
+        if tt is not None:
+            if best_eval <= alpha_orig:
+                flag = UPPER_BOUND
+            elif best_eval >= beta_orig:
+                flag = LOWER_BOUND
+            else:
+                flag = EXACT
+            tt.store(key, depth, flag, best_eval, best_move)
+        return best_eval, best_move
     
-    def make_move(self, board: Board, is_white: bool) -> Optional[Tuple[int, int]]:
-        """Determina el mejor movimiento para el jugador"""
+    def quiescence(self, board: Board, alpha: float, beta: float, is_maximizing: bool, is_white: bool,
+                   ply: int) -> float:
+        """Extiende una hoja con las capturas pendientes hasta que la posición queda tranquila.
+
+        Solo se juegan movimientos a casillas con puntos o multiplicador. El
+        jugador que mueve puede quedarse con la evaluación estática (stand pat)
+        si ninguna captura la mejora. Cada hoja de la búsqueda principal gasta
+        como mucho quiescence_nodes nodos; al agotarlos se devuelve la evaluación
+        estática. El puntaje es desde is_white, como en minimax.
+        """
+        stats = self.stats
+        if stats is not None:
+            stats.leaf_evaluations += 1
+        stand_pat = self.leaf_score(board, is_white)
+        if self._quiescence_budget <= 0 or board.is_game_over() or board.moves_count >= self.MAX_MOVES:
+            return stand_pat
+        if is_maximizing:
+            if stand_pat >= beta:
+                return stand_pat
+            alpha = max(alpha, stand_pat)
+        else:
+            if stand_pat <= alpha:
+                return stand_pat
+            beta = min(beta, stand_pat)
+
+        mover = is_white if is_maximizing else not is_white
+        points, multipliers = board.points, board.multipliers
+        captures = [move for move in board.get_valid_moves(board.white_horse if mover else board.black_horse)
+                    if move in points or move in multipliers]
+        captures.sort(key=lambda move: -points.get(move, 0))
+
+        best_eval = stand_pat
+        for move in captures:
+            if self._quiescence_budget <= 0:
+                break
+            self._quiescence_budget -= 1
+            if stats is not None:
+                stats.visit(ply + 1)
+            board.make_move(move, mover)
+            eval_score = self.quiescence(board, alpha, beta, not is_maximizing, is_white, ply + 1)
+            board.unmake_move()
+            if is_maximizing:
+                best_eval = max(best_eval, eval_score)
+                alpha = max(alpha, eval_score)
+            else:
+                best_eval = min(best_eval, eval_score)
+                beta = min(beta, eval_score)
+            if beta <= alpha:
+                break
+        return best_eval
+
+    def search(self, board: Board, depth: int, alpha: float, beta: float,
+               is_maximizing: bool, is_white: bool, ply: int = 0) -> Tuple[float, Optional[Tuple[int, int]]]:
+        """minimax o negamax según la configuración; ventana y puntaje siempre desde el punto de vista de is_white"""
+        if not self.use_negamax:
+            return self.minimax(board, depth, alpha, beta, is_maximizing, is_white, ply)
+        if is_maximizing:
+            return self.negamax(board, depth, alpha, beta, True, is_white, ply)
+        score, move = self.negamax(board, depth, -beta, -alpha, False, is_white, ply)
+        return -score, move
+
+    def negamax(self, board: Board, depth: int, alpha: float, beta: float,
+                is_maximizing: bool, is_white: bool, ply: int = 0) -> Tuple[float, Optional[Tuple[int, int]]]:
+        """Alfa-beta en formulación negamax, con PVS y reducción de jugadas tardías opcionales.
+
+        El puntaje, alfa y beta están desde el punto de vista del jugador que mueve:
+        evaluate_board(board, is_white) si is_maximizing y su opuesto si no. La tabla
+        de transposición guarda los puntajes desde is_white, igual que minimax.
+
+        pvs busca cada hijo después del primero con una ventana nula alrededor de
+        alfa y solo lo repite completo si la supera; lmr busca las jugadas tardías
+        tranquilas (a casillas sin puntos ni multiplicador) LMR_REDUCTION niveles
+        menos y las repite completas si superan alfa. Ambas opciones activan negamax.
+        """
+        if self._deadline is not None:
+            self._node_counter += 1
+            if self._node_counter % self.TIME_CHECK_INTERVAL == 0:
+                if self._token is not None and self._token.cancelled:
+                    raise SearchCancelled()
+                if time.perf_counter() >= self._deadline:
+                    raise SearchTimeout()
+        stats = self.stats
+        if stats is not None:
+            stats.visit(ply)
+
+        mover = is_white if is_maximizing else not is_white
+        sign = 1 if is_maximizing else -1
+        if self.tablebase is not None and ply > 0 and \
+                self.MAX_MOVES - board.moves_count >= self.TABLEBASE_MIN_MOVES_LEFT:
+            remaining_diff = self.tablebase.probe(board, mover)
+            if remaining_diff is not None:
+                return sign * self.exact_score(board, is_white, remaining_diff), None
+
+        if depth == 0 and self.quiescence_nodes > 0:
+            self._quiescence_budget = self.quiescence_nodes
+            window = (alpha, beta) if sign > 0 else (-beta, -alpha)
+            return sign * self.quiescence(board, window[0], window[1], is_maximizing, is_white, ply), None
+        if depth == 0 or board.is_game_over() or board.moves_count >= self.MAX_MOVES:
+            if stats is not None:
+                stats.leaf_evaluations += 1
+            return sign * self.leaf_score(board, is_white), None
+
+        tt = self.transposition_table
+        tt_move = None
+        if tt is not None:
+            key = self.position_key(board, mover, is_white)
+            entry = tt.probe(key)
+            if entry is not None:
+                entry_depth, flag, entry_score, tt_move = entry
+                if sign < 0:
+                    entry_score = -entry_score
+                    flag = UPPER_BOUND if flag == LOWER_BOUND else LOWER_BOUND if flag == UPPER_BOUND else flag
+                # La raíz siempre se busca: la entrada pudo guardarse con otro historial
+                if ply > 0 and entry_depth >= depth and (
+                        flag == EXACT or
+                        (flag == LOWER_BOUND and entry_score >= beta) or
+                        (flag == UPPER_BOUND and entry_score <= alpha)):
+                    return entry_score, tt_move
+            alpha_orig, beta_orig = alpha, beta
+
+        valid_moves = self.get_valid_moves(board, mover)
+
+        if not valid_moves:
+            if stats is not None:
+                stats.leaf_evaluations += 1
+            return sign * self.evaluate_board(board, is_white), None
+        if stats is not None:
+            stats.expanded_nodes += 1
+
+        if self.move_orderer is not None and ply > 0:
+            valid_moves = self.move_orderer.order(board, valid_moves, mover, ply)
+
+        # Primero la variante principal de la iteración anterior y luego el mejor movimiento guardado
+        pv_move = None
+        if self._follow_pv:
+            if ply < len(self._pv) and self._pv[ply] in valid_moves:
+                pv_move = self._pv[ply]
+            else:
+                self._follow_pv = False
+        # En la raíz el movimiento de la tabla no se adelanta: entre movimientos de igual
+        # puntaje gana el primero en el orden de generación, como sin tabla
+        for first_move in (tt_move if ply > 0 else None, pv_move):
+            if first_move is not None and first_move in valid_moves and valid_moves[0] != first_move:
+                valid_moves = [first_move] + [move for move in valid_moves if move != first_move]
+
+        # En la frontera los hijos son hojas: se evalúan todos juntos y se recorren igual que en el bucle
+        leaf_scores = None
+        # Con quiescencia o tablas de finales las hojas no se puntúan con la evaluación heurística sola
+        if depth == 1 and self.batch_evaluator is not None and not self.quiescence_nodes and \
+                self.tablebase is None and len(valid_moves) >= self.batch_min_size:
+            leaf_scores = self.batch_evaluator.evaluate_children(board, valid_moves, mover, is_white).tolist()
+            if stats is not None:
+                stats.leaf_evaluations += len(valid_moves)
+
+        # Solo se reducen los nodos internos con profundidad suficiente; la raíz se busca completa
+        can_reduce = self.lmr and ply > 0 and depth >= self.LMR_MIN_DEPTH
+        best_eval = float('-inf')
+        best_move = None
+        for index, move in enumerate(valid_moves):
+            if leaf_scores is not None:
+                eval_score = sign * leaf_scores[index]
+                if stats is not None:
+                    stats.visit(ply + 1)
+            else:
+                reduction = 0
+                if can_reduce and index >= self.LMR_FULL_DEPTH_MOVES and \
+                        move not in board.points and move not in board.multipliers:
+                    reduction = self.LMR_REDUCTION
+                # Ventana nula después del primer hijo: solo hay que probar que no supera alfa
+                null_window = self.pvs and index > 0 and alpha > float('-inf')
+                window_beta = min(beta, alpha + self.NULL_WINDOW) if null_window else beta
+                board.make_move(move, mover)
+                eval_score = -self.negamax(board, depth - 1 - reduction, -window_beta, -alpha,
+                                           not is_maximizing, is_white, ply + 1)[0]
+                if reduction and eval_score > alpha:
+                    if stats is not None:
+                        stats.researches += 1
+                    eval_score = -self.negamax(board, depth - 1, -window_beta, -alpha,
+                                               not is_maximizing, is_white, ply + 1)[0]
+                if window_beta < beta and alpha < eval_score:
+                    if stats is not None:
+                        stats.researches += 1
+                    eval_score = -self.negamax(board, depth - 1, -beta, -alpha,
+                                               not is_maximizing, is_white, ply + 1)[0]
+                board.unmake_move()
+            self._follow_pv = False
+            if eval_score > best_eval:
+                best_eval = eval_score
+                best_move = move
+            alpha = max(alpha, eval_score)
+            if beta <= alpha:
+                if stats is not None:
+                    stats.cutoff(index)
+                if self.move_orderer is not None:
+                    self.move_orderer.record_cutoff(board, move, mover, ply, depth)
+                break
+
+        if tt is not None:
+            if best_eval <= alpha_orig:
+                flag = UPPER_BOUND
+            elif best_eval >= beta_orig:
+                flag = LOWER_BOUND
+            else:
+                flag = EXACT
+            if sign < 0:
+                flag = UPPER_BOUND if flag == LOWER_BOUND else LOWER_BOUND if flag == UPPER_BOUND else flag
+            tt.store(key, depth, flag, sign * best_eval, best_move)
+        return best_eval, best_move
+
+    def principal_variation(self, board: Board, is_white: bool, depth: int) -> List[Tuple[int, int]]:
+        """Reconstruye la variante principal siguiendo los mejores movimientos de la tabla de transposición"""
+        pv = []
+        if self.transposition_table is None:
+            return pv
+        mover = is_white
+        for _ in range(depth):
+            move = self.transposition_table.best_move(self.position_key(board, mover, is_white))
+            if move is None or move not in board.get_valid_moves(board.white_horse if mover else board.black_horse):
+                break
+            board.make_move(move, mover)
+            pv.append(move)
+            mover = not mover
+        for _ in pv:
+            board.unmake_move()
+        return pv
+
+    def iterative_deepening(self, board: Board, is_white: bool, time_limit_ms: int,
+                            max_depth: Optional[int] = None) -> Tuple[float, Optional[Tuple[int, int]]]:
+        """Profundiza de a un nivel y devuelve el resultado de la última iteración completa.
+
+        La primera iteración siempre se completa para tener un movimiento; las
+        siguientes se interrumpen al vencer el plazo y su resultado se descarta.
+        Si el token de la búsqueda se cancela también se devuelve la última
+        iteración completa; durante la primera se lanza SearchCancelled.
+        Con aspiration_window, cada iteración parte de una ventana alrededor del
+        puntaje de la anterior (ver _aspiration_search).
+        """
+        max_depth = self.depth if max_depth is None else max_depth
+        # No tiene sentido buscar más allá del límite de movimientos de la partida
+        max_depth = max(1, min(max_depth, self.MAX_MOVES - board.moves_count))
+        deadline = time.perf_counter() + time_limit_ms / 1000
+        undo_depth = len(board.undo_stack)
+        best_score, best_move = float('-inf'), None
+        self._pv = []
+        self.last_search_depth = 0
+
+        for depth in range(1, max_depth + 1):
+            if depth > 1:
+                self._deadline = deadline
+            else:
+                # Sin token la primera iteración no se interrumpe; con token solo se consulta el token
+                self._deadline = float('inf') if self._token is not None else None
+            self._node_counter = 0
+            try:
+                score, move = self._aspiration_search(board, depth, is_white, best_score)
+            except (SearchTimeout, SearchCancelled):
+                # Deshacer los movimientos que quedaron aplicados al cortar la búsqueda
+                while len(board.undo_stack) > undo_depth:
+                    board.unmake_move()
+                if depth == 1:
+                    self._pv = []
+                    raise
+                break
+            finally:
+                self._deadline = None
+                self._follow_pv = False
+            best_score, best_move = score, move
+            self.last_search_depth = depth
+            self._pv = self.principal_variation(board, is_white, depth) or ([move] if move else [])
+            if time.perf_counter() >= deadline:
+                break
+
+        self._pv = []
+        return best_score, best_move
+
+    def _aspiration_search(self, board: Board, depth: int, is_white: bool,
+                           previous_score: float) -> Tuple[float, Optional[Tuple[int, int]]]:
+        """Búsqueda de una iteración con ventana de aspiración alrededor de previous_score.
+
+        Si el puntaje cae sobre un borde de la ventana, el valor real está fuera:
+        se abre ese lado y se repite la búsqueda, así que el resultado es el mismo
+        que con la ventana completa.
+        """
+        alpha, beta = float('-inf'), float('inf')
+        if self.aspiration_window > 0 and depth > 1 and abs(previous_score) != float('inf'):
+            alpha, beta = previous_score - self.aspiration_window, previous_score + self.aspiration_window
+        while True:
+            self._follow_pv = bool(self._pv)
+            score, move = self.search(board, depth, alpha, beta, True, is_white)
+            if score <= alpha and alpha > float('-inf'):
+                alpha = float('-inf')
+            elif score >= beta and beta < float('inf'):
+                beta = float('inf')
+            else:
+                return score, move
+            if self.stats is not None:
+                self.stats.researches += 1
+
+    def parallel_search(self, board: Board, is_white: bool) -> Tuple[float, Optional[Tuple[int, int]]]:
+        """Búsqueda a profundidad fija repartiendo los hijos de la raíz entre procesos.
+
+        El primer movimiento se busca en este proceso para obtener una cota alfa;
+        el resto se busca en paralelo con la ventana (alfa, +inf). Los hijos que
+        superan alfa devuelven su valor exacto y los demás una cota que no puede
+        mejorarlo, así que, igual que en la búsqueda serial, gana el primer
+        movimiento (en el orden de get_valid_moves) con el valor máximo. Cada
+        proceso empieza con una tabla de transposición vacía; como la tabla no
+        cambia el movimiento elegido a profundidad fija, el resultado es el serial.
+
+        Con un token en curso (ver make_move), los procesos reciben su plazo y
+        este proceso lo consulta mientras espera; al cancelarse se descartan los
+        hijos pendientes y se lanza SearchCancelled. Una cancelación con cancel()
+        no llega a los hijos que ya están buscando: terminan su subárbol en el
+        pool, pero su resultado se ignora.
+        """
+        valid_moves = self.get_valid_moves(board, is_white)
+        if not valid_moves or self.depth <= 1 or board.is_game_over():
+            return self.fixed_depth_search(board, is_white)
+
+        token = self._token
+        deadline = time.time() + token.remaining() if token is not None and token.deadline is not None else None
+        config = dict(self._config, depth=self.depth)
+        first_move = valid_moves[0]
+        alpha = _search_root_child(config, board.clone(), first_move, is_white, float('-inf'), token)
+
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        futures = [self._executor.submit(_search_root_child, config, board, move, is_white, alpha, None, deadline)
+                   for move in valid_moves[1:]]
+
+        best_eval, best_move = alpha, first_move
+        try:
+            for move, future in zip(valid_moves[1:], futures):
+                if token is not None:
+                    while not wait([future], timeout=self.CANCEL_POLL_SECONDS).done:
+                        token.raise_if_cancelled()
+                eval_score = future.result()
+                if eval_score > best_eval:
+                    best_eval = eval_score
+                    best_move = move
+        except SearchCancelled:
+            for future in futures:
+                future.cancel()
+            raise
+        return best_eval, best_move
+
+    def close(self):
+        """Libera el pool de procesos de la búsqueda paralela sin esperar las tareas en curso"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_executor'] = None  # El pool no se puede enviar a otro proceso
+        state['_opening_book'] = None  # El libro se vuelve a abrir desde su ruta
+        return state
+
+    def opening_book(self) -> Optional['OpeningBook']:
+        """Libro de aperturas del jugador, abierto la primera vez que se usa"""
+        if self._opening_book is None and self.opening_book_path:
+            from opening_book import OpeningBook
+            self._opening_book = OpeningBook(self.opening_book_path)
+        return self._opening_book
+
+    def make_move(self, board: Board, is_white: bool,
+                  token: Optional[CancellationToken] = None) -> Optional[Tuple[int, int]]:
+        """Determina el mejor movimiento para el jugador.
+
+        Con token, la búsqueda consulta cada TIME_CHECK_INTERVAL nodos si se
+        canceló o venció su plazo. Con tiempo límite se devuelve la última
+        iteración completa; a profundidad fija (también la paralela) se lanza
+        SearchCancelled con el tablero como estaba.
+        """
+        if token is not None:
+            token.raise_if_cancelled()
+        self._token = token
+        try:
+            if not self.collect_stats:
+                return self._choose_move(board, is_white)
+            self.stats = SearchStats()
+            start = time.perf_counter()
+            try:
+                return self._choose_move(board, is_white)
+            finally:
+                self.stats.finish(time.perf_counter() - start, self.last_search_depth)
+                self.last_stats, self.stats = self.stats, None
+        finally:
+            self._token = None
+
+    def fixed_depth_search(self, board: Board, is_white: bool) -> Tuple[float, Optional[Tuple[int, int]]]:
+        """Búsqueda a profundidad `depth` desde la raíz; si el token se cancela deshace lo aplicado"""
+        if self._token is None:
+            return self.search(board, self.depth, float('-inf'), float('inf'), True, is_white)
+        undo_depth = len(board.undo_stack)
+        self._deadline = float('inf')  # Sin plazo propio: solo activa la consulta del token
+        self._node_counter = 0
+        try:
+            return self.search(board, self.depth, float('-inf'), float('inf'), True, is_white)
+        except SearchCancelled:
+            while len(board.undo_stack) > undo_depth:
+                board.unmake_move()
+            raise
+        finally:
+            self._deadline = None
+
+    def _choose_move(self, board: Board, is_white: bool) -> Optional[Tuple[int, int]]:
+        self.last_score = None
         if board.moves_count >= self.MAX_MOVES:
+            self.last_search_depth = 0
             return None
-        
-        _, best_move = self.minimax(board, self.depth, float('-inf'), float('inf'), True, is_white)
+
+        if self.transposition_table is not None:
+            self.transposition_table.new_search()
+        if self.move_orderer is not None:
+            self.move_orderer.age()
+        if self.tablebase is not None:
+            self.tablebase.ensure(board)
+        if self.time_limit_ms:
+            self.last_score, best_move = self.iterative_deepening(board, is_white, self.time_limit_ms)
+            return best_move
+
+        book = self.opening_book()
+        if book is not None:
+            from opening_book import BOOK_MAX_PLY, book_key
+            if board.moves_count >= BOOK_MAX_PLY:
+                book = None
+        if book is not None:
+            key = book_key(self, board, is_white)
+            entry = book.probe(key)
+            if entry is not None:
+                move, score, depth = entry
+                current_pos = board.white_horse if is_white else board.black_horse
+                if depth == self.depth and (move is None or move in board.get_valid_moves(current_pos)):
+                    self.last_search_depth = depth
+                    self.last_score = score
+                    return move
+
+        if self.workers > 1:
+            score, best_move = self.parallel_search(board, is_white)
+        else:
+            score, best_move = self.fixed_depth_search(board, is_white)
+        self.last_search_depth = self.depth
+        self.last_score = score
+        if book is not None:
+            book.store(key, self.depth, score, best_move)
         return best_move
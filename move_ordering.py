@@ -0,0 +1,74 @@
+from typing import List, Tuple
+
+MAX_PLY = 64
+KILLER_SLOTS = 2
+
+# Prioridades: capturas primero (por valor), luego jugadas asesinas y por último historial
+CAPTURE_BONUS = 1 << 30
+KILLER_BONUS = 1 << 28
+MULTIPLIER_VALUE = 0.5
+
+
+def _square(position: Tuple[int, int]) -> int:
+    return position[0] * 8 + position[1]
+
+
+class MoveOrderer:
+    """Ordena movimientos con capturas, jugadas asesinas por nivel y la heurística de historial.
+
+    Las jugadas asesinas son movimientos sin captura que produjeron un corte
+    en el mismo nivel del árbol; el historial acumula, por jugador y por par
+    (casilla origen, casilla destino), cuántos cortes produjo cada movimiento
+    ponderados por la profundidad restante.
+    """
+
+    def __init__(self):
+        self.killers = [[None] * KILLER_SLOTS for _ in range(MAX_PLY)]
+        self.history = ({}, {})  # (blanco, negro): origen * 64 + destino -> puntaje
+
+    def clear(self):
+        """Olvida las jugadas asesinas y el historial"""
+        self.__init__()
+
+    def age(self):
+        """Reduce el historial a la mitad al empezar una búsqueda nueva para que pesen más los cortes recientes"""
+        for table in self.history:
+            for index, value in list(table.items()):
+                if value > 1:
+                    table[index] = value >> 1
+                else:
+                    del table[index]
+        for slots in self.killers:
+            for k in range(KILLER_SLOTS):
+                slots[k] = None
+
+    def score(self, board, move: Tuple[int, int], is_white: bool, ply: int, origin: int) -> float:
+        value = board.points.get(move, 0)
+        if value:
+            return CAPTURE_BONUS + value
+        if move in board.multipliers and not (board.white_multiplier if is_white else board.black_multiplier):
+            return CAPTURE_BONUS + MULTIPLIER_VALUE
+        if ply < MAX_PLY and move in self.killers[ply]:
+            return KILLER_BONUS - self.killers[ply].index(move)
+        return self.history[0 if is_white else 1].get(origin + _square(move), 0)
+
+    def order(self, board, moves: List[Tuple[int, int]], is_white: bool, ply: int) -> List[Tuple[int, int]]:
+        """Devuelve los movimientos de mejor a peor; los empates conservan el orden original"""
+        if len(moves) < 2:
+            return moves
+        origin = _square(board.white_horse if is_white else board.black_horse) * 64
+        return sorted(moves, key=lambda move: self.score(board, move, is_white, ply, origin), reverse=True)
+
+    def record_cutoff(self, board, move: Tuple[int, int], is_white: bool, ply: int, depth: int):
+        """Registra un movimiento que produjo un corte alfa-beta"""
+        if move in board.points or move in board.multipliers:
+            return  # Las capturas ya se ordenan primero
+        if ply < MAX_PLY:
+            slots = self.killers[ply]
+            if slots[0] != move:
+                slots[1] = slots[0]
+                slots[0] = move
+        origin = _square(board.white_horse if is_white else board.black_horse)
+        table = self.history[0 if is_white else 1]
+        index = origin * 64 + _square(move)
+        table[index] = table.get(index, 0) + depth * depth
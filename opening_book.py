@@ -0,0 +1,273 @@
+import os
+import random
+import struct
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import Iterable, List, Optional, Tuple
+from board import Board
+import zobrist
+from zobrist import POS_INDEX
+import distances
+
+try:
+    import fcntl
+except ImportError:  # Windows: se bloquea un archivo auxiliar con msvcrt
+    fcntl = None
+    import msvcrt
+
+MAGIC = b'SHBOOK01'
+HEADER = struct.Struct('<8sQQ')  # magic, capacidad, tamaño del registro
+HEADER_SIZE = 64
+
+RECORD = np.dtype([
+    ('key', '<u8'),
+    ('check', '<u8'),  # key ^ contenido: descarta registros leídos a medio escribir
+    ('score', '<f8'),
+    ('depth', '<u2'),
+    ('move', '<i2'),  # casilla x * 8 + y, -1 si no hay movimiento
+    ('pad', '<u4'),
+])
+
+DEFAULT_BOOK_CAPACITY = 1 << 20
+MAX_PROBES = 8
+# El libro guarda las búsquedas de la raíz de las primeras jugadas de cada partida
+BOOK_MAX_PLY = 8
+
+# Claves propias del libro: la búsqueda depende del historial, la jugada y la configuración del jugador
+_rng = random.Random(20242)
+HISTORY_KEYS = [[[_rng.getrandbits(64) for _ in range(2)] for _ in range(64)] for _ in range(12)]
+MOVES_COUNT_KEYS = [_rng.getrandbits(64) for _ in range(151)]
+
+
+def config_key(utility_function: int, metric: int, depth: int, lmr: bool = False,
+               quiescence_nodes: int = 0, tablebase_k: int = 0) -> int:
+    """Clave de la configuración que determina el resultado de la búsqueda.
+
+    La reducción de jugadas tardías, la búsqueda de quiescencia y las tablas de
+    finales cambian el resultado y entran en la clave; sin ellas la clave es la
+    de siempre, así que los libros existentes sirven. El resto de las opciones
+    no cambia el movimiento a profundidad fija: la tabla de transposición y el
+    orden de movimientos no alteran el orden de la raíz, y negamax, pvs y la
+    evaluación por lotes dan los mismos puntajes que minimax.
+    """
+    seed = f"{utility_function}:{metric}:{depth}" + (":lmr" if lmr else "")
+    if quiescence_nodes:
+        seed += f":q{quiescence_nodes}"
+    if tablebase_k:
+        seed += f":tb{tablebase_k}"
+    return random.Random(seed).getrandbits(64)
+
+
+def book_key(player, board: Board, is_white: bool) -> int:
+    """Clave de una búsqueda en la raíz: posición, historial, jugada y configuración del jugador"""
+    # Misma clave que antes de que la tabla de transposición incluyera el historial,
+    # para que los libros existentes sigan sirviendo
+    key = board.zobrist_hash
+    if board.white_to_move != is_white:
+        key ^= zobrist.BLACK_TO_MOVE_KEY
+    if not is_white:
+        key ^= zobrist.BLACK_PERSPECTIVE_KEY
+    for index, (position, side) in enumerate(board.position_history):
+        key ^= HISTORY_KEYS[index][POS_INDEX[position]][0 if side else 1]
+    key ^= MOVES_COUNT_KEYS[min(board.moves_count, 150)]
+    tablebase_k = player.tablebase.k if player.tablebase is not None else 0
+    return key ^ config_key(player.utility_function, player.metric, player.depth, player.lmr,
+                            player.quiescence_nodes, tablebase_k)
+
+
+@contextmanager
+def _exclusive_lock(path: str):
+    """Lock exclusivo entre procesos para escribir en el libro.
+
+    En Unix es un flock sobre el propio libro. En Windows msvcrt.locking es
+    obligatorio (bloquearía también las lecturas), así que se bloquea un
+    archivo auxiliar path + '.lock'.
+    """
+    if fcntl is not None:
+        with open(path, 'rb') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+        return
+    with open(path + '.lock', 'a+b') as lock:
+        lock.seek(0)
+        while True:
+            try:
+                msvcrt.locking(lock.fileno(), msvcrt.LK_LOCK, 1)
+                break
+            except OSError:  # LK_LOCK se rinde después de 10 intentos de un segundo
+                continue
+        try:
+            yield
+        finally:
+            lock.seek(0)
+            msvcrt.locking(lock.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _check(key: int, depth: int, move: int, score: float) -> int:
+    bits = struct.unpack('<Q', struct.pack('<d', score))[0]
+    return key ^ bits ^ (depth << 16) ^ (move & 0xFFFF)
+
+
+class OpeningBook:
+    """Tabla hash en disco de búsquedas ya hechas: clave → mejor movimiento, puntaje y profundidad.
+
+    El archivo se abre con np.memmap, así que solo se cargan en memoria las
+    páginas consultadas y varios procesos pueden leerlo a la vez. Las
+    escrituras se serializan con un lock exclusivo (ver _exclusive_lock); los
+    lectores no lo toman y descartan con el campo check los registros escritos
+    a medias. Usar el libro puede cambiar las jugadas posteriores de la partida
+    (ver MinimaxPlayer).
+    """
+
+    def __init__(self, path: str, capacity: int = DEFAULT_BOOK_CAPACITY, writable: bool = True):
+        self.path = path
+        self.writable = writable
+        if not os.path.exists(path):
+            if not writable:
+                raise FileNotFoundError(path)
+            if capacity <= 0 or capacity & (capacity - 1):
+                raise ValueError("La capacidad del libro debe ser una potencia de 2")
+            self._create(capacity)
+        with open(path, 'rb') as f:
+            magic, capacity, record_size = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC or record_size != RECORD.itemsize:
+            raise ValueError(f"{path} no es un libro de aperturas válido")
+        self.capacity = capacity
+        self._records = np.memmap(path, dtype=RECORD, mode='r+' if writable else 'r',
+                                  offset=HEADER_SIZE, shape=(capacity,))
+        self.hits = 0
+        self.misses = 0
+
+    def _create(self, capacity: int):
+        with open(self.path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, capacity, RECORD.itemsize).ljust(HEADER_SIZE, b'\0'))
+            # Archivo disperso: las páginas vacías no ocupan disco hasta que se escriben
+            f.truncate(HEADER_SIZE + capacity * RECORD.itemsize)
+
+    def _slots(self, key: int):
+        start = key & (self.capacity - 1)
+        for probe in range(MAX_PROBES):
+            yield (start + probe) & (self.capacity - 1)
+
+    def probe(self, key: int) -> Optional[Tuple[Optional[Tuple[int, int]], float, int]]:
+        """Devuelve (movimiento, puntaje, profundidad) o None si la clave no está"""
+        for slot in self._slots(key):
+            record = self._records[slot]
+            stored = int(record['key'])
+            if stored == key:
+                depth, move, score = int(record['depth']), int(record['move']), float(record['score'])
+                if int(record['check']) != _check(key, depth, move, score):
+                    break
+                self.hits += 1
+                return (distances.SQUARE_TO_POS[move] if move >= 0 else None), score, depth
+            if stored == 0:
+                break
+        self.misses += 1
+        return None
+
+    def store(self, key: int, depth: int, score: float, move: Optional[Tuple[int, int]]):
+        """Guarda una búsqueda; si las ranuras están ocupadas reemplaza la de menor profundidad"""
+        if not self.writable:
+            return
+        square = POS_INDEX[move] if move is not None else -1
+        with _exclusive_lock(self.path):
+            target = None
+            for slot in self._slots(key):
+                stored = int(self._records[slot]['key'])
+                if stored == key or stored == 0:
+                    target = slot
+                    break
+                if target is None or self._records[slot]['depth'] < self._records[target]['depth']:
+                    target = slot
+            records = self._records
+            # La clave se escribe al final para que un lector no vea una clave con datos viejos
+            records['key'][target] = 0
+            records['score'][target] = score
+            records['depth'][target] = depth
+            records['move'][target] = square
+            records['check'][target] = _check(key, depth, square, score)
+            records['key'][target] = key
+
+    def flush(self):
+        if self.writable:
+            self._records.flush()
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self._records['key']))
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "path": self.path,
+            "capacity": self.capacity,
+            "entries": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+def _opening_searches(task: Tuple) -> List[Tuple[int, int, float, Optional[Tuple[int, int]]]]:
+    """Juega las primeras jugadas de una partida y devuelve sus búsquedas (clave, profundidad, puntaje, movimiento)"""
+    from minimax_player import MinimaxPlayer
+
+    seed, white_depth, black_depth, plies = task
+    board = Board()
+    board.initialize_board(random.Random(seed))
+    players = {True: MinimaxPlayer(white_depth, 1), False: MinimaxPlayer(black_depth, 2)}
+    entries = []
+    is_white = True
+    for _ in range(plies):
+        if board.is_game_over():
+            break
+        player = players[is_white]
+        key = book_key(player, board, is_white)
+        player.transposition_table.new_search()
+        player.move_orderer.age()
+        score, move = player.minimax(board, player.depth, float('-inf'), float('inf'), True, is_white)
+        entries.append((key, player.depth, score, move))
+        if move:
+            board.make_move(move, is_white)
+        is_white = not is_white
+    return entries
+
+
+def build_opening_book(path: str, tasks: Iterable[Tuple[int, int, int]], plies: int = BOOK_MAX_PLY,
+                       capacity: int = DEFAULT_BOOK_CAPACITY, workers: Optional[int] = None) -> dict:
+    """Precalcula las primeras jugadas de las partidas (semilla, profundidad blanco, profundidad negro).
+
+    Las partidas se juegan como en AIGame (utilidad 1 para el blanco y 2 para el
+    negro), en paralelo; solo este proceso escribe en el libro.
+    """
+    book = OpeningBook(path, capacity)
+    jobs = [(seed, white_depth, black_depth, plies) for seed, white_depth, black_depth in tasks]
+    workers = workers or os.cpu_count() or 1
+    stored = 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for entries in executor.map(_opening_searches, jobs):
+            for key, depth, score, move in entries:
+                book.store(key, depth, score, move)
+                stored += 1
+    book.flush()
+    return {"games": len(jobs), "searches": stored, **book.stats()}
+
+
+if __name__ == "__main__":
+    import argparse
+    from experiments import DEFAULT_DIFFICULTY_LEVELS, DEFAULT_GAMES_PER_PAIRING, experiment_tasks
+
+    parser = argparse.ArgumentParser(description="Precalcula el libro de aperturas de las partidas de experimentos")
+    parser.add_argument("path")
+    parser.add_argument("--games", type=int, default=DEFAULT_GAMES_PER_PAIRING)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--plies", type=int, default=BOOK_MAX_PLY)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    tasks = [(task[5], task[3], task[4])
+             for task in experiment_tasks(DEFAULT_DIFFICULTY_LEVELS, args.games, args.seed)]
+    print(build_opening_book(args.path, tasks, args.plies, workers=args.workers))
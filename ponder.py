@@ -0,0 +1,143 @@
+import threading
+from typing import Dict, Optional, Tuple
+from board import Board
+from minimax_player import MinimaxPlayer
+from cancellation import CancellationToken, SearchCancelled
+
+
+class Ponderer:
+    """Búsqueda en segundo plano de la respuesta de la IA mientras el humano piensa.
+
+    Después de que la IA mueve, un hilo recorre las respuestas legales del
+    humano (primero las que capturan puntos o multiplicadores) y, para cada
+    una, busca sobre una copia del tablero la jugada que haría la IA, con la
+    misma profundidad o el mismo tiempo límite que make_move. Los resultados
+    se guardan por hash Zobrist de la posición resultante.
+
+    Mientras piensa, el hilo es dueño del jugador (su tabla de transposición
+    queda cargada para la búsqueda real). take() lo recupera: si la respuesta
+    real ya se buscó, devuelve el movimiento al instante; si se está buscando,
+    espera a que termine esa búsqueda; si no, interrumpe el hilo en la próxima
+    consulta de su CancellationToken (cada TIME_CHECK_INTERVAL nodos) y
+    devuelve None.
+    """
+
+    def __init__(self, player: MinimaxPlayer):
+        self.player = player
+        self.hits = 0
+        self.misses = 0
+        self._results: Dict[int, Tuple[Optional[Tuple[int, int]], int]] = {}
+        self._thread = None
+        self._token = None  # Token de la búsqueda en curso del hilo
+        self._lock = threading.Lock()
+        self._wanted = None  # hash de la posición que pidió take()
+        self._current = None  # hash de la posición que se está buscando
+        self._stopped = False
+
+    @property
+    def pending(self) -> bool:
+        """Indica si hay pondering (en curso o terminado) esperando a take()"""
+        return self._thread is not None
+
+    def start(self, board: Board, ai_is_white: bool):
+        """Empieza a pensar las respuestas del rival sobre una copia del tablero"""
+        self.stop()
+        if board.is_game_over() or board.moves_count + 1 >= self.player.MAX_MOVES:
+            return
+        base = board.clone()
+        human_pos = base.black_horse if ai_is_white else base.white_horse
+        replies = base.get_valid_moves(human_pos)
+        # Las capturas son las respuestas más probables: se piensan primero
+        replies.sort(key=lambda move: move not in base.points and move not in base.multipliers)
+        self._results = {}
+        self._wanted = None
+        self._current = None
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, args=(base, replies, ai_is_white),
+                                        name="ponder", daemon=True)
+        self._thread.start()
+
+    def _run(self, board: Board, replies, ai_is_white: bool):
+        player = self.player
+        for reply in replies:
+            board.make_move(reply, not ai_is_white)
+            key = board.zobrist_hash
+            with self._lock:
+                if self._stopped or self._wanted is not None:
+                    board.unmake_move()
+                    return
+                self._current = key
+                self._token = CancellationToken()
+                player._token = self._token
+            try:
+                result = self._search(board, ai_is_white)
+            finally:
+                player._token = None
+                board.unmake_move()
+            with self._lock:
+                self._current = None
+                if result is not None:
+                    self._results[key] = result
+                if self._stopped or self._wanted is not None:
+                    return
+
+    def _search(self, board: Board, ai_is_white: bool) -> Optional[Tuple[Optional[Tuple[int, int]], int]]:
+        """Misma búsqueda que make_move; devuelve (movimiento, profundidad) o None si se interrumpió"""
+        player = self.player
+        if player.transposition_table is not None:
+            player.transposition_table.new_search()
+        if player.move_orderer is not None:
+            player.move_orderer.age()
+        if player.tablebase is not None:
+            player.tablebase.ensure(board)
+        try:
+            if player.time_limit_ms:
+                _, move = player.iterative_deepening(board, ai_is_white, player.time_limit_ms)
+                if player._token.cancelled:
+                    return None  # La última iteración pudo no llegar a la profundidad que alcanzaría make_move
+                return move, player.last_search_depth
+            _, move = player.fixed_depth_search(board, ai_is_white)
+            return move, player.depth
+        except SearchCancelled:
+            return None
+
+    def take(self, board: Board) -> Tuple[bool, Optional[Tuple[int, int]]]:
+        """Detiene el pondering y devuelve (acierto, movimiento) para la posición actual"""
+        if self._thread is None:
+            return False, None
+        key = board.zobrist_hash
+        with self._lock:
+            self._wanted = key
+            if key != self._current and self._token is not None:
+                self._token.cancel()
+        self._thread.join()
+        self._thread = None
+        result = self._results.pop(key, None)
+        self._results = {}
+        if result is None:
+            self.misses += 1
+            return False, None
+        self.hits += 1
+        move, depth = result
+        self.player.last_search_depth = depth
+        self.player.last_stats = None  # El pondering no recolecta estadísticas
+        self.player.last_score = None
+        return True, move
+
+    def stop(self, wait: bool = True):
+        """Cancela el pondering sin usar sus resultados"""
+        thread = self._thread
+        if thread is None:
+            return
+        with self._lock:
+            self._stopped = True
+            if self._token is not None:
+                self._token.cancel()
+        if wait:
+            thread.join()
+            self._thread = None
+        self._results = {}
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / lookups if lookups else 0.0}
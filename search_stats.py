@@ -0,0 +1,97 @@
+from typing import List
+
+
+class SearchStats:
+    """Estadísticas de una o varias búsquedas de MinimaxPlayer.
+
+    Se acumulan mientras MinimaxPlayer.stats no es None (ver collect_stats);
+    con varias búsquedas combinadas con merge, los promedios son por búsqueda.
+    """
+
+    def __init__(self):
+        self.searches = 0
+        self.nodes_per_ply: List[int] = []
+        self.expanded_nodes = 0
+        self.leaf_evaluations = 0
+        self.cutoffs = 0
+        self.cutoff_move_index: List[int] = []  # índice del movimiento que produjo el corte -> cantidad
+        self.cycle_filter_hits = 0
+        self.researches = 0  # Búsquedas repetidas por ventana nula, reducción o aspiración fallidas
+        self.elapsed_seconds = 0.0
+        self.depth_total = 0
+        self.branching_total = 0.0
+
+    def visit(self, ply: int):
+        if ply >= len(self.nodes_per_ply):
+            self.nodes_per_ply.extend([0] * (ply + 1 - len(self.nodes_per_ply)))
+        self.nodes_per_ply[ply] += 1
+
+    def cutoff(self, move_index: int):
+        self.cutoffs += 1
+        if move_index >= len(self.cutoff_move_index):
+            self.cutoff_move_index.extend([0] * (move_index + 1 - len(self.cutoff_move_index)))
+        self.cutoff_move_index[move_index] += 1
+
+    @property
+    def nodes(self) -> int:
+        return sum(self.nodes_per_ply)
+
+    def finish(self, elapsed_seconds: float, depth: int):
+        """Cierra una búsqueda: tiempo, profundidad y factor de ramificación efectivo (nodos^(1/profundidad))"""
+        self.searches += 1
+        self.elapsed_seconds += elapsed_seconds
+        self.depth_total += depth
+        if depth > 0:
+            self.branching_total += self.nodes ** (1 / depth)
+
+    def merge(self, other: 'SearchStats') -> 'SearchStats':
+        """Suma las estadísticas de otra búsqueda (o conjunto de búsquedas) a estas"""
+        for ply, count in enumerate(other.nodes_per_ply):
+            if ply >= len(self.nodes_per_ply):
+                self.nodes_per_ply.append(0)
+            self.nodes_per_ply[ply] += count
+        for index, count in enumerate(other.cutoff_move_index):
+            if index >= len(self.cutoff_move_index):
+                self.cutoff_move_index.append(0)
+            self.cutoff_move_index[index] += count
+        for name in ('searches', 'expanded_nodes', 'leaf_evaluations', 'cutoffs', 'cycle_filter_hits',
+                     'researches', 'elapsed_seconds', 'depth_total', 'branching_total'):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        return self
+
+    def to_dict(self) -> dict:
+        searches = self.searches or 1
+        return {
+            "searches": self.searches,
+            "nodes": self.nodes,
+            "nodes_per_ply": list(self.nodes_per_ply),
+            "leaf_evaluations": self.leaf_evaluations,
+            "expanded_nodes": self.expanded_nodes,
+            "cutoffs": self.cutoffs,
+            "cutoff_rate": self.cutoffs / self.expanded_nodes if self.expanded_nodes else 0.0,
+            "cutoff_move_index": list(self.cutoff_move_index),
+            "first_move_cutoff_rate": self.cutoff_move_index[0] / self.cutoffs if self.cutoffs else 0.0,
+            "effective_branching_factor": self.branching_total / searches,
+            "average_depth": self.depth_total / searches,
+            "cycle_filter_hits": self.cycle_filter_hits,
+            "researches": self.researches,
+            "elapsed_ms": self.elapsed_seconds * 1000,
+            "nodes_per_second": self.nodes / self.elapsed_seconds if self.elapsed_seconds else 0.0,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'SearchStats':
+        """Reconstruye las estadísticas desde to_dict (p. ej. al recibirlas de otro proceso)"""
+        stats = cls()
+        stats.searches = data["searches"]
+        stats.nodes_per_ply = list(data["nodes_per_ply"])
+        stats.expanded_nodes = data["expanded_nodes"]
+        stats.leaf_evaluations = data["leaf_evaluations"]
+        stats.cutoffs = data["cutoffs"]
+        stats.cutoff_move_index = list(data["cutoff_move_index"])
+        stats.cycle_filter_hits = data["cycle_filter_hits"]
+        stats.researches = data.get("researches", 0)
+        stats.elapsed_seconds = data["elapsed_ms"] / 1000
+        stats.depth_total = data["average_depth"] * data["searches"]
+        stats.branching_total = data["effective_branching_factor"] * data["searches"]
+        return stats
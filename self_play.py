@@ -0,0 +1,262 @@
+import glob
+import math
+import os
+import random
+import struct
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional, Tuple
+from board import Board
+from minimax_player import MinimaxPlayer
+from zobrist import POS_INDEX
+
+MAGIC = b'SHSELF01'
+HEADER = struct.Struct('<8sQQQ')  # magic, tamaño del registro, capacidad, registros escritos
+COUNT_OFFSET = 24  # posición del contador de registros dentro del encabezado
+HEADER_SIZE = 64
+
+# Una posición de una partida de autojuego, antes de la jugada del que mueve
+RECORD = np.dtype([
+    ('key', '<u8'),  # hash Zobrist de la posición
+    ('cells', 'i1', (8, 8)),  # códigos de celda de Board.board
+    ('score', '<f4'),  # puntaje de la búsqueda desde el que mueve; NaN en jugadas al azar
+    ('white_score', '<i2'),
+    ('black_score', '<i2'),
+    ('moves_count', '<u2'),
+    ('move', '<i2'),  # casilla x * 8 + y elegida, -1 si pasó el turno
+    ('final_diff', '<i2'),  # puntos del blanco menos puntos del negro al terminar la partida
+    ('depth', 'u1'),  # profundidad de la búsqueda; 0 en jugadas al azar
+    ('white_to_move', 'u1'),
+    ('white_multiplier', 'u1'),
+    ('black_multiplier', 'u1'),
+    ('result', 'i1'),  # 1 gana el blanco, -1 gana el negro, 0 empate
+    ('pad', 'u1', (5,)),
+])
+
+# 1M de registros (96 MiB) por archivo; el último se recorta al cerrarlo
+DEFAULT_SHARD_RECORDS = 1 << 20
+DEFAULT_BATCH_SIZE = 4096
+# Tope de jugadas por partida, por si ambos caballos quedan sin movimientos
+MAX_GAME_PLIES = 400
+
+
+def game_seed(base_seed: int, game_index: int) -> int:
+    """Semilla de una partida de autojuego derivada de la semilla base"""
+    return random.Random(f"{base_seed}:selfplay:{game_index}").getrandbits(32)
+
+
+def shard_path(directory: str, index: int) -> str:
+    return os.path.join(directory, f"shard-{index:05d}.rec")
+
+
+def shard_paths(directory: str) -> List[str]:
+    return sorted(glob.glob(os.path.join(directory, "shard-*.rec")))
+
+
+def _read_header(path: str) -> Tuple[int, int]:
+    """Devuelve (capacidad, registros escritos) de un archivo de registros"""
+    with open(path, 'rb') as f:
+        magic, record_size, capacity, count = HEADER.unpack(f.read(HEADER.size))
+    if magic != MAGIC or record_size != RECORD.itemsize:
+        raise ValueError(f"{path} no es un archivo de registros de autojuego válido")
+    return capacity, count
+
+
+class ShardWriter:
+    """Agrega registros RECORD a archivos de tamaño fijo mapeados en memoria.
+
+    Cada archivo se crea disperso con lugar para shard_records registros y se
+    escribe con np.memmap; el contador del encabezado se actualiza después de
+    los datos, así que un lector concurrente solo ve registros completos. Al
+    llenarse un archivo se pasa al siguiente. Si el directorio ya tiene
+    archivos, se sigue agregando al último.
+    """
+
+    def __init__(self, directory: str, shard_records: int = DEFAULT_SHARD_RECORDS):
+        if shard_records <= 0:
+            raise ValueError("La cantidad de registros por archivo debe ser positiva")
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.shard_records = shard_records
+        existing = shard_paths(directory)
+        self._index = len(existing) - 1 if existing else 0
+        self._file = None
+        self._records = None
+        self._capacity = 0
+        self._count = 0
+        self.written = 0
+
+    def _open_shard(self):
+        path = shard_path(self.directory, self._index)
+        if os.path.exists(path):
+            self._capacity, self._count = _read_header(path)
+        else:
+            self._capacity, self._count = self.shard_records, 0
+            with open(path, 'wb') as f:
+                f.write(HEADER.pack(MAGIC, RECORD.itemsize, self._capacity, 0).ljust(HEADER_SIZE, b'\0'))
+        if self._count >= self._capacity:
+            self._index += 1
+            self._open_shard()
+            return
+        self._file = open(path, 'r+b')
+        # Archivo disperso: el lugar libre no ocupa disco hasta que se escribe
+        self._file.truncate(HEADER_SIZE + self._capacity * RECORD.itemsize)
+        self._records = np.memmap(self._file, dtype=RECORD, mode='r+', offset=HEADER_SIZE,
+                                  shape=(self._capacity,))
+
+    def _close_shard(self):
+        self._records.flush()
+        self._records = None
+        # Se recorta el lugar que quedó sin usar
+        self._file.truncate(HEADER_SIZE + self._count * RECORD.itemsize)
+        self._file.close()
+        self._file = None
+
+    def append(self, records: np.ndarray):
+        """Agrega un arreglo de registros RECORD, repartiéndolo entre archivos si hace falta"""
+        start = 0
+        while start < len(records):
+            if self._records is None:
+                self._open_shard()
+            n = min(self._capacity - self._count, len(records) - start)
+            self._records[self._count:self._count + n] = records[start:start + n]
+            self._count += n
+            self._file.seek(COUNT_OFFSET)
+            self._file.write(struct.pack('<Q', self._count))
+            self._file.flush()
+            start += n
+            if self._count >= self._capacity:
+                self._close_shard()
+                self._index += 1
+        self.written += len(records)
+
+    def close(self):
+        if self._records is not None:
+            self._close_shard()
+
+    def __enter__(self) -> 'ShardWriter':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_shard(path: str) -> np.ndarray:
+    """Registros escritos de un archivo, mapeados en memoria de solo lectura"""
+    _, count = _read_header(path)
+    if count == 0:
+        return np.zeros(0, dtype=RECORD)
+    return np.memmap(path, dtype=RECORD, mode='r', offset=HEADER_SIZE, shape=(count,))
+
+
+def iter_records(directory: str, batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[np.ndarray]:
+    """Recorre todos los registros del directorio en lotes de hasta batch_size.
+
+    Cada lote es una copia en memoria; el resto del archivo queda en disco y el
+    sistema operativo carga solo las páginas que se van leyendo.
+    """
+    for path in shard_paths(directory):
+        records = open_shard(path)
+        for start in range(0, len(records), batch_size):
+            yield np.array(records[start:start + batch_size])
+        del records
+
+
+def count_records(directory: str) -> int:
+    return sum(_read_header(path)[1] for path in shard_paths(directory))
+
+
+def play_self_play_game(task: Tuple) -> np.ndarray:
+    """Juega una partida como AIGame (utilidad 1 para el blanco y 2 para el negro) y devuelve sus posiciones.
+
+    Las primeras random_plies jugadas se eligen al azar para diversificar las
+    partidas; se ejecuta en los procesos del pool.
+    """
+    seed, white_depth, black_depth, time_limit_ms, random_plies = task
+    rng = random.Random(seed)
+    board = Board()
+    board.initialize_board(rng)
+    players = {True: MinimaxPlayer(white_depth, 1, time_limit_ms=time_limit_ms),
+               False: MinimaxPlayer(black_depth, 2, time_limit_ms=time_limit_ms)}
+    records = np.zeros(MAX_GAME_PLIES, dtype=RECORD)
+    is_white = True
+    plies = 0
+    while plies < MAX_GAME_PLIES and not board.is_game_over():
+        record = records[plies]
+        record['key'] = board.zobrist_hash
+        record['cells'] = board.board
+        record['white_score'] = board.white_score
+        record['black_score'] = board.black_score
+        record['moves_count'] = board.moves_count
+        record['white_to_move'] = is_white
+        record['white_multiplier'] = board.white_multiplier
+        record['black_multiplier'] = board.black_multiplier
+        if plies < random_plies:
+            moves = board.get_valid_moves(board.white_horse if is_white else board.black_horse)
+            move = rng.choice(moves) if moves else None
+            record['score'] = math.nan
+        else:
+            player = players[is_white]
+            move = player.make_move(board, is_white)
+            record['score'] = math.nan if player.last_score is None else player.last_score
+            record['depth'] = player.last_search_depth
+        record['move'] = POS_INDEX[move] if move is not None else -1
+        if move:
+            board.make_move(move, is_white)
+        is_white = not is_white
+        plies += 1
+
+    records = records[:plies]
+    final_diff = board.white_score - board.black_score
+    records['final_diff'] = final_diff
+    records['result'] = (final_diff > 0) - (final_diff < 0)
+    return records
+
+
+def generate_dataset(directory: str, games: int, base_seed: int = 0, white_depth: int = 4,
+                     black_depth: int = 4, time_limit_ms: Optional[int] = None, random_plies: int = 0,
+                     workers: Optional[int] = None, shard_records: int = DEFAULT_SHARD_RECORDS) -> dict:
+    """Juega `games` partidas de autojuego en un pool de procesos y agrega sus posiciones al directorio.
+
+    Las partidas llegan en orden fijo y solo este proceso escribe, así que con
+    los mismos parámetros el resultado es el mismo con cualquier valor de workers.
+    """
+    tasks = [(game_seed(base_seed, index), white_depth, black_depth, time_limit_ms, random_plies)
+             for index in range(games)]
+    workers = workers or os.cpu_count() or 1
+    with ShardWriter(directory, shard_records) as writer:
+        if workers == 1:
+            for task in tasks:
+                writer.append(play_self_play_game(task))
+        else:
+            chunksize = max(1, len(tasks) // (workers * 8))
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                for records in executor.map(play_self_play_game, tasks, chunksize=chunksize):
+                    writer.append(records)
+        positions = writer.written
+    return {
+        "games": games,
+        "positions": positions,
+        "total_positions": count_records(directory),
+        "shards": len(shard_paths(directory)),
+        "record_bytes": RECORD.itemsize,
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Genera posiciones etiquetadas jugando partidas de autojuego")
+    parser.add_argument("directory")
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--white-depth", type=int, default=4)
+    parser.add_argument("--black-depth", type=int, default=4)
+    parser.add_argument("--time-limit-ms", type=int, default=None)
+    parser.add_argument("--random-plies", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--shard-records", type=int, default=DEFAULT_SHARD_RECORDS)
+    args = parser.parse_args()
+
+    print(generate_dataset(args.directory, args.games, args.seed, args.white_depth, args.black_depth,
+                           args.time_limit_ms, args.random_plies, args.workers, args.shard_records))
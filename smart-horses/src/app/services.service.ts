@@ -8,19 +8,23 @@ import { tap } from 'rxjs/operators';
 })
 export class ServicesService {
   private baseUrl = 'http://127.0.0.1:5000/api';
+  // Partida de esta pestaña; la devuelve /start y la usan las demás llamadas
+  private gameId: string | null = null;
 
   constructor(private http: HttpClient) { }
 
   startMatrix(): Observable<any> {
     console.log('Starting simulation...');
-    return this.http.post<any>(`${this.baseUrl}/start`, {}).pipe(
+    const body = this.gameId ? { game_id: this.gameId } : {};
+    return this.http.post<any>(`${this.baseUrl}/start`, body).pipe(
+      tap(response => this.gameId = response.game_id),
       tap(response => console.log('Simulation started, initial matrix:', response))
     );
   }
 
   startSimulation(): Observable<any> {
     console.log('Starting simulation...');
-    return this.http.post<any>(`${this.baseUrl}/partidaIaVSIa`, {}).pipe(
+    return this.http.post<any>(`${this.baseUrl}/partidaIaVSIa`, { game_id: this.gameId }).pipe(
       tap(response => console.log('Simulation started, response:', response)),
       catchError(this.handleError)  // Manejo de errores
     );
@@ -40,6 +44,7 @@ export class ServicesService {
   sendHumanMove(data: any): Observable<any> {
     console.log('Enviando movimiento del humano al backend...', data);
     const formattedData = {
+      game_id: this.gameId,
       row: data.selectedCell.row,
       col: data.selectedCell.col
     };
@@ -54,7 +59,7 @@ export class ServicesService {
 
   updateDifficulty(difficulty: number): Observable<any> {
     console.log(`Actualizando dificultad a: ${difficulty}`);
-    return this.http.post<any>(`${this.baseUrl}/update-difficulty`, { difficulty }).pipe(
+    return this.http.post<any>(`${this.baseUrl}/update-difficulty`, { game_id: this.gameId, difficulty }).pipe(
       tap(response => console.log('Dificultad actualizada:', response)),
       catchError(this.handleError)
     );
@@ -62,7 +67,7 @@ export class ServicesService {
 
   getIaMove(): Observable<any> {
     console.log('Solicitando movimiento de la IA al backend...');
-    return this.http.get<any>(`${this.baseUrl}/ai-turn`).pipe(
+    return this.http.get<any>(`${this.baseUrl}/ai-turn`, { params: { game_id: this.gameId ?? '' } }).pipe(
       tap(response => console.log('Movimiento de la IA recibido:', response)),
       catchError(this.handleError)
     );
@@ -70,7 +75,8 @@ export class ServicesService {
 
   checkQuedanPuntos(): Observable<{ quedan_puntos: boolean }> {
     console.log('Verificando si quedan puntos en el tablero...');
-    return this.http.get<{ quedan_puntos: boolean }>(`${this.baseUrl}/quedan-puntos`).pipe(
+    return this.http.get<{ quedan_puntos: boolean }>(`${this.baseUrl}/quedan-puntos`,
+      { params: { game_id: this.gameId ?? '' } }).pipe(
       tap(response => {
         if (response.quedan_puntos) {
           console.log('Todavía quedan puntos en el tablero.');
@@ -90,4 +96,26 @@ export class ServicesService {
     );
   }
 
+  startExperiment(params: any = {}): Observable<any> {
+    console.log('Encolando experimento...', params);
+    return this.http.post<any>(`${this.baseUrl}/experiments`, params).pipe(
+      tap(response => console.log('Experimento encolado:', response)),
+      catchError(this.handleError)
+    );
+  }
+
+  getExperimentStatus(jobId: string): Observable<any> {
+    return this.http.get<any>(`${this.baseUrl}/experiments/${jobId}`).pipe(
+      catchError(this.handleError)
+    );
+  }
+
+  cancelExperiment(jobId: string): Observable<any> {
+    console.log(`Cancelando experimento ${jobId}...`);
+    return this.http.delete<any>(`${this.baseUrl}/experiments/${jobId}`).pipe(
+      tap(response => console.log('Experimento cancelado:', response)),
+      catchError(this.handleError)
+    );
+  }
+
 }
@@ -0,0 +1,230 @@
+import struct
+import numpy as np
+from typing import Dict, Optional, Tuple
+from batch_simulator import KNIGHT_TARGETS
+import zobrist
+
+SQUARES = 64
+# Estados de una configuración: jugador que mueve, multiplicadores (blanco, negro) y casillas de ambos caballos
+STATES = 2 * 4 * SQUARES * SQUARES
+INVALID = -128  # Valor de los estados imposibles (caballos superpuestos o sobre un objetivo)
+
+MAGIC = b'SHTB0001'
+HEADER = struct.Struct('<8sQ')  # magic, cantidad de tablas
+INDEX_ENTRY = struct.Struct('<QQ')  # clave de la configuración, posición de la tabla en el archivo
+
+DEFAULT_TABLEBASE_K = 3
+
+
+def state_index(white_to_move: bool, white_multiplier: bool, black_multiplier: bool,
+                white_square: int, black_square: int) -> int:
+    return (((0 if white_to_move else 1) * 4 + white_multiplier * 2 + black_multiplier) * SQUARES +
+            white_square) * SQUARES + black_square
+
+
+def config_key(points: Dict[int, int], multipliers) -> int:
+    """Clave Zobrist de los objetivos que quedan (casilla -> valor de los puntos y casillas de multiplicadores)"""
+    key = 0
+    for sq, value in points.items():
+        key ^= zobrist.POINT_KEYS[sq][value]
+    for sq in multipliers:
+        key ^= zobrist.MULTIPLIER_KEYS[sq]
+    return key
+
+
+# Decodificación de todos los índices de estado, calculada una sola vez
+_index = np.arange(STATES)
+BLACK_SQ = _index % SQUARES
+WHITE_SQ = (_index // SQUARES) % SQUARES
+BLACK_MULT = (_index // (SQUARES * SQUARES)) % 2
+WHITE_MULT = (_index // (SQUARES * SQUARES * 2)) % 2
+WHITE_TURN = _index < STATES // 2
+MOVER_SQ = np.where(WHITE_TURN, WHITE_SQ, BLACK_SQ)
+OTHER_SQ = np.where(WHITE_TURN, BLACK_SQ, WHITE_SQ)
+MOVER_MULT = np.where(WHITE_TURN, WHITE_MULT, BLACK_MULT)
+DESTINATIONS = KNIGHT_TARGETS[MOVER_SQ]
+LEGAL = (DESTINATIONS >= 0) & (DESTINATIONS != OTHER_SQ[:, None])
+SAFE_DEST = np.maximum(DESTINATIONS, 0)
+
+
+def _next_index(new_mover_mult: np.ndarray) -> np.ndarray:
+    """Índice del estado al que lleva cada movimiento, con el multiplicador del que mueve ya actualizado"""
+    white_mult = np.where(WHITE_TURN[:, None], new_mover_mult, WHITE_MULT[:, None])
+    black_mult = np.where(WHITE_TURN[:, None], BLACK_MULT[:, None], new_mover_mult)
+    white_sq = np.where(WHITE_TURN[:, None], SAFE_DEST, WHITE_SQ[:, None])
+    black_sq = np.where(WHITE_TURN[:, None], BLACK_SQ[:, None], SAFE_DEST)
+    side = np.where(WHITE_TURN, 1, 0)[:, None]  # Después del movimiento le toca al rival
+    return ((side * 4 + white_mult * 2 + black_mult) * SQUARES + white_sq) * SQUARES + black_sq
+
+
+NEXT_SAME_MULT = _next_index(MOVER_MULT[:, None] * np.ones(8, dtype=np.int64))
+NEXT_MULT_OFF = _next_index(np.zeros((STATES, 8), dtype=np.int64))
+NEXT_MULT_ON = _next_index(np.ones((STATES, 8), dtype=np.int64))
+
+
+def _attractor(turn: np.ndarray, target: np.ndarray, internal: np.ndarray, next_index: np.ndarray,
+               valid: np.ndarray) -> np.ndarray:
+    """Estados desde los que el jugador `turn` puede forzar un movimiento de `target` (juego de alcance)"""
+    reached = np.zeros(STATES, dtype=bool)
+    while True:
+        ok = target | (internal & reached[next_index])
+        forced = np.where(turn, ok.any(axis=1), (ok | ~LEGAL).all(axis=1))
+        forced &= valid
+        if np.array_equal(forced, reached):
+            return reached
+        reached = forced
+
+
+def solve_configuration(points: Dict[int, int], multipliers, subtables: Dict[int, np.ndarray]) -> np.ndarray:
+    """Valor exacto (ganancia futura del blanco menos la del negro) de cada estado de una configuración.
+
+    subtables tiene las tablas de todas las configuraciones con un objetivo
+    menos. Cada captura sale de la configuración hacia una de ellas; el resto
+    de los movimientos quedan dentro. Si nadie captura, la partida sigue sin
+    ganancias y vale 0. El valor de un estado es el mayor umbral t tal que el
+    blanco puede forzar un resultado >= t: con t > 0 debe alcanzar una salida
+    que valga >= t, y con t <= 0 basta con que el negro no pueda forzar una
+    salida que valga < t (análisis retrógrado por umbrales).
+    """
+    targets = set(points) | set(multipliers)
+    target_board = np.zeros(SQUARES, dtype=bool)
+    target_board[list(targets)] = True
+    valid = (WHITE_SQ != BLACK_SQ) & ~target_board[WHITE_SQ] & ~target_board[BLACK_SQ]
+
+    is_exit = LEGAL & target_board[SAFE_DEST]
+    internal = LEGAL & ~is_exit
+    exit_values = np.zeros((STATES, 8), dtype=np.int64)
+    for sq in targets:
+        remaining_points = {p: v for p, v in points.items() if p != sq}
+        remaining_multipliers = [m for m in multipliers if m != sq]
+        # Sin puntos la partida termina: no hay más ganancias
+        sub = subtables[config_key(remaining_points, remaining_multipliers)].astype(np.int64) \
+            if remaining_points else np.zeros(STATES, dtype=np.int64)
+        hit = is_exit & (DESTINATIONS == sq)
+        if sq in points:
+            gain = points[sq] * np.where(MOVER_MULT == 1, 2, 1)[:, None]
+            value = np.where(WHITE_TURN[:, None], gain, -gain) + sub[NEXT_MULT_OFF]
+        else:
+            value = sub[NEXT_MULT_ON]
+        exit_values = np.where(hit, value, exit_values)
+
+    thresholds = np.unique(np.concatenate([exit_values[is_exit & valid[:, None]], [0]]))[::-1]
+    values = np.full(STATES, INVALID, dtype=np.int64)
+    unassigned = valid.copy()
+    for t in thresholds:
+        if t > 0:
+            white_wins = _attractor(WHITE_TURN, is_exit & (exit_values >= t), internal, NEXT_SAME_MULT, valid)
+        else:
+            black_wins = _attractor(~WHITE_TURN, is_exit & (exit_values < t), internal, NEXT_SAME_MULT, valid)
+            white_wins = valid & ~black_wins
+        assign = unassigned & white_wins
+        values[assign] = t
+        unassigned &= ~assign
+        if not unassigned.any():
+            break
+    return values.astype(np.int8)
+
+
+class Tablebase:
+    """Tablas de finales exactas para posiciones con hasta k objetivos (puntos y multiplicadores).
+
+    Cada configuración de objetivos tiene una tabla de int8 indexada por
+    state_index con la diferencia de puntos que se sumará hasta el final con
+    juego perfecto, sin contar el límite de 150 movimientos. Las tablas se
+    construyen a pedido para los objetivos que quedan en una partida (con
+    todos sus subconjuntos) y pueden guardarse y cargarse con save/load.
+    """
+
+    def __init__(self, k: int = DEFAULT_TABLEBASE_K):
+        self.k = k
+        self.tables = {}  # clave de configuración -> valores por estado
+        self.hits = 0
+
+    @staticmethod
+    def board_targets(board) -> Tuple[Dict[int, int], list]:
+        points = {}
+        mask = board.points_mask
+        while mask:
+            bit = mask & -mask
+            sq = bit.bit_length() - 1
+            points[sq] = board.point_values[sq]
+            mask ^= bit
+        multipliers = [sq for sq in range(SQUARES) if board.multipliers_mask >> sq & 1]
+        return points, multipliers
+
+    def covers(self, board) -> bool:
+        """Indica si la posición tiene pocos objetivos como para estar en la tabla"""
+        remaining = bin(board.points_mask).count('1') + bin(board.multipliers_mask).count('1')
+        return 0 < remaining <= self.k and bool(board.points_mask)
+
+    def build(self, points: Dict[int, int], multipliers) -> int:
+        """Construye la tabla de una configuración y la de todos sus subconjuntos; devuelve cuántas creó"""
+        targets = [(sq, points[sq]) for sq in sorted(points)] + [(sq, None) for sq in sorted(multipliers)]
+        built = 0
+        for size in range(1, len(targets) + 1):
+            for subset in range(1, 1 << len(targets)):
+                if bin(subset).count('1') != size:
+                    continue
+                chosen = [targets[i] for i in range(len(targets)) if subset >> i & 1]
+                sub_points = {sq: value for sq, value in chosen if value is not None}
+                sub_multipliers = [sq for sq, value in chosen if value is None]
+                if not sub_points:
+                    continue
+                key = config_key(sub_points, sub_multipliers)
+                if key not in self.tables:
+                    self.tables[key] = solve_configuration(sub_points, sub_multipliers, self.tables)
+                    built += 1
+        return built
+
+    def probe(self, board, white_to_move: bool) -> Optional[int]:
+        """Diferencia de puntos (blanco menos negro) que falta sumar con juego perfecto, o None"""
+        if not self.covers(board):
+            return None
+        points, multipliers = self.board_targets(board)
+        table = self.tables.get(config_key(points, multipliers))
+        if table is None:
+            return None
+        value = int(table[state_index(white_to_move, board.white_multiplier, board.black_multiplier,
+                                      zobrist.POS_INDEX[board.white_horse], zobrist.POS_INDEX[board.black_horse])])
+        if value == INVALID:
+            return None
+        self.hits += 1
+        return value
+
+    def ensure(self, board) -> bool:
+        """Construye las tablas de los objetivos de la posición si todavía no existen"""
+        if not self.covers(board):
+            return False
+        points, multipliers = self.board_targets(board)
+        if config_key(points, multipliers) not in self.tables:
+            self.build(points, multipliers)
+        return True
+
+    def size_bytes(self) -> int:
+        return len(self.tables) * (STATES + INDEX_ENTRY.size)
+
+    def save(self, path: str):
+        """Formato: cabecera, índice (clave, posición) ordenado por clave y una tabla de STATES bytes por entrada"""
+        keys = sorted(self.tables)
+        data_start = HEADER.size + len(keys) * INDEX_ENTRY.size
+        with open(path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, len(keys)))
+            for i, key in enumerate(keys):
+                f.write(INDEX_ENTRY.pack(key, data_start + i * STATES))
+            for key in keys:
+                f.write(self.tables[key].tobytes())
+
+    @classmethod
+    def load(cls, path: str, k: int = DEFAULT_TABLEBASE_K) -> 'Tablebase':
+        """Abre un archivo guardado con save; las tablas se leen del disco a medida que se consultan"""
+        tablebase = cls(k)
+        with open(path, 'rb') as f:
+            magic, count = HEADER.unpack(f.read(HEADER.size))
+            if magic != MAGIC:
+                raise ValueError(f"{path} no es una tabla de finales válida")
+            index = [INDEX_ENTRY.unpack(f.read(INDEX_ENTRY.size)) for _ in range(count)]
+        if count:
+            data = np.memmap(path, dtype=np.int8, mode='r', offset=index[0][1], shape=(count * STATES,))
+            for i, (key, _) in enumerate(index):
+                tablebase.tables[key] = data[i * STATES:(i + 1) * STATES]
+        return tablebase
@@ -0,0 +1,97 @@
+import random
+import pytest
+import zobrist
+from bitboard import BitBoard
+from board import Board
+
+
+def snapshot(board):
+    """Estado observable de un Board o BitBoard"""
+    return {
+        'points': dict(board.points.items()),
+        'multipliers': set(board.multipliers),
+        'horses': (board.white_horse, board.black_horse),
+        'scores': (board.white_score, board.black_score),
+        'multiplier_flags': (board.white_multiplier, board.black_multiplier),
+        'moves_count': board.moves_count,
+        'white_to_move': board.white_to_move,
+        'history': list(board.position_history),
+        'history_key': board.position_history.key,
+        'zobrist_hash': board.zobrist_hash,
+        'targets': board.targets,
+        'cells': board.board.tolist(),
+    }
+
+
+def history_key(history) -> int:
+    key = 0
+    for entry in history:
+        key = (key * zobrist.HISTORY_BASE + zobrist.history_entry_key(entry)) & zobrist.HASH_MASK
+    return key
+
+
+def play_random_moves(board, rng, plies):
+    """Juega hasta `plies` movimientos al azar y devuelve cuántos jugó"""
+    is_white = True
+    for played in range(plies):
+        if board.is_game_over():
+            return played
+        moves = board.get_valid_moves(board.white_horse if is_white else board.black_horse)
+        if not moves:
+            return played
+        board.make_move(rng.choice(moves), is_white)
+        is_white = not is_white
+    return plies
+
+
+@pytest.mark.parametrize("board_class", [Board, BitBoard])
+@pytest.mark.parametrize("seed", range(10))
+def test_unmake_restores_every_state(board_class, seed):
+    rng = random.Random(seed)
+    board = board_class()
+    board.initialize_board(random.Random(seed))
+    states = [snapshot(board)]
+    is_white = True
+    while not board.is_game_over() and len(states) < 80:
+        moves = board.get_valid_moves(board.white_horse if is_white else board.black_horse)
+        if not moves:
+            break
+        board.make_move(rng.choice(moves), is_white)
+        is_white = not is_white
+        states.append(snapshot(board))
+    while board.undo_stack:
+        states.pop()
+        board.unmake_move()
+        assert snapshot(board) == states[-1]
+
+
+@pytest.mark.parametrize("board_class", [Board, BitBoard])
+@pytest.mark.parametrize("seed", range(10))
+def test_incremental_hashes_match_full_computation(board_class, seed):
+    rng = random.Random(seed)
+    board = board_class()
+    board.initialize_board(random.Random(seed))
+    is_white = True
+    for _ in range(60):
+        if board.is_game_over():
+            break
+        moves = board.get_valid_moves(board.white_horse if is_white else board.black_horse)
+        if not moves:
+            break
+        board.make_move(rng.choice(moves), is_white)
+        is_white = not is_white
+        if rng.random() < 0.2:
+            board.unmake_move()
+            is_white = not is_white
+        assert board.zobrist_hash == zobrist.compute_hash(board)
+        assert board.position_history.key == history_key(board.position_history)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_bitboard_matches_board(seed):
+    board, bitboard = Board(), BitBoard()
+    board.initialize_board(random.Random(seed))
+    bitboard.initialize_board(random.Random(seed))
+    play_random_moves(board, random.Random(seed), 40)
+    play_random_moves(bitboard, random.Random(seed), 40)
+    assert snapshot(bitboard) == snapshot(board)
@@ -0,0 +1,24 @@
+import multiprocessing
+import threading
+from experiments import iter_experiment_games
+
+
+def test_same_games_with_any_worker_count():
+    levels = {'Principiante': 1, 'Amateur': 2}
+    serial = list(iter_experiment_games(levels, games_per_pairing=1, base_seed=3, workers=1))
+    pooled = list(iter_experiment_games(levels, games_per_pairing=1, base_seed=3, workers=2))
+    assert serial == pooled
+
+
+def test_cancel_terminates_running_workers():
+    cancel_event = threading.Event()
+    games = iter_experiment_games({'Experto': 6}, games_per_pairing=200, workers=2,
+                                  cancel_event=cancel_event)
+    next(games)
+    workers = multiprocessing.active_children()
+    cancel_event.set()
+
+    assert len(list(games)) < 199
+    assert workers
+    assert not any(process.is_alive() for process in workers)
+    assert not multiprocessing.active_children()
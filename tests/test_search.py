@@ -0,0 +1,92 @@
+import random
+import threading
+import pytest
+from board import Board
+from cancellation import CancellationToken, SearchCancelled
+from minimax_player import MinimaxPlayer
+from opening_book import build_opening_book
+
+
+def play_game(seed, depth=3, **options):
+    """Movimientos de una partida como AIGame (utilidad 1 contra 2) desde una posición sembrada"""
+    board = Board()
+    board.initialize_board(random.Random(seed))
+    players = {True: MinimaxPlayer(depth, 1, **options), False: MinimaxPlayer(depth, 2, **options)}
+    moves = []
+    is_white = True
+    while not board.is_game_over():
+        move = players[is_white].make_move(board, is_white)
+        moves.append(move)
+        if move:
+            board.make_move(move, is_white)
+        is_white = not is_white
+    return moves
+
+
+def seeded_board(seed):
+    board = Board()
+    board.initialize_board(random.Random(seed))
+    return board
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_transposition_table_does_not_change_the_game(seed):
+    assert play_game(seed, depth=4) == play_game(seed, depth=4, tt_size=0)
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_negamax_and_pvs_match_minimax(seed):
+    reference = play_game(seed, tt_size=0)
+    assert play_game(seed, tt_size=0, negamax=True) == reference
+    assert play_game(seed, tt_size=0, pvs=True) == reference
+
+
+def test_opening_book_does_not_change_the_game(tmp_path):
+    path = str(tmp_path / "libro.bin")
+    seeds = range(4)
+    build_opening_book(path, [(seed, 3, 3) for seed in seeds], capacity=1 << 12, workers=1)
+    for seed in seeds:
+        assert play_game(seed, opening_book=path) == play_game(seed)
+
+
+def test_book_probe_is_a_hit_for_the_same_configuration(tmp_path):
+    path = str(tmp_path / "libro.bin")
+    build_opening_book(path, [(0, 3, 3)], capacity=1 << 12, workers=1)
+    board = seeded_board(0)
+    player = MinimaxPlayer(3, 1, opening_book=path)
+    player.make_move(board, True)
+    assert player.opening_book().stats()["hits"] == 1
+    other = MinimaxPlayer(3, 1, opening_book=path, lmr=True)
+    other.make_move(board, True)
+    assert other.opening_book().stats()["hits"] == 0
+
+
+def test_cancelled_token_raises_before_searching():
+    token = CancellationToken()
+    token.cancel()
+    with pytest.raises(SearchCancelled):
+        MinimaxPlayer(4, 1).make_move(seeded_board(0), True, token)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_cancel_during_search_leaves_the_board_untouched(workers):
+    board = seeded_board(1)
+    before = (board.zobrist_hash, board.position_history.key, len(board.undo_stack))
+    player = MinimaxPlayer(16, 1, tt_size=0, workers=workers)
+    token = CancellationToken()
+    timer = threading.Timer(0.2, token.cancel)
+    timer.start()
+    try:
+        with pytest.raises(SearchCancelled):
+            player.make_move(board, True, token)
+    finally:
+        timer.cancel()
+        player.close()
+    assert (board.zobrist_hash, board.position_history.key, len(board.undo_stack)) == before
+
+
+def test_deadline_keeps_the_last_completed_iteration():
+    player = MinimaxPlayer(16, 1, time_limit_ms=5000)
+    move = player.make_move(seeded_board(2), True, CancellationToken(200))
+    assert move is not None
+    assert 0 < player.last_search_depth < 16
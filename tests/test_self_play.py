@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+from self_play import (HEADER_SIZE, RECORD, ShardWriter, count_records, generate_dataset, iter_records,
+                       open_shard, shard_paths)
+
+
+def numbered_records(count, start=0):
+    records = np.zeros(count, dtype=RECORD)
+    records['key'] = np.arange(start, start + count)
+    records['move'] = np.arange(start, start + count) % 64
+    return records
+
+
+def test_record_layout():
+    assert RECORD.itemsize == 96
+    assert RECORD.fields['key'][1] == 0
+    assert RECORD.fields['cells'][0].shape == (8, 8)
+
+
+def test_writer_splits_records_across_shards(tmp_path):
+    with ShardWriter(str(tmp_path), shard_records=10) as writer:
+        writer.append(numbered_records(7))
+        writer.append(numbered_records(18, start=7))
+    paths = shard_paths(str(tmp_path))
+    assert len(paths) == 3
+    assert [len(open_shard(path)) for path in paths] == [10, 10, 5]
+    # El último archivo se recorta a los registros escritos
+    assert (tmp_path / "shard-00002.rec").stat().st_size == HEADER_SIZE + 5 * RECORD.itemsize
+    keys = np.concatenate([batch['key'] for batch in iter_records(str(tmp_path), batch_size=4)])
+    assert keys.tolist() == list(range(25))
+
+
+def test_writer_appends_to_the_last_shard(tmp_path):
+    with ShardWriter(str(tmp_path), shard_records=10) as writer:
+        writer.append(numbered_records(4))
+    with ShardWriter(str(tmp_path), shard_records=10) as writer:
+        writer.append(numbered_records(3, start=4))
+    assert count_records(str(tmp_path)) == 7
+    assert len(shard_paths(str(tmp_path))) == 1
+
+
+def test_rejects_files_of_another_format(tmp_path):
+    (tmp_path / "shard-00000.rec").write_bytes(b'\0' * HEADER_SIZE)
+    with pytest.raises(ValueError):
+        open_shard(str(tmp_path / "shard-00000.rec"))
+
+
+def test_dataset_is_the_same_with_any_worker_count(tmp_path):
+    serial, pooled = tmp_path / "serial", tmp_path / "pool"
+    summary = generate_dataset(str(serial), games=3, white_depth=2, black_depth=2, random_plies=2, workers=1)
+    generate_dataset(str(pooled), games=3, white_depth=2, black_depth=2, random_plies=2, workers=2)
+    assert summary["positions"] == count_records(str(serial)) > 0
+    records = np.concatenate(list(iter_records(str(serial))))
+    assert records.tobytes() == np.concatenate(list(iter_records(str(pooled)))).tobytes()
+    # Las jugadas al azar no tienen puntaje; las buscadas sí
+    assert np.isnan(records['score'][:2]).all()
+    assert set(np.unique(records['result'])) <= {-1, 0, 1}
@@ -0,0 +1,102 @@
+import sys
+from typing import Optional, Tuple
+
+EXACT = 0
+LOWER_BOUND = 1
+UPPER_BOUND = 2
+
+DEFAULT_TT_SIZE = 1 << 16
+
+# Bytes aproximados de los objetos de una entrada ocupada (clave, puntaje y movimiento)
+ENTRY_OBJECT_BYTES = 120
+
+
+class TranspositionTable:
+    """Tabla de transposición de capacidad fija indexada por hash Zobrist.
+
+    Cada entrada guarda la profundidad buscada, el tipo de cota (exacta,
+    inferior o superior), el puntaje y el mejor movimiento. Cuando dos
+    posiciones caen en la misma ranura se conserva la búsqueda más profunda,
+    salvo que la entrada guardada pertenezca a una búsqueda anterior.
+    """
+
+    def __init__(self, size: int = DEFAULT_TT_SIZE):
+        if size <= 0:
+            raise ValueError("El tamaño de la tabla de transposición debe ser positivo")
+        self.size = size
+        # Arreglos paralelos preasignados: no se crean objetos por entrada
+        self.keys = [None] * size
+        self.depths = [0] * size
+        self.flags = [EXACT] * size
+        self.scores = [0.0] * size
+        self.moves = [None] * size
+        self.generations = [0] * size
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.overwrites = 0
+
+    def new_search(self):
+        """Marca el inicio de una nueva búsqueda para que las entradas viejas puedan reemplazarse"""
+        self.generation += 1
+
+    def probe(self, key: int) -> Optional[Tuple[int, int, float, Optional[Tuple[int, int]]]]:
+        """Devuelve (profundidad, tipo de cota, puntaje, mejor movimiento) o None si no hay entrada"""
+        index = key % self.size
+        if self.keys[index] == key:
+            self.hits += 1
+            return self.depths[index], self.flags[index], self.scores[index], self.moves[index]
+        self.misses += 1
+        return None
+
+    def best_move(self, key: int) -> Optional[Tuple[int, int]]:
+        """Devuelve el mejor movimiento guardado sin contar el acceso en las estadísticas"""
+        index = key % self.size
+        return self.moves[index] if self.keys[index] == key else None
+
+    def store(self, key: int, depth: int, flag: int, score: float, move: Optional[Tuple[int, int]]):
+        """Guarda una entrada aplicando la política de reemplazo por profundidad y antigüedad"""
+        index = key % self.size
+        stored_key = self.keys[index]
+        if stored_key is not None and stored_key != key:
+            if self.generations[index] == self.generation and self.depths[index] > depth:
+                return
+            self.overwrites += 1
+        elif stored_key == key and move is None:
+            # Se conserva el mejor movimiento previo de la misma posición
+            move = self.moves[index]
+        self.keys[index] = key
+        self.depths[index] = depth
+        self.flags[index] = flag
+        self.scores[index] = score
+        self.moves[index] = move
+        self.generations[index] = self.generation
+        self.stores += 1
+
+    def clear(self):
+        """Vacía la tabla y reinicia las estadísticas"""
+        self.__init__(self.size)
+
+    def memory_bytes(self) -> int:
+        """Memoria aproximada de la tabla: los arreglos preasignados más los objetos de las entradas ocupadas"""
+        arrays = (self.keys, self.depths, self.flags, self.scores, self.moves, self.generations)
+        return sum(sys.getsizeof(array) for array in arrays) + self.used_slots() * ENTRY_OBJECT_BYTES
+
+    def used_slots(self) -> int:
+        """Cantidad de ranuras ocupadas"""
+        return self.size - self.keys.count(None)
+
+    def stats(self) -> dict:
+        """Estadísticas de uso para dimensionar la tabla"""
+        lookups = self.hits + self.misses
+        used = self.used_slots()
+        return {
+            "size": self.size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "stores": self.stores,
+            "overwrites": self.overwrites,
+            "fill": used / self.size,
+        }
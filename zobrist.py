@@ -0,0 +1,73 @@
+import random
+
+# Semilla fija: los hashes deben coincidir entre procesos y ejecuciones
+_rng = random.Random(20241)
+
+
+def _key() -> int:
+    return _rng.getrandbits(64)
+
+
+SQUARES = 64
+MAX_POINT_VALUE = 10
+SCORE_DIFF_SLOTS = 512  # La diferencia de puntajes nunca supera ±110
+
+# Índice de casilla de cada posición (x, y), igual que en BitBoard
+POS_INDEX = {(x, y): x * 8 + y for x in range(8) for y in range(8)}
+
+HORSE_KEYS = ([_key() for _ in range(SQUARES)], [_key() for _ in range(SQUARES)])  # (blanco, negro)
+POINT_KEYS = [[_key() for _ in range(MAX_POINT_VALUE + 1)] for _ in range(SQUARES)]
+MULTIPLIER_KEYS = [_key() for _ in range(SQUARES)]
+WHITE_MULTIPLIER_KEY = _key()
+BLACK_MULTIPLIER_KEY = _key()
+BLACK_TO_MOVE_KEY = _key()
+SCORE_DIFF_KEYS = [_key() for _ in range(SCORE_DIFF_SLOTS)]
+# Distingue las búsquedas hechas desde la perspectiva del caballo negro
+BLACK_PERSPECTIVE_KEY = _key()
+# Entradas del historial de posiciones (blanco, negro); ver PositionHistory.key
+HISTORY_ENTRY_KEYS = ([_key() for _ in range(SQUARES)], [_key() for _ in range(SQUARES)])
+MAX_MOVES_COUNT = 150
+MOVES_COUNT_KEYS = [_key() for _ in range(MAX_MOVES_COUNT + 1)]
+
+# La clave del historial es un hash polinomial de sus entradas en base HISTORY_BASE
+# módulo 2**64; la base es impar, así que tiene inversa y un append se puede deshacer
+HASH_MASK = (1 << 64) - 1
+HISTORY_BASE = 0x9E3779B97F4A7C15
+HISTORY_BASE_INVERSE = pow(HISTORY_BASE, -1, 1 << 64)
+
+
+def horse_key(position, is_white: bool) -> int:
+    """Clave de un caballo en una posición; 0 si el caballo aún no está en el tablero"""
+    if position is None:
+        return 0
+    return HORSE_KEYS[0 if is_white else 1][POS_INDEX[position]]
+
+
+def history_entry_key(entry) -> int:
+    position, is_white = entry
+    return HISTORY_ENTRY_KEYS[0 if is_white else 1][POS_INDEX[position]]
+
+
+def moves_count_key(moves_count: int) -> int:
+    return MOVES_COUNT_KEYS[min(moves_count, MAX_MOVES_COUNT)]
+
+
+def score_diff_key(white_score: int, black_score: int) -> int:
+    return SCORE_DIFF_KEYS[(white_score - black_score) % SCORE_DIFF_SLOTS]
+
+
+def compute_hash(board) -> int:
+    """Calcula desde cero el hash Zobrist de un tablero (Board o BitBoard)"""
+    h = horse_key(board.white_horse, True) ^ horse_key(board.black_horse, False)
+    for pos, value in board.points.items():
+        h ^= POINT_KEYS[POS_INDEX[pos]][value]
+    for pos in board.multipliers:
+        h ^= MULTIPLIER_KEYS[POS_INDEX[pos]]
+    if board.white_multiplier:
+        h ^= WHITE_MULTIPLIER_KEY
+    if board.black_multiplier:
+        h ^= BLACK_MULTIPLIER_KEY
+    if not board.white_to_move:
+        h ^= BLACK_TO_MOVE_KEY
+    h ^= score_diff_key(board.white_score, board.black_score)
+    return h